@@ -0,0 +1,50 @@
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+from fraud_data_cleaning import FraudDataCleaner
+from test_pipeline import make_raw_fraud_data
+
+
+def in_memory(path, output_path):
+    cleaner = FraudDataCleaner(path)
+    cleaner.load_data()
+    cleaner.remove_duplicates()
+    cleaner.fix_data_types()
+    cleaner.handle_missing_values()
+    cleaner.detect_outliers(threshold=3)
+    cleaner.save_cleaned_data(output_path)
+
+
+def measure(fn, *args):
+    """(seconds, peak traced MB) of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmark(sizes=(50_000, 200_000, 800_000), chunksize=50_000):
+    """Peak memory of the in-memory cleaner grows with the file; the chunked one stays flat."""
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "Fraud_Data.csv")
+        output_path = os.path.join(tmp_dir, "cleaned.csv")
+        for n in sizes:
+            make_raw_fraud_data(n).to_csv(path, index=False)
+            memory_seconds, memory_peak = measure(in_memory, path, output_path)
+            chunked_seconds, chunked_peak = measure(FraudDataCleaner(path).clean_in_chunks, output_path, chunksize)
+            print(f"{n:>9} rows  in-memory {memory_seconds:6.2f} s {memory_peak:8.1f} MB   "
+                  f"chunked {chunked_seconds:6.2f} s {chunked_peak:8.1f} MB")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,65 @@
+import logging
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+from feature_Engineering import FraudFeatureEngineer
+from feature_transform import FeatureTransform
+from test_pipeline import FraudPipeline, STAGES, make_raw_fraud_data
+
+
+def multi_step(processor, cleaned):
+    """The fitted training steps replayed one pandas step at a time, as a scorer would without the artifact."""
+    engineer = FraudFeatureEngineer(None, output_path=None)
+    engineer.df = cleaned
+    df = engineer.engineer_time_features()
+    df["ip_country"] = processor.ip_index.lookup(processor.ip_to_numeric(df.pop("ip_address")))
+    for col, encoder in processor.label_encoders.items():
+        df[col + "_encoded"] = encoder.transform(df.pop(col))
+    df[processor.numeric_cols] = processor.scaler.transform(df[processor.numeric_cols])
+    return df.drop(columns=["class"]).to_numpy(dtype=np.float64)
+
+
+def rows_per_second(fn, *args, min_seconds=0.5):
+    """Calls fn until min_seconds have passed and returns the calls per second."""
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        fn(*args)
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def run_benchmark(sizes=(1, 100, 10_000, 200_000)):
+    """Throughput of the fused transform against the multi-step pandas path, on cleaned frames and raw records."""
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fraud_path = os.path.join(tmp_dir, "Fraud_Data.csv")
+        ip_path = os.path.join(tmp_dir, "ip_to_country.csv")
+        transform_path = os.path.join(tmp_dir, "feature_transform.npz")
+        make_raw_fraud_data(max(sizes), seed=1).to_csv(fraud_path, index=False)
+        bounds = np.sort(np.random.default_rng(0).choice(2**32, 2 * 5000, replace=False))
+        pd.DataFrame({"lower_bound_ip_address": bounds[::2], "upper_bound_ip_address": bounds[1::2],
+                      "country": [f"country_{i % 200}" for i in range(5000)]}).to_csv(ip_path, index=False)
+
+        pipeline = FraudPipeline(fraud_path, ip_path, track_memory=False, transform_path=transform_path)
+        cleaned = pipeline.run(stages=STAGES[:1])
+        pipeline.run(df=cleaned.copy(), stages=STAGES[1:-1])
+        transform = FeatureTransform.load(transform_path)
+        print(f"{'rows':>9}  {'multi-step rows/s':>18}  {'fused rows/s':>14}  {'fused records rows/s':>21}")
+        for n in sizes:
+            frame = cleaned.iloc[:n].copy()
+            records = make_raw_fraud_data(n, seed=2).to_dict("records")
+            np.testing.assert_allclose(transform.transform(frame), multi_step(pipeline.processor, frame.copy()))
+            baseline = rows_per_second(lambda: multi_step(pipeline.processor, frame.copy())) * n
+            fused = rows_per_second(transform.transform, frame) * n
+            fused_records = rows_per_second(transform.transform, records) * n
+            print(f"{n:>9}  {baseline:>18,.0f}  {fused:>14,.0f}  {fused_records:>21,.0f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from fraud_aggregates import FraudAggregates
+
+# (start, end, granularity) as the dashboard would ask: zoomed in, a month, everything
+QUERIES = [
+    ("2015-03-01 09:00", "2015-03-01 15:00", "minute"),
+    ("2015-03-01", "2015-03-08", "hour"),
+    ("2015-02-01", "2015-03-01", "day"),
+    (None, None, "week"),
+]
+
+
+def make_rows(n, seed=0):
+    """n purchase times (epoch seconds) over 300 days from 2015-01-01 and ~10% fraud labels."""
+    rng = np.random.default_rng(seed)
+    seconds = np.int64(1420070400) + rng.integers(0, 300 * 86400, n)
+    return pd.DataFrame({"purchase_time": seconds.astype("datetime64[s]"), "class": rng.random(n) < 0.1})
+
+
+def scan_trend(df, start, end, granularity):
+    """Reference: filter the frame and group by bucket, as a per-request pandas implementation would."""
+    times = df["purchase_time"]
+    if start is not None:
+        df = df[(times >= start) & (times < end)]
+    key = df["purchase_time"].dt.to_period("W-SUN").dt.start_time if granularity == "week" else \
+        df["purchase_time"].dt.floor({"minute": "min", "hour": "h", "day": "D"}[granularity])
+    return df.groupby(key)["class"].agg(["size", "sum", "mean"])
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run_benchmark(sizes=(1_000_000, 10_000_000, 50_000_000), scan_max_rows=10_000_000, repeat=20):
+    """Build time of the aggregates, then per-query latency against a filter+groupby scan."""
+    for n in sizes:
+        df = make_rows(n)
+        start = time.perf_counter()
+        aggregates = FraudAggregates.from_frame(df)
+        print(f"{n:>11,} rows  build {time.perf_counter() - start:6.2f} s")
+        for query in QUERIES:
+            seconds, body = timed(lambda: aggregates.trend(*query), repeat)
+            line = (f"    {query[2]:>6} {len(body['buckets']['start']):>5} buckets  "
+                    f"index {1000 * seconds:8.3f} ms")
+            if n <= scan_max_rows:
+                scan_seconds, expected = timed(lambda: scan_trend(df, *query), 1)
+                assert body["transactions"] == int(expected["size"].sum())
+                line += f"  scan {1000 * scan_seconds:9.1f} ms ({scan_seconds / seconds:8,.0f}x)"
+            print(line)
+        del df, aggregates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run_benchmark.__doc__)
+    parser.add_argument("--sizes", default="1000000,10000000,50000000",
+                        help="Comma-separated row counts (50M rows need about 4 GB of memory).")
+    args = parser.parse_args()
+    run_benchmark(sizes=[int(size) for size in args.sizes.split(",")])
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+from ip_range_index import IPRangeIndex
+
+
+def make_ip_table(n_ranges, seed=0):
+    """Disjoint, sorted IPv4 ranges with gaps, shaped like the IP-to-country mapping file."""
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(2**32 - 1, size=2 * n_ranges, replace=False)).reshape(n_ranges, 2)
+    return pd.DataFrame({
+        "lower_bound_ip_address": cuts[:, 0].astype(float),
+        "upper_bound_ip_address": cuts[:, 1],
+        "country": rng.choice([f"Country {i}" for i in range(235)], n_ranges),
+    })
+
+
+def scan_lookup(ip_mapping, ips):
+    """The previous map_ip_to_country: a boolean mask over the whole table for every transaction."""
+    def find_country(ip):
+        match = ip_mapping[(ip_mapping["lower_bound_ip_address"] <= ip) &
+                           (ip_mapping["upper_bound_ip_address"] >= ip)]
+        return match["country"].values[0] if not match.empty else "Unknown"
+    return pd.Series(ips).apply(find_country).to_numpy()
+
+
+def run_benchmark(n_transactions=1_000_000, n_ranges=140_000, scan_sample=200):
+    """Times the per-row scan (on a sample, extrapolated) against building and querying IPRangeIndex."""
+    ip_mapping = make_ip_table(n_ranges)
+    rng = np.random.default_rng(1)
+    ips = rng.uniform(0, 2**32 - 1, n_transactions)
+
+    start = time.perf_counter()
+    expected = scan_lookup(ip_mapping, ips[:scan_sample])
+    scan_seconds = (time.perf_counter() - start) * n_transactions / scan_sample
+    print(f"per-row scan   : {scan_seconds:10.1f} s (extrapolated from {scan_sample} rows)")
+
+    start = time.perf_counter()
+    index = IPRangeIndex.from_frame(ip_mapping)
+    build_ms = 1000.0 * (time.perf_counter() - start)
+    lookup_ms = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        countries = index.lookup(ips)
+        lookup_ms = min(lookup_ms, 1000.0 * (time.perf_counter() - start))
+    assert countries[:scan_sample].tolist() == expected.tolist()
+    print(f"index build    : {build_ms:10.1f} ms ({len(index)} segments)")
+    print(f"index lookup   : {lookup_ms:10.1f} ms for {n_transactions} transactions")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "ip_range_index.npz")
+        index.save(path)
+        start = time.perf_counter()
+        IPRangeIndex.load(path)
+        print(f"index load     : {1000.0 * (time.perf_counter() - start):10.1f} ms")
+    print(f"speedup        : {1000.0 * scan_seconds / (build_ms + lookup_ms):10.0f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,82 @@
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from model_artifact import export_artifact, load_artifact
+
+
+def load_pickle(path):
+    """Loads a pickled model the way FraudDetectionAPI.load_model does."""
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def pss_kb():
+    """Proportional set size of this process (Linux only): shared pages are split between sharers."""
+    with open("/proc/self/smaps_rollup") as file:
+        for line in file:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def total_worker_pss_mb(load_fn, workers, X):
+    """Forks `workers` processes that each load the model themselves and score a batch; returns summed PSS."""
+    pipes = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            model = load_fn()
+            model.predict_proba(X)
+            os.write(write_fd, str(pss_kb()).encode())
+            time.sleep(1.0)  # stay alive so siblings see the shared pages
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append(read_fd)
+    total = sum(int(os.read(fd, 64)) for fd in pipes)
+    for fd in pipes:
+        os.close(fd)
+    for _ in range(workers):
+        os.wait()
+    return total / 1024.0
+
+
+def run_benchmark(n_rows=50000, n_features=17, n_estimators=100, worker_counts=(1, 2, 4, 8)):
+    """Compares pickle and memory-mapped artifact load time and total worker memory."""
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(n_rows, n_features))
+    y = ((X[:, 0] + X[:, 1] ** 2 + rng.normal(size=n_rows)) > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=-1).fit(X, y)
+    X_batch = X[:256].astype(np.float32)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        pickle_path = os.path.join(tmp_dir, "model.pkl")
+        with open(pickle_path, "wb") as file:
+            pickle.dump(model, file)
+        feature_names = [f"f{i}" for i in range(n_features)]
+        artifact_dir = export_artifact(model, os.path.join(tmp_dir, "artifact"), feature_names=feature_names)
+
+        for name, load_fn in (("pickle", lambda: load_pickle(pickle_path)),
+                              ("artifact", lambda: load_artifact(artifact_dir))):
+            start = time.perf_counter()
+            load_fn()
+            print(f"{name:<9} load time: {1000.0 * (time.perf_counter() - start):8.2f} ms")
+
+        for workers in worker_counts:
+            pickle_mb = total_worker_pss_mb(lambda: load_pickle(pickle_path), workers, X_batch)
+            artifact_mb = total_worker_pss_mb(lambda: load_artifact(artifact_dir), workers, X_batch)
+            print(f"workers={workers:<2} total PSS  pickle={pickle_mb:8.1f} MB  artifact={artifact_mb:8.1f} MB")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark()
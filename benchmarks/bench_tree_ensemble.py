@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from tree_ensemble import CompiledTreeEnsemble
+
+
+def median_ms(fn, X, repeats):
+    """Median wall time of fn(X) in milliseconds."""
+    fn(X)  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return 1000.0 * float(np.median(timings))
+
+
+def run_benchmark(n_train=20000, n_features=17, batch_sizes=(1, 32, 1024), repeats=50):
+    """Compares sklearn predict_proba with the compiled evaluator for the models FraudModelTrainer builds."""
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(n_train, n_features))
+    y = ((X[:, 0] + X[:, 1] ** 2 + rng.normal(size=n_train)) > 1).astype(int)
+    X_test = rng.normal(size=(max(batch_sizes), n_features)).astype(np.float32)
+
+    models = {
+        "decision_tree": DecisionTreeClassifier(random_state=42).fit(X, y),
+        "random_forest": RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y),
+    }
+    results = []
+    for name, model in models.items():
+        compiled = CompiledTreeEnsemble.from_model(model)
+        assert np.array_equal(compiled.predict_proba(X_test), model.predict_proba(X_test))
+        for batch_size in batch_sizes:
+            batch = X_test[:batch_size]
+            sklearn_ms = median_ms(model.predict_proba, batch, repeats)
+            compiled_ms = median_ms(compiled.predict_proba, batch, repeats)
+            results.append((name, batch_size, sklearn_ms, compiled_ms))
+            print(f"{name:<14} batch={batch_size:<5} sklearn={sklearn_ms:8.3f} ms  "
+                  f"compiled={compiled_ms:8.3f} ms  speedup={sklearn_ms / compiled_ms:5.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    run_benchmark()
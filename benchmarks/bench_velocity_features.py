@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+from velocity_features import DEFAULT_WINDOWS, velocity_features
+
+
+def make_transactions(n, seed=0):
+    """n purchases over 300 days; devices, IPs and users are shared by about 3, 2 and 2 purchases each."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "purchase_time": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 300 * 86400, n), unit="s"),
+        "device_id": rng.integers(0, max(n // 3, 1), n),
+        "ip_address": rng.integers(0, max(n // 2, 1), n).astype(np.float64),
+        "user_id": rng.integers(0, max(n // 2, 1), n),
+    })
+
+
+def naive_velocity(df, windows=DEFAULT_WINDOWS, keys=("device_id", "ip_address", "user_id")):
+    """groupby-apply reference: every row rescans its whole group, so big groups cost O(group size ** 2)."""
+    times = df["purchase_time"].astype("int64") // 10**9
+    features = {}
+    for key in keys:
+        for name, seconds in windows.items():
+            counts = pd.Series(0, index=df.index)
+            for _, group in times.groupby(df[key]):
+                values = group.to_numpy()
+                counts[group.index] = [((values > t - seconds) & (values <= t)).sum() for t in values]
+            features[f"{key}_txn_{name}"] = counts
+    return pd.DataFrame(features)
+
+
+def run_benchmark(sizes=(10_000, 100_000, 1_000_000, 10_000_000), naive_max_rows=100_000):
+    """Wall time of the sorted, vectorized features against groupby-apply."""
+    for n in sizes:
+        df = make_transactions(n)
+        start = time.perf_counter()
+        features = velocity_features(df)
+        seconds = time.perf_counter() - start
+        line = f"{n:>11,} rows  vectorized {seconds:8.2f} s ({n / seconds:12,.0f} rows/s, {features.shape[1]} features)"
+        if n <= naive_max_rows:
+            start = time.perf_counter()
+            naive_velocity(df)
+            line += f"  groupby-apply (counts only) {time.perf_counter() - start:8.2f} s"
+        print(line)
+        del df, features
+
+
+if __name__ == "__main__":
+    run_benchmark()
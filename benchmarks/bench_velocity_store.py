@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from velocity_store import RingBuffers, VelocityStore
+from bench_velocity_features import make_transactions
+
+
+def run_benchmark(n=2_000_000, single_updates=200_000, requests=20_000, max_keys=200_000):
+    """Update throughput of the ring buffers (bulk and one at a time) and per-request observe latency."""
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.integers(0, 300 * 86400, n))
+    # The Python work in update_many is once per distinct key, so throughput depends on how often keys repeat
+    for distinct in (max_keys, max_keys // 10):
+        keys = rng.integers(0, distinct, n)
+        buffers = RingBuffers(capacity=32, max_keys=max_keys, track_values=True)
+        start = time.perf_counter()
+        buffers.update_many(keys, times, keys)
+        seconds = time.perf_counter() - start
+        print(f"update_many  {n:>11,} updates {seconds:7.2f} s ({n / seconds:12,.0f} updates/s, "
+              f"{distinct:,} distinct keys)")
+
+    buffers = RingBuffers(capacity=32, max_keys=max_keys)
+    key_list, time_list = keys[:single_updates].tolist(), times[:single_updates].tolist()
+    start = time.perf_counter()
+    for key, t in zip(key_list, time_list):
+        buffers.update(key, t)
+    seconds = time.perf_counter() - start
+    print(f"update       {single_updates:>11,} updates {seconds:7.2f} s ({single_updates / seconds:12,.0f} updates/s)")
+
+    df = make_transactions(n)
+    store = VelocityStore(max_keys=max_keys)
+    history, live = df.iloc[:-requests], df.iloc[-requests:].sort_values("purchase_time")
+    start = time.perf_counter()
+    store.warm_up(history)
+    print(f"warm_up      {len(history):>11,} rows    {time.perf_counter() - start:7.2f} s")
+    records = live.to_dict("records")
+    start = time.perf_counter()
+    for record in records:
+        store.observe([record])
+    seconds = time.perf_counter() - start
+    print(f"observe      {requests:>11,} requests {seconds:6.2f} s ({1e6 * seconds / requests:8.1f} us/request, "
+          f"{len(store.feature_names)} features)")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,330 @@
+import argparse
+import http.client
+import json
+import os
+import pickle
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from werkzeug.serving import make_server
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from app import FraudDetectionBackend
+from flask_api import FraudDetectionAPI
+
+FEATURES = ["purchase_value", "age", "source", "browser", "ip_address"]
+PREDICTION_MIX = "single=0.8,batch=0.15,invalid=0.05"
+DASHBOARD_MIX = "summary=0.7,fraud_trends=0.3"
+
+
+def make_transactions(n, seed=0):
+    """Builds n random transactions as dicts keyed by FEATURES."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(5, 150, n),
+        rng.integers(18, 70, n),
+        rng.integers(0, 3, n),
+        rng.integers(0, 5, n),
+        rng.integers(0, 2**32 - 1, n),
+    ]).astype(float)
+    return [dict(zip(FEATURES, row)) for row in X.tolist()]
+
+
+def build_prediction_api(work_dir, n_estimators=100, **api_kwargs):
+    """Trains a forest on synthetic transactions and serves it with FraudDetectionAPI."""
+    train = pd.DataFrame(make_transactions(5000))
+    y = (train["purchase_value"] > 100).astype(int)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=-1).fit(train, y)
+    model_path = os.path.join(work_dir, "model.pkl")
+    with open(model_path, "wb") as file:
+        pickle.dump(model, file)
+    return FraudDetectionAPI(model_path=model_path, **api_kwargs)
+
+
+def build_dashboard(work_dir, n_rows=150000):
+    """Writes a synthetic fraud dataset and serves it with FraudDetectionBackend."""
+    rng = np.random.default_rng(42)
+    start = np.datetime64("2015-01-01T00:00:00")
+    data = pd.DataFrame({
+        "purchase_time": start + rng.integers(0, 120 * 86400, n_rows).astype("timedelta64[s]"),
+        "purchase_value": rng.integers(9, 155, n_rows),
+        "class": (rng.random(n_rows) < 0.09).astype(int),
+    })
+    data_path = os.path.join(work_dir, "fraud_data.csv")
+    data.to_csv(data_path, index=False)
+    return FraudDetectionBackend(data_path=data_path)
+
+
+def prediction_scenarios(batch_size=256):
+    """Request templates for FraudDetectionAPI: (method, path, JSON body or None)."""
+    invalid = make_transactions(1, seed=7)[0]
+    invalid["purchase_value"] = "invalid"
+    return {
+        "single": ("POST", "/predict", make_transactions(1, seed=1)[0]),
+        "batch": ("POST", "/predict/batch", make_transactions(batch_size, seed=2)),
+        "invalid": ("POST", "/predict", invalid),
+    }
+
+
+def dashboard_scenarios():
+    """Request templates for FraudDetectionBackend."""
+    return {
+        "summary": ("GET", "/summary", None),
+        "fraud_trends": ("GET", "/fraud-trends", None),
+    }
+
+
+def parse_mix(mix, scenarios):
+    """Turns "single=0.8,batch=0.2" into scenario names and normalized weights."""
+    names, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in scenarios:
+            raise ValueError(f"Unknown scenario '{name}'; choose from {sorted(scenarios)}.")
+        names.append(name)
+        weights.append(float(weight or 1.0))
+    weights = np.asarray(weights) / np.sum(weights)
+    return names, weights
+
+
+class FlaskClientTransport:
+    def __init__(self, app):
+        """Sends requests through Flask test clients (one per thread): measures the app without sockets."""
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, content_type="application/json")
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class ServerTransport:
+    def __init__(self, app):
+        """Serves the app on a local threaded werkzeug server and sends real HTTP requests to it."""
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, body):
+        # The development server closes the socket after every response, so connect per request
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        try:
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def run_load(transport, scenarios, mix, concurrency=8, duration=10.0, warmup=1.0, seed=0):
+    """
+    Sends a weighted mix of requests from `concurrency` threads for `duration` seconds.
+    :param transport: FlaskClientTransport or ServerTransport.
+    :param scenarios: {name: (method, path, body)} as built by prediction_scenarios/dashboard_scenarios.
+    :param mix: Scenario weights, e.g. "single=0.8,batch=0.2".
+    :param warmup: Seconds of traffic sent first and not measured.
+    :return: Per-scenario latency lists, per-scenario status-code counts and the measured wall time.
+    """
+    names, weights = parse_mix(mix, scenarios)
+    # Serialize bodies once so the client side does not dominate the measurement
+    encoded = {name: (method, path, None if body is None else json.dumps(body).encode())
+               for name, (method, path, body) in scenarios.items()}
+
+    def worker(index, stop_at, record):
+        rng = np.random.default_rng(seed + index)
+        picks = rng.choice(len(names), size=4096, p=weights)
+        latencies = {name: [] for name in names}
+        statuses = {name: {} for name in names}
+        i = 0
+        while time.perf_counter() < stop_at:
+            name = names[picks[i % len(picks)]]
+            method, path, body = encoded[name]
+            start = time.perf_counter()
+            status = transport.request(method, path, body)
+            elapsed = time.perf_counter() - start
+            if record:
+                latencies[name].append(elapsed)
+                statuses[name][status] = statuses[name].get(status, 0) + 1
+            i += 1
+        return latencies, statuses
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if warmup > 0:
+            stop_at = time.perf_counter() + warmup
+            list(pool.map(lambda i: worker(i, stop_at, False), range(concurrency)))
+        started = time.perf_counter()
+        stop_at = started + duration
+        results = list(pool.map(lambda i: worker(i, stop_at, True), range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies = {name: [] for name in names}
+    statuses = {name: {} for name in names}
+    for worker_latencies, worker_statuses in results:
+        for name in names:
+            latencies[name].extend(worker_latencies[name])
+            for status, count in worker_statuses[name].items():
+                statuses[name][status] = statuses[name].get(status, 0) + count
+    return latencies, statuses, elapsed
+
+
+def summarize(latencies, statuses, elapsed):
+    """Requests/s and latency percentiles (ms) per scenario and overall."""
+    def describe(values, status_counts):
+        values = np.asarray(values)
+        if len(values) == 0:
+            return {"requests": 0}
+        p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000.0
+        return {
+            "requests": int(len(values)),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(float(p50), 3),
+            "p90_ms": round(float(p90), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()) * 1000.0, 3),
+            "status_codes": {str(code): count for code, count in sorted(status_counts.items())},
+        }
+
+    all_statuses = {}
+    for counts in statuses.values():
+        for status, count in counts.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    summary = {name: describe(values, statuses[name]) for name, values in latencies.items()}
+    summary["overall"] = describe([v for values in latencies.values() for v in values], all_statuses)
+    return summary
+
+
+def server_error_rate(row):
+    """Fraction of a scenario's requests answered with a 5xx status."""
+    errors = sum(count for code, count in row["status_codes"].items() if code.startswith("5"))
+    return errors / row["requests"]
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Flags scenarios whose throughput dropped, whose p50/p99 grew by more than `tolerance`, or that
+    started returning more 5xx responses.
+    :return: List of human-readable regression messages (empty when nothing regressed).
+    """
+    regressions = []
+    for key in ("target", "transport", "concurrency", "mix", "batch_size"):
+        if baseline.get(key) != results.get(key):
+            print(f"⚠️ Baseline {key} differs: {baseline.get(key)} vs {results.get(key)}")
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not previous.get("requests") or not current.get("requests"):
+            continue
+        if current["rps"] < previous["rps"] * (1.0 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {current['rps']}")
+        for key in ("p50_ms", "p99_ms"):
+            if current[key] > previous[key] * (1.0 + tolerance):
+                regressions.append(f"{name}: {key} {previous[key]} -> {current[key]}")
+        if server_error_rate(current) > server_error_rate(previous):
+            regressions.append(f"{name}: 5xx rate {server_error_rate(previous):.2%} -> {server_error_rate(current):.2%}")
+    return regressions
+
+
+def print_report(results):
+    print(f"\n{results['target']} via {results['transport']}: concurrency={results['concurrency']} "
+          f"duration={results['duration_s']}s mix={results['mix']}")
+    print(f"{'scenario':<14}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}  status codes")
+    for name, row in results["scenarios"].items():
+        if not row["requests"]:
+            print(f"{name:<14}{0:>10}")
+            continue
+        print(f"{name:<14}{row['requests']:>10}{row['rps']:>10.1f}{row['p50_ms']:>10.3f}"
+              f"{row['p90_ms']:>10.3f}{row['p99_ms']:>10.3f}  {row['status_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the prediction and dashboard APIs.")
+    parser.add_argument("--target", choices=("prediction", "dashboard"), default="prediction")
+    parser.add_argument("--transport", choices=("test_client", "server"), default="test_client")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds.")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds sent first.")
+    parser.add_argument("--mix", default=None, help=f"Scenario weights, e.g. '{PREDICTION_MIX}'.")
+    parser.add_argument("--batch-size", type=int, default=256, help="Transactions per batch request.")
+    parser.add_argument("--micro-batching", action="store_true", help="Enable the /predict micro-batcher.")
+    parser.add_argument("--engine", choices=("sklearn", "compiled"), default="sklearn")
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    parser.add_argument("--baseline", help="Compare against a previous --output file.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        if args.target == "prediction":
+            api = build_prediction_api(work_dir, micro_batching=args.micro_batching, engine=args.engine)
+            scenarios, mix = prediction_scenarios(args.batch_size), args.mix or PREDICTION_MIX
+        else:
+            api = build_dashboard(work_dir)
+            scenarios, mix = dashboard_scenarios(), args.mix or DASHBOARD_MIX
+
+        transport = (FlaskClientTransport if args.transport == "test_client" else ServerTransport)(api.app)
+        try:
+            latencies, statuses, elapsed = run_load(transport, scenarios, mix, args.concurrency,
+                                                    args.duration, args.warmup)
+        finally:
+            transport.close()
+            if getattr(api, "batcher", None) is not None:
+                api.batcher.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "target": args.target,
+        "transport": args.transport,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": mix,
+        "batch_size": args.batch_size,
+        "micro_batching": args.micro_batching,
+        "engine": args.engine,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "scenarios": summarize(latencies, statuses, elapsed),
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for message in regressions:
+                print(f"   {message}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,175 @@
+import os
+import sys
+import threading
+from time import perf_counter
 import pandas as pd
-from flask import Flask, jsonify
+import numpy as np
+from flask import Flask, Response, jsonify, request
+from fraud_aggregates import FraudAggregates
+from fraud_cube import FraudCube, default_dimensions
+from metrics import MetricsRegistry, instrument_app
+from payload_codecs import UnsupportedMediaType, decode, is_arrow, mimetype_of, read_arrow_table
+from response_cache import CachedBody, ResponseCache, etag_matches, negotiate_encoding
+from transaction_store import TransactionStore
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_preprocessing"))
+from frame_io import frame_columns, read_frame
+
+# The dashboard only reads these; Parquet and Feather files skip every other column
+COLUMNS = ["class", "purchase_time"]
+# Read as well, when the dataset has them, for the /breakdown cube
+CUBE_COLUMNS = ["ip_country", "browser", "source", "sex", "age"]
+
+
+def normalize_transactions(df, extra_columns=()):
+    """
+    The dashboard columns of a batch with uniform dtypes (class uint8, purchase_time datetime64[ns]).
+    :param extra_columns: Cube columns to carry along (age as float64); missing ones are filled with NaN.
+    :raises ValueError: For missing columns, labels other than 0/1 or times that do not parse.
+    """
+    missing = [col for col in COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing fields: {missing}")
+    labels = pd.to_numeric(df["class"], errors="coerce")
+    times = df["purchase_time"]
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times, errors="coerce", format="mixed")
+    bad = np.flatnonzero(~labels.isin([0, 1]).to_numpy() | times.isna().to_numpy())
+    if len(bad):
+        raise ValueError(f"Invalid class or purchase_time in rows {bad[:10].tolist()}.")
+    normalized = {"class": labels.to_numpy(np.uint8), "purchase_time": times.to_numpy("datetime64[ns]")}
+    for col in extra_columns:
+        values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+        normalized[col] = pd.to_numeric(values, errors="coerce").to_numpy(np.float64) if col == "age" \
+            else values.to_numpy(object)
+    return pd.DataFrame(normalized)
+
 
 class FraudDetectionBackend:
-    def __init__(self, data_path):
-        """Initialize Flask app & load dataset."""
+    def __init__(self, data_path=None, segment_dir=None, compact_rows=100_000, compact_interval=60.0,
+                 max_batch_size=100_000, breakdown=True, response_cache_size=1024,
+                 response_cache_max_bytes=64 * 2**20):
+        """
+        Initialize Flask app & load dataset.
+        :param data_path: CSV, Parquet or Feather dataset; skipped when segment_dir already holds segments.
+        :param segment_dir: Directory where appended transactions (and the initial dataset) are compacted,
+                            and reloaded from on restart. None keeps appended transactions in memory only.
+        :param compact_rows: Compact once this many appended rows are pending.
+        :param compact_interval: Seconds between background compactions of pending rows.
+        :param max_batch_size: Maximum transactions accepted per POST /transactions.
+        :param breakdown: Build the /breakdown cube over whichever of CUBE_COLUMNS the dataset has
+                          (all of them when starting without data).
+        :param response_cache_size: Serialized GET responses cached per query until the data changes
+                                    (0 disables the cache; ETags and compression still apply).
+        :param response_cache_max_bytes: Memory cap for the cached bodies.
+        """
         self.app = Flask(__name__)
         self.data_path = data_path
-        self.data = pd.read_csv(self.data_path)
+        self.max_batch_size = max_batch_size
+        segments = TransactionStore.segment_paths(segment_dir)
+        source = segments[0] if segments else data_path
+        available = frame_columns(source) if source is not None else CUBE_COLUMNS
+        self.cube_columns = [col for col in CUBE_COLUMNS if col in available] if breakdown else []
+        self.columns = COLUMNS + self.cube_columns
+        self.store = TransactionStore(self.columns, segment_dir, compact_rows, compact_interval)
+        if not self.store.segments and data_path is not None:
+            self.store.append(normalize_transactions(read_frame(self.data_path, columns=self.columns),
+                                                     self.cube_columns))
+            if segment_dir is not None:
+                # The next start maps this segment instead of parsing data_path again
+                self.store.compact()
+        # Endpoints answer from these counts and never read the stored transactions
+        data = self.store.frame()
+        self.aggregates = FraudAggregates.from_frame(data)
+        self.cube = None
+        if breakdown:
+            dimensions = [dimension for dimension in default_dimensions() if dimension.column in self.columns]
+            self.cube = FraudCube.from_frame(data, dimensions)
+        del data
+        # Bumped after every ingested batch has reached all the aggregates; cached responses are per version
+        self.data_version = 0
+        self.response_cache = (ResponseCache(response_cache_size, response_cache_max_bytes)
+                               if response_cache_size > 0 else None)
+        self._ingest_lock = threading.Lock()
+        self.setup_metrics()
         self.setup_routes()
 
+    @property
+    def data(self):
+        """Every stored transaction as one DataFrame (concatenated on each access)."""
+        return self.store.frame()
+
+    def setup_metrics(self):
+        """Registers request and per-stage metrics exposed on /metrics."""
+        self.metrics = MetricsRegistry("fraud_dashboard")
+        stages = self.metrics.histogram("stage_seconds", "Time spent computing and serializing each response.",
+                                        ("endpoint", "stage"))
+        self.stage_timers = {
+            (endpoint, stage): stages.labels(endpoint=endpoint, stage=stage)
+            for endpoint in ("summary", "fraud_trends", "transactions", "breakdown")
+            for stage in ("compute", "serialize")
+        }
+        self.metrics.register_collector(self.collect_metrics)
+        instrument_app(self.app, self.metrics)
+
+    def collect_metrics(self):
+        """Scrape-time metrics that live on other objects (aggregates, store, response cache)."""
+        collected = [
+            ("rows", "Transactions loaded in the backend.", "gauge", [({}, self.aggregates.total)]),
+            ("pending_rows", "Appended transactions not yet compacted to disk.", "gauge",
+             [({}, self.store.pending_rows)]),
+        ]
+        if self.response_cache is not None:
+            stats = self.response_cache.stats()
+            collected += [
+                ("response_cache_hits_total", "GET responses served from the cache.", "counter",
+                 [({}, stats["hits"])]),
+                ("response_cache_misses_total", "GET responses computed and serialized.", "counter",
+                 [({}, stats["misses"])]),
+                ("response_not_modified_total", "Conditional GETs answered with 304.", "counter",
+                 [({}, stats["not_modified"])]),
+                ("response_cache_bytes", "Memory held by cached response bodies.", "gauge", [({}, stats["bytes"])]),
+            ]
+        return collected
+
+    def cached_response(self, endpoint, compute):
+        """
+        JSON response for a GET, reusing the serialized body while the data version is unchanged.
+        Sends 304 when If-None-Match has the body's ETag, and gzip (or br) when Accept-Encoding allows it.
+        :param endpoint: Stage timer name, also part of the cache key with the query arguments.
+        :param compute: Returns the payload; a ValueError becomes a 400 and is not cached.
+        """
+        t0 = perf_counter()
+        key = (endpoint, tuple(sorted(request.args.items(multi=True))))
+        # Read before computing: a body is never older than the version it is cached under
+        version = self.data_version
+        cache = self.response_cache
+        entry = cache.get(key, version) if cache is not None else None
+        t1 = perf_counter()
+        if entry is None:
+            try:
+                payload = compute()
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            t1 = perf_counter()
+            body = self.app.json.dumps(payload).encode()
+            entry = cache.put(key, version, body) if cache is not None else CachedBody(version, body)
+
+        coding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        body, etag = cache.variant(key, entry, coding) if cache is not None else entry.variant(coding)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            if cache is not None:
+                cache.count_not_modified()
+            response = Response(status=304, headers=headers)
+        else:
+            if body is not entry.body:
+                headers["Content-Encoding"] = coding
+            response = Response(body, mimetype="application/json", headers=headers)
+        self.stage_timers[(endpoint, "compute")].observe(t1 - t0)
+        self.stage_timers[(endpoint, "serialize")].observe(perf_counter() - t1)
+        return response
+
     def setup_routes(self):
         """Define API endpoints."""
 
@@ -19,28 +180,112 @@ class FraudDetectionBackend:
         @self.app.route("/summary", methods=["GET"])
         def summary():
             """Returns summary statistics (total transactions, fraud count, fraud %)."""
-            total_transactions = len(self.data)
-            fraud_cases = self.data[self.data["class"] == 1].shape[0]
-            fraud_percentage = (fraud_cases / total_transactions) * 100
-
-            return jsonify({
-                "total_transactions": total_transactions,
-                "fraud_cases": fraud_cases,
-                "fraud_percentage": round(fraud_percentage, 2)
-            })
+            return self.cached_response("summary", self.aggregates.summary)
 
         @self.app.route("/fraud-trends", methods=["GET"])
         def fraud_trends():
-            """Returns fraud counts per day."""
-            self.data["purchase_time"] = pd.to_datetime(self.data["purchase_time"])
-            daily_fraud = self.data[self.data["class"] == 1].groupby(self.data["purchase_time"].dt.date).size()
+            """
+            Without parameters: fraud counts per day, keyed by ISO date.
+            With start, end (exclusive) and/or granularity (minute/hour/day/week): transactions, fraud cases
+            and fraud rate per bucket over the range, answered by binary search on the time index.
+            """
+            if any(name in request.args for name in ("start", "end", "granularity")):
+                return self.cached_response("fraud_trends", lambda: self.aggregates.trend(
+                    request.args.get("start"), request.args.get("end"), request.args.get("granularity", "day")))
+            return self.cached_response("fraud_trends", self.aggregates.daily_fraud)
+
+        @self.app.route("/breakdown", methods=["GET"])
+        def breakdown():
+            """
+            Fraud rates by dimension from the precomputed cube, e.g.
+            /breakdown?by=ip_country,browser&source=Ads,SEO&age_band=25-34&limit=20
+            `by` lists the dimensions to group by (the others are summed); any dimension name can also be
+            given as a filter with comma-separated values.
+            """
+            if self.cube is None:
+                return jsonify({"error": "The breakdown cube is disabled."}), 404
+            by = [name for name in request.args.get("by", "").split(",") if name]
+            filters = {name: values.split(",") for name, values in request.args.items()
+                       if name in self.cube.by_name}
+            return self.cached_response("breakdown", lambda: self.cube.breakdown(
+                by, filters, limit=int(request.args.get("limit", 100))))
+
+        @self.app.route("/transactions", methods=["POST"])
+        def transactions():
+            """Appends a batch of scored transactions (JSON, NDJSON or Arrow IPC)."""
+            t0 = perf_counter()
+            try:
+                df = self.read_transactions()
+            except UnsupportedMediaType as e:
+                return jsonify({"error": str(e)}), 415
+            except Exception as e:
+                return jsonify({"error": str(e)}), 400
+            if len(df) > self.max_batch_size:
+                return jsonify({"error": f"Batch size exceeds the limit of {self.max_batch_size} transactions."}), 413
+            try:
+                added = self.add_transactions(df)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            t1 = perf_counter()
+
+            response = jsonify({"added": added, "total_transactions": self.aggregates.total,
+                                "pending_rows": self.store.pending_rows})
+            self.stage_timers[("transactions", "compute")].observe(t1 - t0)
+            self.stage_timers[("transactions", "serialize")].observe(perf_counter() - t1)
+            return response
+
+        @self.app.route("/admin/compact", methods=["POST"])
+        def compact():
+            """Writes pending transactions to a segment now."""
+            if self.store.segment_dir is None:
+                return jsonify({"error": "Compaction needs a segment_dir."}), 409
+            path = self.store.compact()
+            return jsonify({"segment": str(path) if path else None, **self.store.stats()})
+
+    def add_transactions(self, df):
+        """
+        Adds scored transactions: the aggregates are updated first, so the endpoints see them at once,
+        then the batch is appended to the store.
+        :param df: DataFrame with purchase_time and class.
+        :return: Number of transactions added.
+        """
+        df = normalize_transactions(df, self.cube_columns)
+        with self._ingest_lock:
+            self.aggregates.add(df)
+            if self.cube is not None:
+                self.cube.add(df)
+            self.store.append(df)
+            self.data_version += 1
+        return len(df)
+
+    def read_transactions(self):
+        """DataFrame from a JSON (list of records, {"transactions": [...]} or columns), NDJSON or Arrow body."""
+        mimetype = mimetype_of(request.content_type)
+        if is_arrow(mimetype):
+            return read_arrow_table(request.get_data(), mimetype).to_pandas()
+        try:
+            payload = decode(request.get_data(), mimetype)
+        except UnsupportedMediaType:
+            raise
+        except ValueError as e:
+            raise ValueError(f"Malformed body: {e}") from None
+        if isinstance(payload, dict) and "transactions" in payload:
+            payload = payload["transactions"]
+        if isinstance(payload, dict):
+            payload = payload if any(isinstance(value, list) for value in payload.values()) else [payload]
+        if not isinstance(payload, (list, dict)):
+            raise ValueError("Expected transaction records or columns.")
+        return pd.DataFrame(payload)
 
-            return jsonify(daily_fraud.to_dict())
+    def close(self):
+        """Writes pending transactions to a segment and stops background compaction."""
+        self.store.close()
 
     def run(self):
         """Start Flask API."""
         self.app.run(host="0.0.0.0", port=5000, debug=True)
 
 if __name__ == "__main__":
-    backend = FraudDetectionBackend(data_path="/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/featured/processed_fraud_data.csv")
+    backend = FraudDetectionBackend(data_path="/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/featured/processed_fraud_data.csv",
+                                    segment_dir="/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/dashboard_segments")
     backend.run()
@@ -0,0 +1,131 @@
+import copy
+import math
+import threading
+import numpy as np
+from tree_ensemble import CompiledTreeEnsemble
+
+
+class SchemaError(ValueError):
+    """Raised when a transaction does not match the compiled feature schema."""
+
+
+class FeatureSchema:
+    def __init__(self, feature_names, dtype=np.float64):
+        """
+        Fixed column order used to turn request dicts into model input rows.
+        :param feature_names: Feature names in the order the model was trained on.
+        :param dtype: Row dtype (float32 for tree models, float64 otherwise).
+        """
+        self.feature_names = tuple(str(name) for name in feature_names)
+        self.dtype = np.dtype(dtype)
+        self.n_features = len(self.feature_names)
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        self._expected = frozenset(self.feature_names)
+        self._local = threading.local()
+
+    @classmethod
+    def from_model(cls, model, feature_names=None, dtype=None):
+        """
+        Compiles the schema from a fitted sklearn model.
+
+        The column order is taken from `feature_names_in_`. Tree models compare float32
+        features internally, so their rows are built as float32 to skip a conversion.
+        """
+        if feature_names is None:
+            feature_names = getattr(model, "feature_names_in_", None)
+        if feature_names is None:
+            raise SchemaError("Model has no feature_names_in_; pass feature_names explicitly.")
+        if dtype is None:
+            dtype = np.float32 if is_tree_model(model) else np.float64
+        return cls(feature_names, dtype=dtype)
+
+    def _check_keys(self, data):
+        """Raises SchemaError listing missing and unexpected fields."""
+        if not isinstance(data, dict):
+            raise SchemaError("Transaction must be a JSON object.")
+        keys = data.keys()
+        if keys != self._expected:
+            missing = sorted(self._expected - keys)
+            extra = sorted(keys - self._expected)
+            raise SchemaError(f"Missing fields: {missing}, unexpected fields: {extra}")
+
+    def row(self, data):
+        """
+        Writes one transaction into this thread's preallocated (1, n_features) buffer.
+        The returned array is reused by the next call on the same thread, so copy it to keep it.
+        """
+        self._check_keys(data)
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((1, self.n_features), dtype=self.dtype)
+        out = buffer[0]
+        for i, name in enumerate(self.feature_names):
+            value = data[name]
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise SchemaError(f"Field '{name}' must be numeric, got {value!r}.") from None
+            if not math.isfinite(value):
+                raise SchemaError(f"Field '{name}' must be finite, got {value!r}.")
+            out[i] = value
+        if not np.isfinite(out).all():
+            # Finite as a Python float but beyond the range of a float32 buffer
+            name = self.feature_names[int(np.flatnonzero(~np.isfinite(out))[0])]
+            raise SchemaError(f"Field '{name}' is out of range for {self.dtype.name}, got {data[name]!r}.")
+        return buffer
+
+    def matrix(self, records):
+        """
+        Validates all records at once and packs them into a new (n, n_features) matrix.
+        :return: (matrix, list of per-row errors in row order). The matrix is None when any row is invalid.
+        """
+        errors = []
+        keyed = []
+        rows = []
+        for i, record in enumerate(records):
+            try:
+                self._check_keys(record)
+            except SchemaError as e:
+                errors.append({"index": i, "error": str(e)})
+                continue
+            keyed.append(i)
+            rows.append([record[name] for name in self.feature_names])
+
+        try:
+            X = np.array(rows, dtype=self.dtype).reshape(len(rows), self.n_features)
+        except (TypeError, ValueError):
+            X = None
+        if X is None or not np.isfinite(X).all():
+            # Locate the offending rows only on the slow path; row() checks the values after the cast to
+            # the buffer dtype, so it rejects every row that made X non-finite
+            for i in keyed:
+                try:
+                    self.row(records[i])
+                except SchemaError as e:
+                    errors.append({"index": i, "error": str(e)})
+            errors.sort(key=lambda error: error["index"])
+        if errors:
+            return None, errors
+        return X, errors
+
+
+def is_tree_model(model):
+    """True for fitted sklearn decision trees, forests of them, and their compiled form."""
+    if isinstance(model, CompiledTreeEnsemble) or hasattr(model, "tree_"):
+        return True
+    estimators = getattr(model, "estimators_", None)
+    return bool(estimators is not None and len(estimators) and hasattr(estimators[0], "tree_"))
+
+
+def unnamed_input_estimator(model):
+    """
+    Shallow copy of a model fitted on a DataFrame that scores the schema's NumPy rows without sklearn warning,
+    on every request, that X has no feature names: the FeatureSchema already enforces the column order. The
+    copy shares the fitted arrays; `model` keeps its `feature_names_in_`, so it is exported and verified on
+    reload unchanged, and nothing outside the API has its warnings changed.
+    """
+    if "feature_names_in_" not in vars(model):
+        return model
+    predictor = copy.copy(model)
+    del predictor.feature_names_in_
+    return predictor
@@ -1,26 +1,238 @@
+import os
 import pickle
+import sys
+from time import perf_counter
 import numpy as np
-import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from feature_schema import FeatureSchema, SchemaError
+from micro_batcher import MicroBatcher
+from tree_ensemble import CompiledTreeEnsemble
+from model_artifact import is_artifact, load_artifact
+from model_reloader import ModelReloader, ModelState, model_version
+from metrics import MetricsRegistry, SIZE_BUCKETS, instrument_app
+from prediction_cache import PredictionCache
+from payload_codecs import (JSON, UnsupportedMediaType, arrow_matrix, decode, encode, is_arrow, mimetype_of,
+                            read_arrow_table, response_types)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_preprocessing"))
+from feature_transform import FeatureTransform
+from velocity_store import VelocityStore
+
 
 class FraudDetectionAPI:
-    def __init__(self, model_path):
+    def __init__(self, model_path, max_batch_size=10000, feature_names=None, dtype=None,
+                 micro_batching=False, micro_batch_size=64, micro_batch_wait_ms=2.0,
+                 engine="sklearn", compiled_max_rows=64,
+                 warmup_rows=64, watch_model=False, watch_interval=2.0,
+                 cache_size=0, cache_max_bytes=None, cache_ttl=60.0, transform_path=None,
+                 velocity_windows=None, velocity_capacity=32, velocity_max_keys=50_000, velocity_snapshot_path=None,
+                 verify_artifact=False):
         """
         Initialize the Fraud Detection API.
-        :param model_path: Path to the trained fraud detection model (.pkl file).
+        :param model_path: Path to the trained fraud detection model (.pkl file or model artifact directory).
+        :param max_batch_size: Maximum number of transactions accepted by /predict/batch.
+        :param feature_names: Column order for models trained without feature names.
+        :param dtype: Input row dtype; defaults to float32 for tree models and float64 otherwise.
+        :param micro_batching: Queue concurrent /predict calls and score them as one matrix.
+        :param micro_batch_size: Maximum rows per micro-batch.
+        :param micro_batch_wait_ms: Maximum time a queued /predict call waits for a batch to fill.
+        :param engine: "sklearn" or "compiled" (flattened NumPy tree evaluator for tree models).
+        :param compiled_max_rows: Larger batches go to sklearn, which is faster at high row counts.
+        :param warmup_rows: Size of the synthetic batch used to warm up a model before it takes traffic.
+        :param watch_model: Reload automatically when the file at model_path changes.
+        :param watch_interval: Seconds between checks of model_path when watching.
+        :param cache_size: Cache up to this many /predict results per model version (0 disables the cache).
+        :param cache_max_bytes: Optional memory cap for the result cache.
+        :param cache_ttl: Seconds a cached result stays valid (None for no expiry).
+        :param transform_path: FeatureTransform artifact exported by the training pipeline; enables
+                               /predict/raw, which scores raw transactions instead of model features.
+        :param velocity_windows: Dict of window name -> seconds. Keeps per-device/IP/user history of the
+                                 transactions sent to /predict/raw, for models trained with velocity features.
+        :param velocity_capacity: Transactions remembered per device, IP and user.
+        :param velocity_max_keys: Devices, IPs and users remembered (least recently seen are dropped first).
+        :param velocity_snapshot_path: Restore the velocity history from this file at start if it exists;
+                                       POST /admin/velocity/snapshot writes it.
+        :param verify_artifact: Check a model artifact's arrays against its manifest checksum on every load
+                                and reload (reads the whole model up front instead of paging it in lazily).
         """
+        if engine not in ("sklearn", "compiled"):
+            raise ValueError("Invalid engine. Choose 'sklearn' or 'compiled'.")
         self.model_path = model_path
-        self.model = self.load_model()
+        self.max_batch_size = max_batch_size
+        self.feature_names = feature_names
+        self.dtype = dtype
+        self.engine = engine
+        self.compiled_max_rows = compiled_max_rows
+        self.verify_artifact = verify_artifact
+        self.transform = FeatureTransform.load(transform_path) if transform_path else None
+        self.velocity = None
+        self.velocity_snapshot_path = velocity_snapshot_path
+        if velocity_windows:
+            self.velocity = VelocityStore(velocity_windows, capacity=velocity_capacity, max_keys=velocity_max_keys)
+            if velocity_snapshot_path and os.path.exists(velocity_snapshot_path):
+                self.velocity.restore(velocity_snapshot_path)
+        if self.transform is not None and self.transform.velocity_features:
+            available = self.velocity.feature_names if self.velocity is not None else []
+            missing = [name for name in self.transform.velocity_features if name not in available]
+            if missing:
+                raise ValueError(f"The model uses velocity features {missing}; set velocity_windows to provide them.")
+        # Set in prefork workers: asks the parent to reload the model in every worker
+        self.reload_broadcast = None
+        self.state = self.build_state(model_path)
+        self.reloader = ModelReloader(self, warmup_rows=warmup_rows, watch=watch_model, watch_interval=watch_interval)
+        self.state.warmup_seconds = self.reloader.warm_up(self.state)
+        self.micro_batching = micro_batching
+        self.micro_batch_size = micro_batch_size
+        self.micro_batch_wait_ms = micro_batch_wait_ms
+        self.batcher = None
+        self.start_batcher()
+        self.cache = PredictionCache(cache_size, cache_max_bytes, cache_ttl) if cache_size > 0 else None
         self.app = Flask(__name__)
+        self.setup_metrics()
         self.setup_routes()
 
-    def load_model(self):
-        """Loads the trained fraud detection model from file."""
-        with open(self.model_path, "rb") as file:
-            model = pickle.load(file)
+    @property
+    def model(self):
+        return self.state.model
+
+    @property
+    def schema(self):
+        return self.state.schema
+
+    @property
+    def compiled(self):
+        return self.state.compiled
+
+    def load_model(self, model_path=None):
+        """Loads the trained fraud detection model from a pickle or a memory-mapped model artifact."""
+        model_path = model_path or self.model_path
+        if is_artifact(model_path):
+            model = load_artifact(model_path, verify=self.verify_artifact)
+        else:
+            with open(model_path, "rb") as file:
+                model = pickle.load(file)
         print("✅ Model loaded successfully!")
         return model
 
+    def build_state(self, model_path):
+        """Loads a model and compiles everything needed to serve it (schema, optional tree engine)."""
+        start = perf_counter()
+        version = model_version(model_path)
+        model = self.load_model(model_path)
+        schema = FeatureSchema.from_model(model, feature_names=self.feature_names, dtype=self.dtype)
+        if self.transform is not None and tuple(self.transform.feature_names) != schema.feature_names:
+            raise SchemaError(f"Feature transform produces {self.transform.feature_names}, "
+                              f"but the model expects {list(schema.feature_names)}.")
+        compiled = None
+        if self.engine == "compiled" and not isinstance(model, CompiledTreeEnsemble):
+            compiled = CompiledTreeEnsemble.from_model(model)
+        return ModelState(model, schema, compiled, model_path, version, perf_counter() - start)
+
+    def start_batcher(self):
+        """Starts the micro-batching worker thread when micro-batching is enabled."""
+        if self.micro_batching:
+            self.batcher = MicroBatcher(self.score, max_batch_size=self.micro_batch_size,
+                                        max_wait_ms=self.micro_batch_wait_ms)
+
+    def after_fork(self):
+        """Re-creates per-process state in a forked worker; threads do not survive fork()."""
+        self.start_batcher()
+        self.reloader.start_watcher()
+
+    def setup_metrics(self):
+        """Registers the serving-path metrics exposed on /metrics."""
+        self.metrics = MetricsRegistry("fraud_api")
+        stages = self.metrics.histogram("stage_seconds", "Time spent in each serving stage.", ("endpoint", "stage"))
+        # Resolve label children once so the hot path only does a bisect and an increment
+        self.stage_timers = {
+            (endpoint, stage): stages.labels(endpoint=endpoint, stage=stage)
+            for endpoint in ("predict", "predict_batch", "predict_raw")
+            for stage in ("parse", "build", "predict_proba", "serialize")
+        }
+        self.batch_rows = self.metrics.histogram("batch_rows", "Transactions per /predict/batch request.",
+                                                 buckets=SIZE_BUCKETS).labels()
+        self.errors = self.metrics.counter("errors", "Failed prediction requests by endpoint and error type.",
+                                           ("endpoint", "type"))
+        self.metrics.register_collector(self.collect_metrics)
+        instrument_app(self.app, self.metrics)
+
+    def collect_metrics(self):
+        """Scrape-time metrics that live on other objects (model state, micro-batcher)."""
+        state = self.state
+        collected = [
+            ("model_info", "Active model version.", "gauge", [({"version": state.version}, 1)]),
+            ("model_reloads_total", "Successful model reloads.", "counter", [({}, self.reloader.reloads)]),
+        ]
+        if self.batcher is not None:
+            stats = self.batcher.stats()
+            collected.append(("micro_batches_total", "Micro-batches flushed, by batch size.", "counter",
+                              [({"size": size}, count) for size, count in stats["batch_size_counts"].items()]))
+        if self.cache is not None:
+            stats = self.cache.stats()
+            collected.append(("cache_lookups_total", "Prediction cache lookups by result.", "counter",
+                              [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]))
+            collected.append(("cache_evictions_total", "Prediction cache entries removed, by reason.", "counter",
+                              [({"reason": "capacity"}, stats["evictions"]),
+                               ({"reason": "expired"}, stats["expirations"])]))
+            collected.append(("cache_entries", "Entries in the prediction cache.", "gauge", [({}, stats["entries"])]))
+            collected.append(("cache_bytes", "Approximate prediction cache memory.", "gauge", [({}, stats["bytes"])]))
+        return collected
+
+    def record_stages(self, endpoint, t0, t1, t2, t3, t4):
+        """Records parse/build/predict_proba/serialize durations from five perf_counter() readings."""
+        timers = self.stage_timers
+        timers[(endpoint, "parse")].observe(t1 - t0)
+        timers[(endpoint, "build")].observe(t2 - t1)
+        timers[(endpoint, "predict_proba")].observe(t3 - t2)
+        timers[(endpoint, "serialize")].observe(t4 - t3)
+
+    def score(self, X, state=None):
+        """
+        Scores a feature matrix with a single predict_proba call.
+        The label is derived from the probabilities, which is what predict() does internally.
+        Small batches use the compiled tree evaluator when it is enabled.
+        :param state: Model state to use; defaults to the one currently serving.
+        :return: (labels, fraud probabilities) as NumPy arrays.
+        """
+        state = state or self.state
+        predictor = state.predictor
+        if state.compiled is not None and len(X) <= self.compiled_max_rows:
+            predictor = state.compiled
+        proba = predictor.predict_proba(X)
+        labels = predictor.classes_[proba.argmax(axis=1)]
+        return labels, proba[:, 1]
+
+    def parse_batch(self, body, content_type):
+        """
+        Parses a batch request body into a list of transaction dicts.
+        Accepts a JSON or MessagePack array, an object with a "transactions" array, or NDJSON
+        (one object per line). Arrow bodies are read by arrow_matrix instead.
+        """
+        payload = decode(body, mimetype_of(content_type))
+        if isinstance(payload, dict) and "transactions" in payload:
+            payload = payload["transactions"]
+        if not isinstance(payload, list):
+            raise ValueError("Batch body must be an array, an object with a 'transactions' array, or NDJSON.")
+        return payload
+
+    def respond(self, payload):
+        """
+        Encodes a prediction in the format the client prefers (Accept header), JSON by default.
+        :param payload: Dict of scalars and NumPy arrays.
+        """
+        mimetype = request.accept_mimetypes.best_match(response_types(), default=JSON)
+        if mimetype == JSON:
+            return jsonify({name: value.tolist() if isinstance(value, np.ndarray) else value
+                            for name, value in payload.items()})
+        return Response(encode(payload, mimetype), mimetype=mimetype)
+
+    def error_response(self, endpoint, e):
+        """Counts a failed request and returns its JSON error (415 for unreadable body formats)."""
+        self.errors.labels(endpoint=endpoint, type=type(e).__name__).inc()
+        if isinstance(e, UnsupportedMediaType):
+            return jsonify({"error": str(e)}), 415
+        return jsonify({"error": str(e)})
+
     def setup_routes(self):
         """Defines the API endpoints."""
         @self.app.route("/", methods=["GET"])
@@ -31,28 +243,186 @@ class FraudDetectionAPI:
         def predict():
             """Endpoint to predict fraud based on user input."""
             try:
-                # Get JSON data from request
-                data = request.get_json()
-                df = pd.DataFrame([data])  # Convert input to DataFrame
-                
-                # Ensure all values are numeric
-                df = df.astype(float)
-                
+                # Decode the body and write it into the schema's row buffer (Arrow bodies are read in place)
+                t0 = perf_counter()
+                mimetype = mimetype_of(request.content_type)
+                if is_arrow(mimetype):
+                    data = read_arrow_table(request.get_data(), mimetype)
+                else:
+                    data = decode(request.get_data(), mimetype)
+                t1 = perf_counter()
+                state = self.state
+                if is_arrow(mimetype):
+                    row = arrow_matrix(data, state.schema)
+                    if len(row) != 1:
+                        raise SchemaError(f"/predict takes one transaction, got {len(row)}; use /predict/batch.")
+                else:
+                    row = state.schema.row(data)
+                t2 = perf_counter()
+
                 # Predict fraud (0 = not fraud, 1 = fraud)
-                prediction = self.model.predict(df)[0]
-                probability = self.model.predict_proba(df)[0][1]
+                cache, cached = self.cache, None
+                if cache is not None:
+                    key = cache.key(row)
+                    cached = cache.get(state.version, key)
+                if cached is not None:
+                    label, probability = cached
+                elif self.batcher is not None:
+                    # The row buffer is reused by this thread, so the queued row must be a copy. It is scored
+                    # with the state that built it, even if a reload swaps self.state before the flush
+                    label, probability = self.batcher.predict(row.copy(), state)
+                else:
+                    labels, probabilities = self.score(row, state)
+                    label, probability = labels[0], probabilities[0]
+                if cache is not None and cached is None:
+                    cache.put(state.version, key, (label, probability))
+                t3 = perf_counter()
 
-                return jsonify({
-                    "fraud_prediction": int(prediction),
+                response = self.respond({
+                    "fraud_prediction": int(label),
                     "fraud_probability": float(probability)
                 })
+                self.record_stages("predict", t0, t1, t2, t3, perf_counter())
+                return response
+
+            except Exception as e:
+                return self.error_response("predict", e)
+
+        @self.app.route("/predict/batch", methods=["POST"])
+        def predict_batch():
+            """Endpoint to score many transactions in one model call."""
+            try:
+                t0 = perf_counter()
+                mimetype = mimetype_of(request.content_type)
+                if is_arrow(mimetype):
+                    records = read_arrow_table(request.get_data(), mimetype)
+                    n_rows = records.num_rows
+                else:
+                    records = self.parse_batch(request.get_data(), mimetype)
+                    n_rows = len(records)
+                t1 = perf_counter()
+                if not n_rows:
+                    raise ValueError("Batch is empty.")
+                if n_rows > self.max_batch_size:
+                    raise ValueError(f"Batch of {n_rows} exceeds the limit of {self.max_batch_size}.")
+
+                state = self.state
+                if is_arrow(mimetype):
+                    X = arrow_matrix(records, state.schema)
+                else:
+                    X, errors = state.schema.matrix(records)
+                    if errors:
+                        self.errors.labels(endpoint="predict_batch", type="SchemaError").inc()
+                        return jsonify({"error": f"{len(errors)} invalid transaction(s).", "invalid_rows": errors})
+                t2 = perf_counter()
+
+                labels, probabilities = self.score(X, state)
+                t3 = perf_counter()
+                response = self.respond({
+                    "count": n_rows,
+                    "fraud_prediction": labels.astype(np.int64),
+                    "fraud_probability": probabilities
+                })
+                self.record_stages("predict_batch", t0, t1, t2, t3, perf_counter())
+                self.batch_rows.observe(n_rows)
+                return response
+
+            except Exception as e:
+                return self.error_response("predict_batch", e)
+
+        @self.app.route("/predict/raw", methods=["POST"])
+        def predict_raw():
+            """Endpoint to score raw transactions (one object or a batch) through the feature transform."""
+            try:
+                if self.transform is None:
+                    raise ValueError("No feature transform is loaded; start the API with transform_path.")
+                t0 = perf_counter()
+                mimetype = mimetype_of(request.content_type)
+                records = decode(request.get_data(), mimetype)
+                if isinstance(records, dict):
+                    records = records.get("transactions", [records])
+                if not isinstance(records, list):
+                    raise ValueError("Body must be a transaction, an array of them, or an object with a "
+                                     "'transactions' array.")
+                t1 = perf_counter()
+                if not records:
+                    raise ValueError("Batch is empty.")
+                if len(records) > self.max_batch_size:
+                    raise ValueError(f"Batch of {len(records)} exceeds the limit of {self.max_batch_size}.")
+
+                state = self.state
+                # Features count each transaction as if recorded, but it is only recorded once the request is
+                # scored, so a rejected or retried request does not count twice
+                velocity, pending = self.velocity.preview(records) if self.velocity is not None else (None, None)
+                X, unseen = self.transform.transform(records, dtype=state.schema.dtype, return_unseen=True,
+                                                     velocity=velocity)
+                invalid = np.flatnonzero(~np.isfinite(X).all(axis=1))
+                if len(invalid):
+                    self.errors.labels(endpoint="predict_raw", type="SchemaError").inc()
+                    return jsonify({"error": f"{len(invalid)} invalid transaction(s).",
+                                    "invalid_rows": [{"index": int(i), "error": "Unparseable time or number."}
+                                                     for i in invalid]})
+                t2 = perf_counter()
+
+                labels, probabilities = self.score(X, state)
+                if pending:
+                    self.velocity.commit(pending)
+                t3 = perf_counter()
+                response = self.respond({
+                    "count": len(records),
+                    "fraud_prediction": labels.astype(np.int64),
+                    "fraud_probability": probabilities,
+                    "unseen_category": unseen
+                })
+                self.record_stages("predict_raw", t0, t1, t2, t3, perf_counter())
+                return response
 
             except Exception as e:
-                return jsonify({"error": str(e)})
+                return self.error_response("predict_raw", e)
+
+        @self.app.route("/stats/batching", methods=["GET"])
+        def batching_stats():
+            """Returns micro-batching statistics per batch size."""
+            if self.batcher is None:
+                return jsonify({"enabled": False})
+            return jsonify({"enabled": True, **self.batcher.stats()})
+
+        @self.app.route("/status", methods=["GET"])
+        def status():
+            """Returns the active model version, reload timings and result cache statistics."""
+            return jsonify({**self.state.to_dict(), "pid": os.getpid(), "reload": self.reloader.status(),
+                            "cache": {"enabled": True, **self.cache.stats()} if self.cache is not None else {"enabled": False},
+                            "velocity": ({"enabled": True, **self.velocity.stats()} if self.velocity is not None
+                                         else {"enabled": False})})
+
+        @self.app.route("/admin/reload", methods=["POST"])
+        def admin_reload():
+            """Reloads the model from the configured model_path in the background."""
+            wait = request.args.get("wait", "false").lower() == "true"
+            if self.reload_broadcast is not None:
+                # Under the prefork server every worker has its own model, so the reload goes to all of them
+                if wait:
+                    return jsonify({"error": "wait=true is not supported with several workers; poll /status."}), 409
+                self.reload_broadcast()
+                return jsonify({"message": "Reload started in every worker."}), 202
+            if not self.reloader.reload(wait=wait):
+                return jsonify({"error": "A reload is already in progress."}), 409
+            if wait:
+                return jsonify(self.reloader.status())
+            return jsonify({"message": "Reload started."}), 202
+
+        @self.app.route("/admin/velocity/snapshot", methods=["POST"])
+        def velocity_snapshot():
+            """Writes the velocity history to velocity_snapshot_path so a restart can resume from it."""
+            if self.velocity is None or not self.velocity_snapshot_path:
+                return jsonify({"error": "Velocity snapshots need velocity_windows and velocity_snapshot_path."}), 409
+            start = perf_counter()
+            self.velocity.save(self.velocity_snapshot_path)
+            return jsonify({"path": str(self.velocity_snapshot_path), "ms": round(1000.0 * (perf_counter() - start), 3)})
 
     def run(self):
         """Starts the Flask API server."""
-        self.app.run(host="0.0.0.0", port=5000, debug=True)
+        self.app.run(host="0.0.0.0", port=5000, debug=True, threaded=True)
 
 # ---------------- USAGE ---------------- #
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Bucket widths in seconds
+DAY = 86400
+TREND_GRANULARITIES = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+# 1970-01-01 was a Thursday; weeks start on the following Monday
+WEEK_OFFSET = 4 * 86400
+NANOSECONDS = 10**9
+
+
+def to_seconds(times):
+    """Whole epoch seconds as int64 (NaT stays the int64 minimum) from datetimes or anything to_datetime reads."""
+    times = pd.Series(times)
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times, errors="coerce")
+    ns = times.to_numpy("datetime64[ns]").view(np.int64)
+    return np.where(ns == np.iinfo(np.int64).min, ns, ns // NANOSECONDS)
+
+
+class BucketCounts:
+    def __init__(self, width):
+        """
+        Transaction and fraud counts in fixed-width time buckets, kept as two int64 arrays that grow at
+        either end with spare room, so adding a batch costs O(batch + buckets) with amortized growth.
+        :param width: Bucket width in seconds.
+        """
+        self.width = width
+        self.origin = None  # Bucket number (epoch seconds // width) of index 0
+        self.length = 0
+        self._totals = np.zeros(0, dtype=np.int64)
+        self._frauds = np.zeros(0, dtype=np.int64)
+
+    def _reserve(self, low, high):
+        """Makes buckets low..high (inclusive bucket numbers) addressable, reallocating with 2x slack."""
+        if self.origin is None:
+            self.origin = low
+        start, end = min(low, self.origin), max(high + 1, self.origin + self.length)
+        offset = self.origin - start
+        if offset > 0 or end - start > len(self._totals):
+            capacity = max(2 * len(self._totals), end - start)
+            # Room on the side that grew, so repeated appends in either direction stay amortized
+            lead = capacity - (end - start) if offset > 0 else 0
+            for name in ("_totals", "_frauds"):
+                grown = np.zeros(capacity, dtype=np.int64)
+                grown[lead + offset:lead + offset + self.length] = getattr(self, name)[:self.length]
+                setattr(self, name, grown)
+            self.origin = start - lead
+        self.length = max(end - self.origin, self.length)
+
+    def add(self, seconds, fraud):
+        """Counts a batch. :param seconds: int64 epoch seconds (no NaT). :param fraud: bool array."""
+        if len(seconds) == 0:
+            return
+        buckets = seconds // self.width
+        self._reserve(int(buckets.min()), int(buckets.max()))
+        index = buckets - self.origin
+        self._totals[:self.length] += np.bincount(index, minlength=self.length)
+        self._frauds[:self.length] += np.bincount(index, weights=fraud, minlength=self.length).astype(np.int64)
+
+    def series(self):
+        """(bucket start times as datetime64[s], totals, frauds), copies of the used range."""
+        used = np.flatnonzero(self._totals[:self.length])
+        if len(used) == 0:
+            return np.array([], dtype="datetime64[s]"), np.zeros(0, np.int64), np.zeros(0, np.int64)
+        first, last = used[0], used[-1] + 1
+        starts = (np.arange(self.origin + first, self.origin + last) * self.width).astype("datetime64[s]")
+        return starts, self._totals[first:last].copy(), self._frauds[first:last].copy()
+
+
+class TimeIndex:
+    def __init__(self, merge_fraction=0.05, min_merge_rows=100_000):
+        """
+        Sorted purchase times with a running fraud count, so the transactions and fraud cases in any
+        [start, end) are two binary searches and two subtractions: O(log n) whatever the range.
+
+        Appended batches are sorted and merged into a small delta level, which is merged into the main
+        level once it outgrows `merge_fraction` of it. Merging two sorted levels is a linear pass, so each
+        row is copied O(1 / merge_fraction) times overall and only a batch itself is ever sorted.
+        Levels are immutable and swapped in one assignment, so readers never need the lock.
+        :param merge_fraction: Delta size, relative to the main level, that triggers a merge.
+        :param min_merge_rows: Deltas smaller than this are never merged.
+        """
+        self.merge_fraction = merge_fraction
+        self.min_merge_rows = min_merge_rows
+        self.merges = 0
+        empty = self._level(np.zeros(0, np.int64), np.zeros(0, bool))
+        self.levels = (empty, empty)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _level(seconds, fraud):
+        """(sorted times, fraud prefix sums with a leading 0) from unsorted times and fraud flags."""
+        order = np.argsort(seconds, kind="stable")
+        cumulative = np.zeros(len(seconds) + 1, dtype=np.int64)
+        np.cumsum(fraud[order], out=cumulative[1:])
+        return seconds[order], cumulative
+
+    @staticmethod
+    def _merge(level, other):
+        """
+        Level holding the rows of two levels, in one linear pass: every row of `other` goes to its rank in
+        `other` plus the number of `level` times not after it, found by binary search.
+        """
+        (times, cumulative), (other_times, other_cumulative) = level, other
+        if not len(other_times):
+            return level
+        positions = np.searchsorted(times, other_times, side="right") + np.arange(len(other_times))
+        from_other = np.zeros(len(times) + len(other_times), dtype=bool)
+        from_other[positions] = True
+        merged = np.empty(len(from_other), dtype=np.int64)
+        merged[positions] = other_times
+        merged[~from_other] = times
+        fraud = np.empty(len(from_other), dtype=np.int64)
+        fraud[positions] = np.diff(other_cumulative)
+        fraud[~from_other] = np.diff(cumulative)
+        merged_cumulative = np.zeros(len(merged) + 1, dtype=np.int64)
+        np.cumsum(fraud, out=merged_cumulative[1:])
+        return merged, merged_cumulative
+
+    def __len__(self):
+        return sum(len(times) for times, _ in self.levels)
+
+    def add(self, seconds, fraud):
+        """Indexes a batch. :param seconds: int64 epoch seconds (no NaT). :param fraud: bool array."""
+        with self._lock:
+            main, delta = self.levels
+            delta = self._merge(delta, self._level(seconds, fraud))
+            if len(delta[0]) >= max(self.min_merge_rows, self.merge_fraction * len(main[0])):
+                main = self._merge(main, delta)
+                delta = self._level(np.zeros(0, np.int64), np.zeros(0, bool))
+                self.merges += 1
+            self.levels = (main, delta)
+
+    def bounds(self):
+        """(first, last) indexed time in seconds, or None when empty."""
+        levels = [times for times, _ in self.levels if len(times)]
+        if not levels:
+            return None
+        return min(times[0] for times in levels), max(times[-1] for times in levels)
+
+    def counts(self, edges):
+        """
+        Transactions and fraud cases in [edges[i], edges[i + 1]) for every i, in O(len(edges) * log n).
+        :param edges: Increasing int64 epoch seconds.
+        :return: (totals, frauds) int64 arrays of len(edges) - 1.
+        """
+        totals = np.zeros(len(edges) - 1, dtype=np.int64)
+        frauds = np.zeros(len(edges) - 1, dtype=np.int64)
+        for times, cumulative in self.levels:
+            positions = np.searchsorted(times, edges, side="left")
+            totals += np.diff(positions)
+            frauds += np.diff(cumulative[positions])
+        return totals, frauds
+
+
+def bucket_edges(start, end, granularity):
+    """
+    Edges of the calendar-aligned buckets covering [start, end), with the first and last clipped to the range.
+    :return: (edges, bucket start labels), int64 epoch seconds.
+    """
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"Invalid granularity. Choose one of {list(TREND_GRANULARITIES)}.")
+    width = TREND_GRANULARITIES[granularity]
+    offset = WEEK_OFFSET if granularity == "week" else 0
+    first = (start - offset) // width * width + offset
+    labels = np.arange(first, end, width, dtype=np.int64)
+    edges = np.append(labels, end)
+    edges[0] = start
+    return edges, labels
+
+
+class FraudAggregates:
+    def __init__(self, time_col="purchase_time", label_col="class"):
+        """
+        Totals, daily counts and a time index of transactions and fraud for the dashboard, built once and then
+        updated per appended batch. Readers only see these arrays, never the transactions themselves.
+        :param time_col: Column with the purchase time.
+        :param label_col: Column with the fraud label (1 = fraud).
+        """
+        self.time_col = time_col
+        self.label_col = label_col
+        self.total = 0
+        self.fraud = 0
+        self.untimed = 0  # Rows counted in the totals whose time did not parse
+        self.days = BucketCounts(DAY)
+        self.index = TimeIndex()
+        # Bumped on every add, so callers can tell whether anything changed
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, time_col="purchase_time", label_col="class"):
+        aggregates = cls(time_col, label_col)
+        aggregates.add(df)
+        return aggregates
+
+    def add(self, df):
+        """
+        Counts a batch of transactions.
+        :param df: DataFrame (or dict of columns) with time_col and label_col.
+        :return: Number of transactions added.
+        """
+        seconds = to_seconds(df[self.time_col])
+        fraud = np.asarray(df[self.label_col]) == 1
+        timed = seconds != np.iinfo(np.int64).min
+        with self._lock:
+            self.days.add(seconds[timed], fraud[timed])
+            self.index.add(seconds[timed], fraud[timed])
+            self.total += len(seconds)
+            self.fraud += int(fraud.sum())
+            self.untimed += int((~timed).sum())
+            self.version += 1
+        return len(seconds)
+
+    def summary(self):
+        """Total transactions, fraud cases and fraud percentage in O(1)."""
+        with self._lock:
+            total, fraud = self.total, self.fraud
+        return {
+            "total_transactions": total,
+            "fraud_cases": fraud,
+            "fraud_percentage": round(100.0 * fraud / total, 2) if total else 0.0,
+        }
+
+    def daily_series(self):
+        """(day starts, totals, frauds) between the first and last non-empty day, in O(days)."""
+        with self._lock:
+            return self.days.series()
+
+    def daily_fraud(self):
+        """{ISO date: fraud count} for days with fraud, the /fraud-trends payload."""
+        starts, _, frauds = self.daily_series()
+        days = frauds > 0
+        return dict(zip(starts[days].astype("datetime64[D]").astype(str).tolist(), frauds[days].tolist()))
+
+    def trend(self, start=None, end=None, granularity="day", max_buckets=10_000):
+        """
+        Transactions, fraud cases and fraud rate per bucket over [start, end), from the time index.
+        :param start: First instant (anything pd.Timestamp reads); defaults to the first transaction.
+        :param end: Exclusive end; defaults to just after the last transaction.
+        :param granularity: "minute", "hour", "day" or "week" (weeks start on Monday).
+        :param max_buckets: Larger requests raise ValueError instead of building a huge response.
+        :return: Dict with the range totals and one list per column, bucket starts as ISO strings.
+        """
+        bounds = self.index.bounds()
+        start = self._seconds(start, "start") if start is not None else (bounds[0] if bounds else 0)
+        end = self._seconds(end, "end") if end is not None else (bounds[1] + 1 if bounds else start)
+        if end < start:
+            raise ValueError("end must not be before start.")
+        width = TREND_GRANULARITIES.get(granularity)
+        if width is not None and (end - start) // width + 1 > max_buckets:
+            raise ValueError(f"The range has more than {max_buckets} {granularity} buckets; "
+                             f"narrow it or use a coarser granularity.")
+        edges, labels = bucket_edges(start, end, granularity)
+        totals, frauds = self.index.counts(edges)
+        total, fraud = int(totals.sum()), int(frauds.sum())
+        return {
+            "granularity": granularity,
+            "start": self._iso(start),
+            "end": self._iso(end),
+            "transactions": total,
+            "fraud_cases": fraud,
+            "fraud_rate": round(fraud / total, 6) if total else None,
+            "buckets": {
+                "start": labels.astype("datetime64[s]").astype(str).tolist(),
+                "transactions": totals.tolist(),
+                "fraud_cases": frauds.tolist(),
+                # None for empty buckets, where a rate is undefined
+                "fraud_rate": [round(f / t, 6) if t else None for f, t in zip(frauds.tolist(), totals.tolist())],
+            },
+        }
+
+    @staticmethod
+    def _seconds(value, name):
+        try:
+            timestamp = pd.Timestamp(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {name} time '{value}'.") from None
+        if timestamp is pd.NaT:
+            raise ValueError(f"Invalid {name} time '{value}'.")
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+        return int(timestamp.to_datetime64().astype("datetime64[s]").astype(np.int64))
+
+    @staticmethod
+    def _iso(seconds):
+        return str(np.datetime64(int(seconds), "s"))
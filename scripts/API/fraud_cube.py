@@ -0,0 +1,264 @@
+import threading
+import numpy as np
+import pandas as pd
+
+OTHER = "other"
+AGE_EDGES = [18, 25, 35, 45, 55, 65]
+AGE_BANDS = ["<18", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+
+
+class CategoricalDimension:
+    def __init__(self, name, column=None, max_categories=50):
+        """
+        Values of a text column, each with its own code up to `max_categories`, then all in one "other" code.
+        fit() gives the codes to the most frequent values; later new values take whatever codes are left.
+        Code 0 is "other" (and missing values), so the axis only grows at the end as values arrive.
+        :param name: Dimension name used in queries.
+        :param column: Source column (defaults to name).
+        :param max_categories: Distinct values kept before folding into "other".
+        """
+        self.name = name
+        self.column = column or name
+        self.max_categories = max_categories
+        self.labels = []
+        self._codes = {}
+
+    @property
+    def size(self):
+        return len(self.labels) + 1
+
+    def fit(self, values):
+        """Codes the most frequent values first, so "other" holds the long tail."""
+        self._assign(pd.Series(values).value_counts().index.tolist())
+        return self
+
+    def _assign(self, values):
+        for value in values:
+            if len(self.labels) >= self.max_categories:
+                break
+            if value not in self._codes:
+                self.labels.append(value)
+                self._codes[value] = len(self.labels)
+
+    def codes(self, values):
+        values = pd.Series(values)
+        if len(self.labels) < self.max_categories:
+            self._assign(value for value in values.dropna().unique().tolist() if value not in self._codes)
+        return values.map(self._codes).fillna(0).to_numpy(np.int64)
+
+    def label(self, code):
+        return OTHER if code == 0 else self.labels[code - 1]
+
+    def lookup(self, label):
+        """Code of a query value, or None for a value never seen (which matches no transactions)."""
+        if label == OTHER:
+            return 0
+        for value, code in self._codes.items():
+            if str(value) == label:
+                return code
+        return None
+
+
+class BandDimension:
+    def __init__(self, name, column, edges, labels):
+        """
+        A numeric column cut into fixed bands; missing or non-numeric values go to an "other" band.
+        :param edges: Left edges of every band after the first.
+        :param labels: One label per band (len(edges) + 1).
+        """
+        self.name = name
+        self.column = column
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.labels = list(labels)
+        self.size = len(self.labels) + 1
+
+    def fit(self, values):
+        return self
+
+    def codes(self, values):
+        numbers = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(np.float64)
+        codes = np.searchsorted(self.edges, numbers, side="right")
+        codes[np.isnan(numbers)] = len(self.labels)
+        return codes.astype(np.int64)
+
+    def label(self, code):
+        return OTHER if code == len(self.labels) else self.labels[code]
+
+    def lookup(self, label):
+        return len(self.labels) if label == OTHER else (self.labels.index(label) if label in self.labels else None)
+
+
+class HourDimension:
+    def __init__(self, name="purchase_hour", column="purchase_time"):
+        """Hour of day (0-23) of a datetime column; rows without a time go to an "other" hour."""
+        self.name = name
+        self.column = column
+        self.labels = [str(hour) for hour in range(24)]
+        self.size = 25
+
+    def fit(self, values):
+        return self
+
+    def codes(self, values):
+        times = pd.Series(values)
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times, errors="coerce")
+        return times.dt.hour.fillna(24).to_numpy(np.int64)
+
+    def label(self, code):
+        return OTHER if code == 24 else str(code)
+
+    def lookup(self, label):
+        return 24 if label == OTHER else (int(label) if label in self.labels else None)
+
+
+def default_dimensions(max_categories=50):
+    """ip_country (top 50 + other), browser, source, sex, age band and purchase hour."""
+    return [
+        CategoricalDimension("ip_country", max_categories=max_categories),
+        CategoricalDimension("browser", max_categories=20),
+        CategoricalDimension("source", max_categories=20),
+        CategoricalDimension("sex", max_categories=4),
+        BandDimension("age_band", "age", AGE_EDGES, AGE_BANDS),
+        HourDimension(),
+    ]
+
+
+class FraudCube:
+    def __init__(self, dimensions, label_col="class"):
+        """
+        Dense transaction and fraud counts over every combination of integer-coded dimensions.
+
+        Categorical axes grow as values arrive but stop at their max_categories (the tail folds into
+        "other"), so memory is bounded by 2 * 8 bytes * product of the dimension sizes: about 12 MB for
+        the Fraud_Data categories with the default dimensions. Adding a batch is one scatter-add; a query
+        sums the cube over the dimensions it does not group by, so it never looks at a transaction.
+        :param dimensions: Dimension objects (see default_dimensions).
+        :param label_col: Column with the fraud label (1 = fraud).
+        """
+        self.dimensions = list(dimensions)
+        self.by_name = {dimension.name: dimension for dimension in self.dimensions}
+        self.label_col = label_col
+        self.shape = tuple(dimension.size for dimension in self.dimensions)
+        self.totals = np.zeros(self.shape, dtype=np.int64)
+        self.frauds = np.zeros(self.shape, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, dimensions=None, label_col="class"):
+        """Builds the cube from a frame, giving high-cardinality dimensions' codes to their most frequent values."""
+        dimensions = dimensions if dimensions is not None else default_dimensions()
+        for dimension in dimensions:
+            dimension.fit(df[dimension.column] if dimension.column in df else [])
+        cube = cls(dimensions, label_col)
+        cube.add(df)
+        return cube
+
+    @property
+    def columns(self):
+        """Source columns the dimensions read."""
+        return list(dict.fromkeys(dimension.column for dimension in self.dimensions))
+
+    def add(self, df):
+        """
+        Counts a batch; a missing dimension column counts as "other".
+        :return: Rows added.
+        """
+        n = len(df)
+        if n == 0:
+            return 0
+        with self._lock:
+            codes = [dimension.codes(df[dimension.column] if dimension.column in df else [np.nan] * n)
+                     for dimension in self.dimensions]
+            self._grow()
+            cells = np.ravel_multi_index(codes, self.shape)
+            fraud = np.asarray(df[self.label_col]) == 1
+            totals, frauds = self.totals.reshape(-1), self.frauds.reshape(-1)
+            if n < totals.size // 16:
+                np.add.at(totals, cells, 1)
+                np.add.at(frauds, cells[fraud], 1)
+            else:
+                totals += np.bincount(cells, minlength=totals.size)
+                frauds += np.bincount(cells[fraud], minlength=totals.size)
+        return n
+
+    def _grow(self):
+        """Pads the count arrays at the end of every axis whose dimension gained codes. Caller holds the lock."""
+        shape = tuple(dimension.size for dimension in self.dimensions)
+        if shape != self.shape:
+            padding = [(0, new - old) for old, new in zip(self.shape, shape)]
+            self.totals, self.frauds = np.pad(self.totals, padding), np.pad(self.frauds, padding)
+            self.shape = shape
+
+    def breakdown(self, by=(), filters=None, limit=100):
+        """
+        Transactions, fraud cases and fraud rate per combination of the `by` dimensions (roll-up over the
+        others), among the transactions matching `filters` (slice).
+        :param by: Dimension names to group by.
+        :param filters: Dict of dimension name -> list of labels to keep.
+        :param limit: Largest groups returned (by transaction count); the totals cover every group.
+        :return: Dict with the overall totals and one dict per group.
+        :raises ValueError: For unknown dimensions.
+        """
+        by, filters = list(by), dict(filters or {})
+        unknown = [name for name in by + list(filters) if name not in self.by_name]
+        if unknown:
+            raise ValueError(f"Unknown dimensions {unknown}; choose from {list(self.by_name)}.")
+        if len(set(by)) != len(by):
+            raise ValueError("Repeated dimension in 'by'.")
+        positions = [i for i, dimension in enumerate(self.dimensions) if dimension.name in by]
+        with self._lock:
+            index = []
+            for dimension in self.dimensions:
+                if dimension.name in filters:
+                    codes = {dimension.lookup(str(label)) for label in filters[dimension.name]}
+                    index.append(np.array(sorted(codes - {None}), dtype=np.int64))
+                else:
+                    index.append(np.arange(dimension.size))
+            # Roll up the unfiltered axes first (no copy of the cube), then slice what is left
+            free = tuple(i for i, dimension in enumerate(self.dimensions)
+                         if i not in positions and dimension.name not in filters)
+            totals = self.totals.sum(axis=free, keepdims=True)
+            frauds = self.frauds.sum(axis=free, keepdims=True)
+        for i, dimension in enumerate(self.dimensions):
+            if dimension.name in filters:
+                totals, frauds = totals.take(index[i], axis=i), frauds.take(index[i], axis=i)
+        rolled = tuple(i for i in range(len(self.dimensions)) if i not in positions)
+        totals, frauds = totals.sum(axis=rolled), frauds.sum(axis=rolled)
+        # Order the remaining axes as requested in `by`
+        order = [positions.index(self.dimensions.index(self.by_name[name])) for name in by]
+        totals, frauds = totals.transpose(order), frauds.transpose(order)
+
+        flat_totals, flat_frauds = totals.reshape(-1), frauds.reshape(-1)
+        cells = np.flatnonzero(flat_totals)
+        cells = cells[np.argsort(-flat_totals[cells], kind="stable")][:limit]
+        # Codes along each kept axis are positions in that dimension's (possibly filtered) index
+        axes = [(self.by_name[name], index[self.dimensions.index(self.by_name[name])]) for name in by]
+        groups = []
+        for cell in cells.tolist():
+            row = {}
+            for (dimension, codes), position in zip(axes, np.unravel_index(cell, totals.shape) if by else ()):
+                row[dimension.name] = self._json_label(dimension.label(int(codes[position])))
+            total, fraud = int(flat_totals[cell]), int(flat_frauds[cell])
+            row.update(transactions=total, fraud_cases=fraud, fraud_rate=round(fraud / total, 6))
+            groups.append(row)
+        total, fraud = int(totals.sum()), int(frauds.sum())
+        return {
+            "by": by,
+            "filters": filters,
+            "transactions": total,
+            "fraud_cases": fraud,
+            "fraud_rate": round(fraud / total, 6) if total else None,
+            "groups": groups,
+        }
+
+    @staticmethod
+    def _json_label(label):
+        return label.item() if isinstance(label, np.generic) else label
+
+    def stats(self):
+        return {
+            "dimensions": {dimension.name: len(dimension.labels) for dimension in self.dimensions},
+            "cells": int(self.totals.size),
+            "bytes": int(self.totals.nbytes + self.frauds.nbytes),
+        }
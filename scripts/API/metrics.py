@@ -0,0 +1,193 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, request
+
+# Latency buckets in seconds, from 5 µs to 2.5 s
+LATENCY_BUCKETS = (
+    5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+# Batch-size buckets, in rows
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self):
+        """Monotonic counter."""
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Histogram:
+    def __init__(self, buckets):
+        """
+        Fixed-bucket histogram. Observing is one bisect and one locked increment, so it is cheap
+        enough for the request hot path; quantiles are interpolated from the bucket counts.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """Returns (per-bucket counts, sum) taken atomically."""
+        with self._lock:
+            return list(self._counts), self._sum
+
+    def quantile(self, q, counts=None):
+        """Estimates quantile q by linear interpolation inside the bucket that contains it."""
+        if counts is None:
+            counts, _ = self.snapshot()
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricFamily:
+    def __init__(self, name, help_text, kind, labelnames, factory):
+        """A named metric with one child per label combination."""
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        """Returns the child for these label values; resolve it once outside hot loops."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def items(self):
+        with self._lock:
+            return [(tuple(zip(self.labelnames, key)), child) for key, child in self._children.items()]
+
+
+class MetricsRegistry:
+    def __init__(self, namespace):
+        """
+        Collects counters and histograms and renders them in the Prometheus text format.
+        :param namespace: Prefix for every metric name (e.g. "fraud_api").
+        """
+        self.namespace = namespace
+        self._families = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        family = MetricFamily(f"{self.namespace}_{name}_total", help_text, "counter", labelnames, Counter)
+        self._families.append(family)
+        return family
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        family = MetricFamily(f"{self.namespace}_{name}", help_text, "histogram", labelnames,
+                              lambda: Histogram(buckets))
+        self._families.append(family)
+        return family
+
+    def register_collector(self, collect):
+        """
+        Adds a callable returning [(name, help, type, [(labels dict, value), ...]), ...] at scrape time.
+        Used for values that live elsewhere, such as micro-batcher or cache statistics.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        """Prometheus text exposition of every registered metric."""
+        lines = []
+        for family in self._families:
+            lines.append(f"# HELP {family.name} {family.help_text}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            quantile_lines = []
+            for labels, child in family.items():
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_format_labels(labels)} {child.value}")
+                    continue
+                counts, total_sum = child.snapshot()
+                cumulative = 0
+                for bound, count in zip(child.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{family.name}_bucket{_format_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                cumulative += counts[-1]
+                lines.append(f"{family.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {total_sum}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {cumulative}")
+                for q in QUANTILES:
+                    quantile_lines.append(
+                        f"{family.name}_quantile{_format_labels(labels + (('quantile', str(q)),))} {child.quantile(q, counts)}")
+            if quantile_lines:
+                lines.append(f"# HELP {family.name}_quantile Quantile estimates interpolated from {family.name} buckets.")
+                lines.append(f"# TYPE {family.name}_quantile gauge")
+                lines.extend(quantile_lines)
+
+        for collect in self._collectors:
+            for name, help_text, kind, samples in collect():
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_format_labels(tuple(labels.items()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def instrument_app(app, registry):
+    """
+    Adds per-endpoint request counters, latency histograms and a /metrics endpoint to a Flask app.
+    Stage-level timings inside handlers are recorded separately by the handlers themselves.
+    """
+    requests_total = registry.counter("requests", "HTTP requests by endpoint and status code.", ("endpoint", "status"))
+    request_seconds = registry.histogram("request_seconds", "End-to-end request latency.", ("endpoint",))
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None and request.endpoint != "metrics":
+            endpoint = request.endpoint or "unknown"
+            request_seconds.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            requests_total.labels(endpoint=endpoint, status=response.status_code).inc()
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
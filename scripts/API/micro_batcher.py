@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=2.0, adaptive=True):
+        """
+        Queues single-row predictions and flushes them to the model as one matrix.
+
+        A batch is flushed when it reaches `max_batch_size` rows or when `max_wait_ms` has passed
+        since its first row arrived. With `adaptive` on, the batcher only waits while recent batches
+        show concurrent traffic, so a lone request under light load is scored immediately.
+
+        :param score_fn: Callable taking an (n, m) matrix and returning (labels, probabilities). Rows submitted
+                         with a context are scored as score_fn(matrix, context).
+        :param max_batch_size: Maximum number of rows per model call.
+        :param max_wait_ms: Maximum time the first row of a batch waits for company.
+        :param adaptive: Skip the wait when traffic is not concurrent.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.adaptive = adaptive
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._avg_batch_size = 1.0
+        self._batch_sizes = Counter()
+        self._flush_reasons = Counter()
+        self._requests = 0
+        self._batches = 0
+        self._model_seconds = 0.0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, row, context=None):
+        """
+        Queues one (1, m) or (m,) row and returns a Future resolving to (label, probability).
+        :param context: What the row must be scored with (e.g. the model state that built it); a flush only
+                        scores rows of the same context together.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed.")
+        future = Future()
+        self._queue.put((np.asarray(row).reshape(1, -1), context, future))
+        return future
+
+    def predict(self, row, context=None, timeout=None):
+        """Blocking helper: submits a row and waits for its (label, probability)."""
+        return self.submit(row, context).result(timeout)
+
+    def _collect(self, first):
+        """Gathers rows following `first` until the batch is full or its deadline passes."""
+        batch = [first]
+        # Take whatever is already waiting without blocking
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, "shutdown"
+            batch.append(item)
+        if len(batch) >= self.max_batch_size:
+            return batch, "size"
+        if self.adaptive and self._avg_batch_size < 1.5 and len(batch) == 1:
+            return batch, "idle"
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, "timeout"
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, "timeout"
+            if item is None:
+                return batch, "shutdown"
+            batch.append(item)
+        return batch, "size"
+
+    def _run(self):
+        """Worker loop: collect a batch, score it with one call, fan the results back."""
+        reason = None
+        while reason != "shutdown":
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, reason = self._collect(first)
+            # Rows queued around a model reload carry different contexts; each group gets its own call
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[1]), []).append(item)
+            for group in groups.values():
+                self._flush(group, reason)
+
+        # Fail anything submitted after shutdown instead of leaving callers hanging
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[2].set_exception(RuntimeError("MicroBatcher is closed."))
+
+    def _flush(self, batch, reason):
+        """Scores (row, context, future) items of one context with a single call and fans the results back."""
+        rows = [row for row, _, _ in batch]
+        context = batch[0][1]
+        futures = [future for _, _, future in batch]
+        start = time.perf_counter()
+        try:
+            matrix = np.concatenate(rows)
+            labels, probabilities = self.score_fn(matrix) if context is None else self.score_fn(matrix, context)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future, label, probability in zip(futures, labels.tolist(), probabilities.tolist()):
+                future.set_result((label, probability))
+        self._record(len(batch), reason, time.perf_counter() - start)
+
+    def _record(self, size, reason, seconds):
+        """Updates per-batch-size statistics."""
+        with self._lock:
+            self._batches += 1
+            self._requests += size
+            self._batch_sizes[size] += 1
+            self._flush_reasons[reason] += 1
+            self._model_seconds += seconds
+            self._avg_batch_size = 0.9 * self._avg_batch_size + 0.1 * size
+
+    def stats(self):
+        """Returns batching statistics, including how many batches of each size were flushed."""
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "adaptive": self.adaptive,
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "mean_model_ms_per_batch": 1000.0 * self._model_seconds / self._batches if self._batches else 0.0,
+                "batch_size_counts": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "flush_reasons": dict(self._flush_reasons),
+            }
+
+    def close(self, timeout=1.0):
+        """Stops the worker after it flushes the rows already queued."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join(timeout)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+import numpy as np
+from tree_ensemble import CompiledTreeEnsemble
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+ARRAY_NAMES = ("feature", "threshold", "children", "value", "roots", "is_leaf")
+
+
+def is_artifact(path):
+    """True when `path` is a model artifact directory."""
+    return (Path(path) / MANIFEST_NAME).is_file()
+
+
+def export_artifact(model, artifact_dir, feature_names=None):
+    """
+    Writes a tree model as raw .npy blocks plus a JSON manifest.
+
+    The node arrays are what CompiledTreeEnsemble evaluates directly, so loading is a handful of
+    np.load calls with mmap_mode="r" instead of unpickling thousands of tree objects.
+    :param model: Fitted DecisionTreeClassifier/RandomForestClassifier or a CompiledTreeEnsemble.
+    :param artifact_dir: Output directory (created if needed).
+    :param feature_names: Training column order; defaults to the model's feature_names_in_.
+    """
+    compiled = model if isinstance(model, CompiledTreeEnsemble) else CompiledTreeEnsemble.from_model(model)
+    if feature_names is None:
+        feature_names = getattr(compiled, "feature_names_in_", None)
+    if feature_names is None:
+        raise ValueError("Model has no feature_names_in_; pass feature_names explicitly.")
+
+    artifact_dir = Path(artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    checksum = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        # np.save writes a contiguous block that np.load can memory-map without copying
+        array = np.ascontiguousarray(getattr(compiled, name))
+        _replace_file(artifact_dir / f"{name}.npy", lambda file: np.save(file, array, allow_pickle=False))
+        checksum.update(array)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model_type": type(model).__name__,
+        "n_trees": compiled.n_trees,
+        "n_nodes": int(len(compiled.feature)),
+        "max_depth": compiled.max_depth,
+        "n_features": compiled.n_features_in_,
+        "feature_names": [str(name) for name in feature_names],
+        "classes": np.asarray(compiled.classes_).tolist(),
+        "arrays": {name: f"{name}.npy" for name in ARRAY_NAMES},
+        "sha256": checksum.hexdigest(),
+    }
+    # The manifest goes last so a half-written directory is never mistaken for an artifact
+    _replace_file(artifact_dir / MANIFEST_NAME, lambda file: file.write(json.dumps(manifest, indent=2).encode()))
+    print(f"Model artifact saved to {artifact_dir}")
+    return artifact_dir
+
+
+def _replace_file(path, write):
+    """
+    Writes to a temporary file and renames it over `path`.
+    Processes that memory-mapped the old file keep reading the old inode instead of seeing it change.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as file:
+        write(file)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(artifact_dir, mmap=True, verify=False):
+    """
+    Loads an artifact as a CompiledTreeEnsemble.
+    With `mmap` the arrays are read-only views of the page cache, shared by every process that loads
+    the same files, so worker memory stays flat as workers are added.
+    :param verify: Check the arrays against the manifest's sha256. This reads every block once, so the
+                   model is no longer paged in lazily; without it a mismatched .npy set is served as is.
+    """
+    artifact_dir = Path(artifact_dir)
+    with open(artifact_dir / MANIFEST_NAME) as file:
+        manifest = json.load(file)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(artifact_dir / filename, mmap_mode=mmap_mode, allow_pickle=False)
+              for name, filename in manifest["arrays"].items()}
+    if len(arrays["feature"]) != manifest["n_nodes"]:
+        raise ValueError(f"Artifact {artifact_dir} is inconsistent with its manifest.")
+    if verify:
+        checksum = hashlib.sha256()
+        for name in ARRAY_NAMES:
+            checksum.update(np.ascontiguousarray(arrays[name]))
+        if checksum.hexdigest() != manifest["sha256"]:
+            raise ValueError(f"Artifact {artifact_dir} does not match its manifest checksum.")
+
+    return CompiledTreeEnsemble(
+        arrays["feature"], arrays["threshold"], arrays["children"], arrays["value"], arrays["roots"],
+        manifest["max_depth"], np.asarray(manifest["classes"]), manifest["n_features"],
+        is_leaf=arrays["is_leaf"], feature_names=manifest["feature_names"],
+    )
+
+
+if __name__ == "__main__":
+    MODEL_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/fraud_model/model.pkl"
+    ARTIFACT_DIR = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/fraud_model_artifact"
+
+    with open(MODEL_PATH, "rb") as file:
+        model = pickle.load(file)
+    export_artifact(model, ARTIFACT_DIR)
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from feature_schema import unnamed_input_estimator
+from model_artifact import MANIFEST_NAME, is_artifact
+from tree_ensemble import CompiledTreeEnsemble
+
+
+class ModelState:
+    def __init__(self, model, schema, compiled, model_path, version, load_seconds):
+        """
+        Everything the prediction endpoints need from one loaded model.
+        Requests read the API's current state once, so a reload swaps all of it in a single assignment.
+        """
+        self.model = model
+        # What score() calls: the model without its feature names, since requests arrive as NumPy rows
+        self.predictor = unnamed_input_estimator(model)
+        self.schema = schema
+        self.compiled = compiled
+        self.model_path = model_path
+        self.version = version
+        self.load_seconds = load_seconds
+        self.warmup_seconds = 0.0
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+
+    def to_dict(self):
+        """Summary for the status endpoint."""
+        return {
+            "model_path": str(self.model_path),
+            "model_version": self.version,
+            "model_type": type(self.model).__name__,
+            "engine": "compiled" if self.compiled is not None or isinstance(self.model, CompiledTreeEnsemble) else "sklearn",
+            "n_features": self.schema.n_features,
+            "loaded_at": self.loaded_at,
+            "load_ms": round(1000.0 * self.load_seconds, 3),
+            "warmup_ms": round(1000.0 * self.warmup_seconds, 3),
+        }
+
+
+def watched_file(model_path):
+    """The file whose modification marks a new model: the pickle itself or an artifact's manifest."""
+    return os.path.join(model_path, MANIFEST_NAME) if is_artifact(model_path) else model_path
+
+
+def model_version(model_path):
+    """Short content hash identifying a model file or artifact manifest."""
+    digest = hashlib.sha256()
+    with open(watched_file(model_path), "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ModelReloader:
+    def __init__(self, api, warmup_rows=64, watch=False, watch_interval=2.0):
+        """
+        Loads replacement models in the background and swaps them into a FraudDetectionAPI.
+
+        A new model is loaded off the request path, checked to accept exactly the same input columns
+        as the serving one, warmed up with a synthetic batch, and only then made active. Requests keep
+        using the old model until the swap, so nothing blocks and nothing in flight is dropped.
+        :param api: FraudDetectionAPI whose `state` is swapped.
+        :param warmup_rows: Rows in the synthetic warmup batch (0 disables warmup).
+        :param watch: Poll the model path and reload when it changes.
+        :param watch_interval: Seconds between polls.
+        """
+        self.api = api
+        self.warmup_rows = warmup_rows
+        self.watch_interval = watch_interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.last_reload = None
+        self.watch = watch
+        self._watcher = None
+        self.start_watcher()
+
+    def start_watcher(self):
+        """Starts the file-watch thread when watching is enabled (also used again after fork())."""
+        if self.watch:
+            self._watcher = threading.Thread(target=self._watch_loop, name="model-watcher", daemon=True)
+            self._watcher.start()
+
+    @property
+    def in_progress(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def warm_up(self, state):
+        """Runs the new model on a single row and a full synthetic batch before it takes traffic."""
+        if self.warmup_rows <= 0:
+            return 0.0
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(self.warmup_rows, state.schema.n_features)).astype(state.schema.dtype)
+        start = time.perf_counter()
+        self.api.score(X[:1], state)
+        self.api.score(X, state)
+        return time.perf_counter() - start
+
+    def reload(self, model_path=None, wait=False):
+        """
+        Starts a background reload from `model_path` (default: the API's configured path).
+        :return: False if another reload is already running.
+        """
+        with self._lock:
+            if self.in_progress:
+                return False
+            path = model_path or self.api.model_path
+            self._thread = threading.Thread(target=self._reload, args=(path,), name="model-reload", daemon=True)
+            self._thread.start()
+        if wait:
+            self._thread.join()
+        return True
+
+    def wait(self):
+        """Blocks until the reload in progress, if any, has finished."""
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _reload(self, model_path):
+        """Load, verify, warm up, swap; any failure leaves the serving model untouched."""
+        started = time.perf_counter()
+        record = {"model_path": str(model_path), "started_at": datetime.now(timezone.utc).isoformat()}
+        try:
+            current = self.api.state
+            state = self.api.build_state(model_path)
+            if state.schema.feature_names != current.schema.feature_names:
+                raise ValueError(f"Input schema changed: serving {list(current.schema.feature_names)}, "
+                                 f"new model expects {list(state.schema.feature_names)}.")
+            state.warmup_seconds = self.warm_up(state)
+            self.api.state = state
+            self.reloads += 1
+            record.update(ok=True, model_version=state.version, previous_version=current.version,
+                          load_ms=round(1000.0 * state.load_seconds, 3),
+                          warmup_ms=round(1000.0 * state.warmup_seconds, 3))
+            print(f"✅ Model reloaded: {current.version} -> {state.version}")
+        except Exception as e:
+            record.update(ok=False, error=str(e))
+            print(f"❌ Model reload failed: {e}")
+        record["total_ms"] = round(1000.0 * (time.perf_counter() - started), 3)
+        self.last_reload = record
+
+    def _watch_loop(self):
+        """Polls the model file and reloads when its modification time changes."""
+        path = self.api.model_path
+        last_seen = self._mtime(path)
+        while not self._stop.wait(self.watch_interval):
+            mtime = self._mtime(path)
+            if mtime is None or mtime == last_seen:
+                continue
+            # Let a writer finish before loading: require the file to be unchanged for one more interval
+            if self._stop.wait(self.watch_interval) or self._mtime(path) != mtime:
+                continue
+            if self.reload(path):
+                last_seen = mtime
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(watched_file(path)).st_mtime_ns
+        except OSError:
+            return None
+
+    def status(self):
+        """Reload statistics for the status endpoint."""
+        return {
+            "in_progress": self.in_progress,
+            "watching": self.watch,
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+        }
+
+    def close(self):
+        """Stops the file watcher."""
+        self._stop.set()
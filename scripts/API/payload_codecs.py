@@ -0,0 +1,144 @@
+import json
+import numpy as np
+from feature_schema import SchemaError
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for application/msgpack bodies
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for Arrow IPC bodies
+    pa = None
+
+JSON = "application/json"
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+ARROW_CONTENT_TYPES = (ARROW_STREAM, ARROW_FILE)
+# Name of the optional single FixedSizeList<float> column holding whole rows
+ARROW_FEATURES_COLUMN = "features"
+
+
+class UnsupportedMediaType(ValueError):
+    """Raised for a body format that is unknown or whose optional library is not installed."""
+
+
+def mimetype_of(content_type):
+    """Lower-cased media type without parameters, defaulting to JSON."""
+    return (content_type or JSON).split(";")[0].strip().lower() or JSON
+
+
+def is_arrow(mimetype):
+    return mimetype in ARROW_CONTENT_TYPES
+
+
+def response_types():
+    """Media types /predict endpoints can answer with, JSON first so it stays the default."""
+    types = [JSON]
+    if msgpack is not None:
+        types.extend(MSGPACK_CONTENT_TYPES)
+    if pa is not None:
+        types.append(ARROW_STREAM)
+    return types
+
+
+def decode(body, mimetype):
+    """
+    Decodes a JSON, NDJSON or MessagePack body into Python objects.
+    NDJSON always yields a list; the other formats return whatever the body holds.
+    """
+    if mimetype in MSGPACK_CONTENT_TYPES:
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack bodies need the 'msgpack' package.")
+        return msgpack.unpackb(body, raw=False)
+    text = body.decode("utf-8") if isinstance(body, bytes) else body
+    if mimetype in NDJSON_CONTENT_TYPES:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if mimetype == JSON or mimetype.endswith("+json"):
+        return json.loads(text)
+    raise UnsupportedMediaType(f"Unsupported Content-Type '{mimetype}'.")
+
+
+def read_arrow_table(body, mimetype):
+    """Opens an Arrow IPC stream or file over the request bytes without copying them."""
+    if pa is None:
+        raise UnsupportedMediaType("Arrow bodies need the 'pyarrow' package.")
+    buffer = pa.py_buffer(body)
+    if mimetype == ARROW_FILE:
+        return pa.ipc.open_file(buffer).read_all()
+    return pa.ipc.open_stream(buffer).read_all()
+
+
+def _column_numpy(column, name, dtype):
+    """One Arrow (chunked) array as a NumPy array, zero-copy when it is a single null-free chunk of `dtype`."""
+    if column.null_count:
+        raise SchemaError(f"Field '{name}' contains nulls.")
+    array = column
+    if isinstance(array, pa.ChunkedArray):
+        array = array.chunk(0) if array.num_chunks == 1 else array.combine_chunks()
+    if not (pa.types.is_integer(array.type) or pa.types.is_floating(array.type)):
+        raise SchemaError(f"Field '{name}' must be numeric, got Arrow type {array.type}.")
+    values = array.to_numpy(zero_copy_only=False)
+    return values if values.dtype == dtype else values.astype(dtype)
+
+
+def arrow_matrix(table, schema):
+    """
+    Builds the model input matrix from an Arrow table.
+
+    Two layouts are accepted:
+    - a single FixedSizeList column named "features" holding whole rows in schema order; its value
+      buffer is already a row-major matrix, so with the schema's dtype the result is a zero-copy view
+      of the request body;
+    - one numeric column per feature (any order); each column is copied once into the matrix.
+    :return: (n_rows, n_features) array in the schema's dtype.
+    """
+    names = table.column_names
+    if names == [ARROW_FEATURES_COLUMN]:
+        column = table.column(ARROW_FEATURES_COLUMN)
+        if not pa.types.is_fixed_size_list(column.type) or column.type.list_size != schema.n_features:
+            raise SchemaError(f"Column '{ARROW_FEATURES_COLUMN}' must be a fixed-size list of {schema.n_features} numbers.")
+        declared = (table.schema.metadata or {}).get(b"feature_names")
+        if declared is not None and tuple(json.loads(declared)) != schema.feature_names:
+            raise SchemaError(f"Arrow feature_names metadata does not match the model: {list(schema.feature_names)}.")
+        rows = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        if rows.null_count:
+            raise SchemaError(f"Column '{ARROW_FEATURES_COLUMN}' contains null rows.")
+        X = _column_numpy(rows.flatten(), ARROW_FEATURES_COLUMN, schema.dtype).reshape(len(rows), schema.n_features)
+    else:
+        missing = sorted(set(schema.feature_names) - set(names))
+        extra = sorted(set(names) - set(schema.feature_names))
+        if missing or extra:
+            raise SchemaError(f"Missing fields: {missing}, unexpected fields: {extra}")
+        X = np.empty((table.num_rows, schema.n_features), dtype=schema.dtype)
+        for i, name in enumerate(schema.feature_names):
+            X[:, i] = _column_numpy(table.column(name), name, schema.dtype)
+
+    if not np.isfinite(X).all():
+        bad = sorted({int(i) for i in np.flatnonzero(~np.isfinite(X).all(axis=1))[:10]})
+        raise SchemaError(f"Non-finite feature values in rows {bad}.")
+    return X
+
+
+def encode(payload, mimetype):
+    """
+    Encodes a prediction response.
+    `payload` maps names to scalars or NumPy arrays; Arrow responses are one record batch whose
+    columns are built straight from the arrays, the other formats convert them to lists.
+    :return: Response body bytes.
+    """
+    if mimetype == ARROW_STREAM:
+        columns = {name: np.atleast_1d(value) for name, value in payload.items() if name != "count"}
+        batch = pa.RecordBatch.from_arrays([pa.array(value) for value in columns.values()], names=list(columns))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    payload = {name: value.tolist() if isinstance(value, np.ndarray) else value for name, value in payload.items()}
+    if mimetype in MSGPACK_CONTENT_TYPES:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload).encode()
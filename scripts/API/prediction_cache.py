@@ -0,0 +1,115 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry cost on top of the key bytes: OrderedDict slot and links, result tuple, floats
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class PredictionCache:
+    def __init__(self, max_entries=10000, max_bytes=None, ttl_seconds=60.0):
+        """
+        Bounded LRU cache of /predict results with a time-to-live.
+
+        Keys are the raw bytes of the schema's row vector, so two payloads hit the same entry exactly
+        when the model would see the same numbers, whatever their JSON key order or int/float spelling.
+        Entries belong to one model version; the first lookup under a new version empties the cache.
+        :param max_entries: Maximum number of cached results.
+        :param max_bytes: Optional cap on the approximate memory used by entries.
+        :param ttl_seconds: Age after which an entry is treated as a miss (None keeps entries until evicted).
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(row):
+        """
+        Canonical key for a (1, n_features) row: adding 0.0 turns -0.0 into 0.0 so both share an entry.
+        The schema has already rejected NaN and infinity.
+        """
+        return (row + 0.0).tobytes()
+
+    @staticmethod
+    def entry_size(key):
+        return sys.getsizeof(key) + ENTRY_OVERHEAD_BYTES
+
+    def _check_version(self, version):
+        """Drops every entry when the serving model changed. Caller holds the lock."""
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.bytes = 0
+            self.version = version
+
+    def get(self, version, key):
+        """Returns the cached (label, probability) for `key` under model `version`, or None."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.bytes -= self.entry_size(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, version, key, result):
+        """Stores a result, evicting least recently used entries to stay within the caps."""
+        expires_at = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._entries[key] = (result, expires_at)
+                return
+            self._entries[key] = (result, expires_at)
+            self.bytes += self.entry_size(key)
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1):
+                evicted, _ = self._entries.popitem(last=False)
+                self.bytes -= self.entry_size(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Counters and occupancy for the status and metrics endpoints."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,140 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+from werkzeug.serving import make_server
+from flask_api import FraudDetectionAPI
+
+
+class PreforkServer:
+    def __init__(self, api, host="0.0.0.0", port=5000, workers=4):
+        """
+        Serves one FraudDetectionAPI from several forked worker processes.
+
+        The model is loaded once in the parent before forking, so workers share its pages
+        copy-on-write. With a memory-mapped model artifact the arrays live in the page cache and
+        stay shared even when a worker touches them.
+
+        Everything else is per worker. POST /admin/reload is therefore sent to the parent (SIGHUP), which
+        passes it on to every worker and reloads its own copy so replacement workers start with the new
+        model; `kill -HUP <parent pid>` does the same. Each worker keeps its own prediction cache, so hit
+        rates are per worker. Velocity history must see every transaction, so it needs a single worker.
+        :param api: A loaded FraudDetectionAPI.
+        :param host: Interface to bind.
+        :param port: Port to bind; all workers accept on the same listening socket.
+        :param workers: Number of worker processes.
+        """
+        if api.velocity is not None and workers > 1:
+            raise ValueError("Velocity history is kept per process; serve velocity features with workers=1.")
+        self.api = api
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.children = set()
+        self.stopping = False
+        self.sock = None
+
+    def _bind(self):
+        """Creates the listening socket shared by all workers."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(1024)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self):
+        """Forks one worker that serves requests on the shared socket."""
+        # A reload thread (e.g. the parent's file watcher) may hold import or allocator locks; a worker
+        # forked at that moment could inherit them locked and deadlock
+        self.api.reloader.wait()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, self._reload_worker)
+            self.api.after_fork()
+            self.api.reload_broadcast = lambda: os.kill(os.getppid(), signal.SIGHUP)
+            server = make_server(self.host, self.port, self.api.app, threaded=True, fd=self.sock.fileno())
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        self.children.add(pid)
+
+    def _stop(self, signum, frame):
+        """Forwards shutdown to the workers."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reload(self, signum, frame):
+        """Passes a reload on to every worker and reloads the parent's model for workers forked later."""
+        if self.stopping:
+            return
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+        # In the foreground, so nothing is forked mid-reload, and then frozen like the first model so
+        # replacement workers share it copy-on-write
+        if not self.api.reloader.reload(wait=True):
+            self.api.reloader.wait()
+        self._freeze()
+
+    @staticmethod
+    def _freeze():
+        """Collects garbage (including a replaced model) and moves what is left out of the GC's reach."""
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+
+    def _reload_worker(self, signum, frame):
+        """Starts this worker's background reload."""
+        if not self.api.reloader.reload():
+            print(f"⚠️ Worker {os.getpid()} is already reloading; reload request skipped.")
+
+    def serve_forever(self):
+        """Forks the workers and restarts any that die until SIGTERM/SIGINT."""
+        self.sock = self._bind()
+        # Move everything allocated so far out of the GC's reach so collections in the workers
+        # do not write to (and therefore copy) the shared model pages
+        self._freeze()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._reload)
+        for _ in range(self.workers):
+            self._spawn()
+        print(f"✅ Serving on {self.host}:{self.port} with {self.workers} workers (parent pid {os.getpid()})")
+
+        while self.children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.children.discard(pid)
+            if not self.stopping:
+                print(f"⚠️ Worker {pid} exited; starting a replacement.")
+                self._spawn()
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fork server for the Fraud Detection API.")
+    parser.add_argument("--model-path", default="/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/fraud_model_artifact")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--verify-artifact", action="store_true", help="Check the model artifact's checksum on load.")
+    args = parser.parse_args()
+
+    api = FraudDetectionAPI(model_path=args.model_path, verify_artifact=args.verify_artifact)
+    PreforkServer(api, host=args.host, port=args.port, workers=args.workers).serve_forever()
@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzip-compressed
+    brotli = None
+
+# Smaller bodies are sent as they are; compression would barely shrink them
+MIN_COMPRESS_BYTES = 1024
+
+
+def _compressors():
+    """Content codings this process can produce, in order of preference."""
+    codings = {}
+    if brotli is not None:
+        codings["br"] = lambda body: brotli.compress(body, quality=5)
+    codings["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+    return codings
+
+
+COMPRESSORS = _compressors()
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Best content coding the client accepts ("identity" if none): the highest q-value wins, ties go to
+    the server's preference (br, then gzip).
+    """
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    best, best_q = "identity", 0.0
+    for coding in COMPRESSORS:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check with the weak comparison RFC 9110 prescribes for it."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Not str.removeprefix: the API image runs Python 3.8
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    candidates = {tag[2:] if tag.startswith("W/") else tag for tag in tags}
+    return etag in candidates
+
+
+class CachedBody:
+    def __init__(self, version, body):
+        """A serialized response for one data version, with its compressed variants made on first use."""
+        self.version = version
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.variants = {}
+
+    def variant(self, coding):
+        """(body, ETag) for a content coding; each coding of a representation gets its own strong ETag."""
+        if coding == "identity" or len(self.body) < MIN_COMPRESS_BYTES:
+            return self.body, self.etag
+        if coding not in self.variants:
+            self.variants[coding] = COMPRESSORS[coding](self.body)
+        return self.variants[coding], f'{self.etag[:-1]}-{coding}"'
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(body) for body in self.variants.values())
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 2**20):
+        """
+        Serialized response bodies per (endpoint, query), valid for one data version.
+
+        An entry whose version is older than the data is recomputed on its next request, so nothing has
+        to be invalidated when transactions arrive. ETags hash the body, so they only change when the
+        response does: a poll after an append that left /summary unchanged still gets a 304.
+        :param max_entries: Maximum cached queries (least recently used are dropped first).
+        :param max_bytes: Cap on the bodies and compressed variants kept.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """The cached body for `key` if it was computed at `version`, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body):
+        """Stores a freshly serialized body and returns its entry."""
+        entry = CachedBody(version, body)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict()
+        return entry
+
+    def variant(self, key, entry, coding):
+        """
+        entry.variant(), compressing outside the lock (two racing requests may both compress once) and
+        accounting for the compressed copy while the entry is cached.
+        """
+        if coding != "identity" and len(entry.body) >= MIN_COMPRESS_BYTES and coding not in entry.variants:
+            compressed = COMPRESSORS[coding](entry.body)
+            with self._lock:
+                if coding not in entry.variants:
+                    entry.variants[coding] = compressed
+                    if self._entries.get(key) is entry:
+                        self.bytes += len(compressed)
+                        self._evict()
+        return entry.variant(coding)
+
+    def count_not_modified(self):
+        """Counts a conditional GET answered with 304."""
+        with self._lock:
+            self.not_modified += 1
+
+    def _evict(self):
+        """Drops least recently used entries over the caps. Caller holds the lock."""
+        while len(self._entries) > self.max_entries or (self.bytes > self.max_bytes and len(self._entries) > 1):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def stats(self):
+        """Counters and occupancy for the metrics endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
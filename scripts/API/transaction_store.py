@@ -0,0 +1,146 @@
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_preprocessing"))
+from frame_io import read_frame, write_frame
+
+SEGMENT_NAME = re.compile(r"^segment-(\d{6})\.feather$")
+
+
+class TransactionStore:
+    def __init__(self, columns, segment_dir=None, compact_rows=100_000, compact_interval=None):
+        """
+        Append-only, chunked columnar store of transactions.
+
+        Appended batches are kept as they arrive (one DataFrame chunk each). Compaction concatenates the
+        pending chunks into one uncompressed Feather segment in `segment_dir` and swaps them for the
+        memory-mapped segment, so a restart maps the segments instead of re-parsing the source CSV.
+        Rows appended since the last compaction are only in memory until the next one.
+        :param columns: Columns kept for every transaction.
+        :param segment_dir: Directory of compacted segments; existing segments are loaded. None keeps
+                            everything in memory.
+        :param compact_rows: Compact as soon as this many rows are pending.
+        :param compact_interval: Also compact pending rows every this many seconds from a background thread.
+        """
+        self.columns = list(columns)
+        self.segment_dir = Path(segment_dir) if segment_dir is not None else None
+        self.compact_rows = compact_rows
+        self.compact_interval = compact_interval
+        self.segments = []  # (path, frame) of compacted chunks, in order
+        self.pending = []   # Appended chunks not yet on disk, in order
+        self.pending_rows = 0
+        self.compactions = 0
+        self.last_compaction = None
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.segment_dir is not None:
+            self.segment_dir.mkdir(parents=True, exist_ok=True)
+            self.load_segments()
+        self.start_compactor()
+
+    @staticmethod
+    def segment_paths(segment_dir):
+        """Complete segments in segment_dir, in order (empty if it does not exist)."""
+        if segment_dir is None or not Path(segment_dir).is_dir():
+            return []
+        return sorted(path for path in Path(segment_dir).iterdir() if SEGMENT_NAME.match(path.name))
+
+    def load_segments(self):
+        """Maps every complete segment in segment_dir (leftover temporary files are removed)."""
+        for path in self.segment_dir.glob("*.tmp.feather"):
+            path.unlink()
+        self.segments = [(path, read_frame(path, columns=self.columns))
+                         for path in self.segment_paths(self.segment_dir)]
+        return len(self.segments)
+
+    def start_compactor(self):
+        """Starts the periodic compaction thread when compact_interval is set (also used again after fork())."""
+        if self.compact_interval and self.segment_dir is not None:
+            self._thread = threading.Thread(target=self._compact_loop, name="transaction-compactor", daemon=True)
+            self._thread.start()
+
+    def _compact_loop(self):
+        while not self._stop.wait(self.compact_interval):
+            if self.pending_rows:
+                self.compact()
+
+    @property
+    def rows(self):
+        with self._lock:
+            return sum(len(frame) for _, frame in self.segments) + self.pending_rows
+
+    def chunks(self):
+        """Every chunk in append order; the list is a snapshot, the frames are shared and must not be changed."""
+        with self._lock:
+            return [frame for _, frame in self.segments] + list(self.pending)
+
+    def frame(self):
+        """All transactions as one DataFrame (a copy of every chunk)."""
+        chunks = self.chunks()
+        if not chunks:
+            return pd.DataFrame({col: [] for col in self.columns})
+        return pd.concat(chunks, ignore_index=True)
+
+    def append(self, df):
+        """
+        Adds a batch (compacting once enough rows are pending).
+        :param df: DataFrame with the store's columns.
+        :return: Rows added.
+        """
+        with self._lock:
+            self.pending.append(df[self.columns])
+            self.pending_rows += len(df)
+            due = self.segment_dir is not None and self.pending_rows >= self.compact_rows
+        if due:
+            self.compact()
+        return len(df)
+
+    def compact(self):
+        """
+        Writes the pending chunks as the next segment. Appends can continue while it is written; only the
+        chunks taken at the start are replaced.
+        :return: Path of the new segment, or None if nothing was pending.
+        """
+        if self.segment_dir is None:
+            raise ValueError("Compaction needs a segment_dir.")
+        with self._compact_lock:
+            with self._lock:
+                taken = list(self.pending)
+            if not taken:
+                return None
+            start = time.perf_counter()
+            number = int(SEGMENT_NAME.match(self.segments[-1][0].name).group(1)) + 1 if self.segments else 0
+            path = self.segment_dir / f"segment-{number:06d}.feather"
+            tmp_path = self.segment_dir / f"segment-{number:06d}.tmp.feather"
+            write_frame(pd.concat(taken, ignore_index=True), tmp_path)
+            os.replace(tmp_path, path)
+            segment = read_frame(path, columns=self.columns)
+            with self._lock:
+                self.segments.append((path, segment))
+                self.pending = self.pending[len(taken):]
+                self.pending_rows -= len(segment)
+            self.compactions += 1
+            self.last_compaction = {"path": str(path), "rows": len(segment),
+                                    "ms": round(1000.0 * (time.perf_counter() - start), 3)}
+            return path
+
+    def stats(self):
+        """Row, chunk and compaction counts for the status endpoint."""
+        with self._lock:
+            segment_rows = sum(len(frame) for _, frame in self.segments)
+            stats = {"segments": len(self.segments), "segment_rows": segment_rows,
+                     "pending_chunks": len(self.pending), "pending_rows": self.pending_rows}
+        return {**stats, "compactions": self.compactions, "last_compaction": self.last_compaction}
+
+    def close(self):
+        """Stops the compaction thread and writes whatever is pending."""
+        self._stop.set()
+        if self.segment_dir is not None and self.pending_rows:
+            self.compact()
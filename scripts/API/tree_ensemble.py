@@ -0,0 +1,132 @@
+import numpy as np
+
+
+class CompiledTreeEnsemble:
+    def __init__(self, feature, threshold, children, value, roots, max_depth, classes, n_features,
+                 is_leaf=None, feature_names=None):
+        """
+        Flattened decision trees evaluated with vectorized NumPy.
+
+        All trees share one set of node arrays; `roots` holds the index of each tree's root.
+        A batch is evaluated level by level: every (row, tree) pair still on an internal node takes
+        one step per iteration, and pairs that reach a leaf drop out of the active set.
+        Leaves point to themselves and carry an infinite threshold.
+
+        Thresholds are stored as float32, rounded towards -inf. sklearn compares float32 features
+        against float64 thresholds, and for a float32 x, `x <= t` holds exactly when x is at most the
+        largest float32 not above t, so the splits are identical to sklearn's.
+
+        :param feature: Feature index tested at each node (int32).
+        :param threshold: Split threshold at each node (float32, +inf at leaves).
+        :param children: Global child indices, shape (n_nodes, 2): column 0 is taken when the split
+                         test fails (right child), column 1 when it passes (left child). Leaves point to themselves.
+        :param value: Normalized class probabilities at each node, shape (n_nodes, n_classes).
+        :param roots: Root node index of each tree.
+        :param max_depth: Depth of the deepest tree.
+        :param classes: Class labels, in the model's `classes_` order.
+        :param n_features: Number of input features.
+        :param is_leaf: Optional precomputed leaf mask (derived from `children` when omitted).
+        :param feature_names: Optional training column names, exposed as `feature_names_in_`.
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.right = children[:, 0]
+        self.left = children[:, 1]
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.n_trees = len(roots)
+        self.is_leaf = is_leaf if is_leaf is not None else self.left == np.arange(len(self.left))
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def from_model(cls, model):
+        """Compiles a fitted DecisionTreeClassifier or RandomForestClassifier."""
+        if hasattr(model, "tree_"):
+            trees = [model.tree_]
+        elif hasattr(model, "estimators_") and all(hasattr(e, "tree_") for e in model.estimators_):
+            trees = [e.tree_ for e in model.estimators_]
+        else:
+            raise TypeError(f"Cannot compile {type(model).__name__}: expected a decision tree or a forest of them.")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise TypeError("Only single-output classifiers can be compiled.")
+
+        n_classes = len(model.classes_)
+        sizes = [tree.node_count for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        n_nodes = int(sum(sizes))
+
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.full(n_nodes, np.inf, dtype=np.float32)
+        children = np.empty((n_nodes, 2), dtype=np.int32)
+        value = np.empty((n_nodes, n_classes), dtype=np.float64)
+
+        for tree, offset in zip(trees, offsets):
+            nodes = slice(offset, offset + tree.node_count)
+            own = np.arange(tree.node_count, dtype=np.int32) + offset
+            is_leaf = tree.children_left == -1
+
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, np.inf, _round_down_to_float32(tree.threshold))
+            children[nodes, 0] = np.where(is_leaf, own, tree.children_right + offset)
+            children[nodes, 1] = np.where(is_leaf, own, tree.children_left + offset)
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :n_classes]
+            normalizer = counts.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            value[nodes] = counts / normalizer
+
+        max_depth = max(tree.max_depth for tree in trees)
+        return cls(feature, threshold, children, value, offsets, max_depth,
+                   np.asarray(model.classes_), model.n_features_in_,
+                   feature_names=getattr(model, "feature_names_in_", None))
+
+    def apply(self, X):
+        """Returns the leaf index reached in every tree, shape (n_samples, n_trees)."""
+        # sklearn compares float32 features against float64 thresholds; mirror it for identical splits
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n, {self.n_features_in_}), got {X.shape}.")
+        n_samples = X.shape[0]
+        leaves = np.tile(self.roots, n_samples)
+        X_flat = X.ravel()
+
+        # Walk all (row, tree) pairs one level at a time, dropping pairs as they reach a leaf
+        active = np.flatnonzero(~self.is_leaf[leaves])
+        node = leaves[active]
+        offset = (active // self.n_trees) * self.n_features_in_
+        while active.size:
+            go_left = X_flat[offset + self.feature[node]] <= self.threshold[node]
+            node = self.children[node, go_left.view(np.uint8)]
+            done = self.is_leaf[node]
+            if done.any():
+                leaves[active[done]] = node[done]
+                pending = ~done
+                active, node, offset = active[pending], node[pending], offset[pending]
+        return leaves.reshape(n_samples, self.n_trees)
+
+    def predict_proba(self, X, chunk_size=4096):
+        """Averages the leaf probabilities of all trees level by level, in row chunks to bound memory."""
+        X = np.asarray(X)
+        out = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            out[start:start + chunk_size] = self.value[leaves].sum(axis=1) / self.n_trees
+        return out
+
+    def predict(self, X):
+        """Returns the most probable class for each row."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def _round_down_to_float32(values):
+    """Casts float64 values to the largest float32 that does not exceed them."""
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
@@ -0,0 +1,443 @@
+import json
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_preprocessing"))
+from feature_transform import parse_datetimes
+from velocity_features import DEFAULT_KEYS, DEFAULT_WINDOWS, DISTINCT_USER_KEYS, to_seconds, velocity_feature_names
+
+FORMAT_VERSION = 1
+NANOSECONDS = 10**9
+
+
+def value_codes(values):
+    """
+    int64 codes for user ids: whole numbers as they are, anything else through pandas' 64-bit hash of its
+    text, which uses a fixed key and so gives the same code in every process (snapshots stay valid).
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(dtype=np.int64)
+    numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    whole = np.isfinite(numeric) & (numeric == np.floor(numeric))
+    hashed = pd.util.hash_array(values.astype(str).to_numpy(dtype=object)).view(np.int64)
+    return np.where(whole, np.where(whole, numeric, 0).astype(np.int64), hashed)
+
+
+def value_code(value):
+    """value_codes for one value, with a fast path for integers."""
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    return int(value_codes([value])[0])
+
+
+def window_masks(times, t, windows):
+    """(n_windows, n_events) mask of the events in (t - window, t]."""
+    return (times > t - windows[:, None]) & (times <= t)
+
+
+def distinct_counts(values, masks):
+    """Distinct values under each mask."""
+    return np.array([len(np.unique(values[mask])) for mask in masks])
+
+
+class RingBuffers:
+    def __init__(self, capacity=32, max_keys=50_000, ttl=None, track_values=False):
+        """
+        The last `capacity` event times (and optionally values) of up to `max_keys` keys.
+
+        All buffers live in one preallocated (max_keys, capacity) block, so memory is fixed up front.
+        Writes go through an array.array, which takes a Python int per store without NumPy's scalar
+        overhead; queries read the same memory through a NumPy view.
+        :param capacity: Events kept per key; window counts saturate at this value.
+        :param max_keys: Keys kept; the least recently updated key is evicted to make room.
+        :param ttl: Seconds (of event time) after which an idle key is dropped (None: only LRU eviction).
+        :param track_values: Keep a value (e.g. a user code) next to every time, for distinct counts.
+        """
+        if capacity <= 0 or max_keys <= 0:
+            raise ValueError("capacity and max_keys must be positive.")
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._times, self.times = self._block(max_keys, capacity)
+        self._values, self.values = self._block(max_keys, capacity) if track_values else (None, None)
+        # Per-slot write position, number of stored events and last event time, with NumPy views for bulk updates
+        self._head, self.head = self._block(max_keys)
+        self._size, self.size = self._block(max_keys)
+        self._last, self.last = self._block(max_keys)
+        self.slots = OrderedDict()
+        self.free = list(range(max_keys - 1, -1, -1))
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    @staticmethod
+    def _block(*shape):
+        """Zeroed int64 array.array and a NumPy view of the same memory with the given shape."""
+        block = array("q", bytes(8 * int(np.prod(shape))))
+        return block, np.frombuffer(block, dtype=np.int64).reshape(shape)
+
+    def _allocate(self, key, t):
+        """Slot for a new key, after dropping expired keys and, if still full, the least recent one."""
+        slots = self.slots
+        if self.ttl is not None:
+            # The LRU end holds the keys updated longest ago, so expiry stops at the first live one
+            while slots and self._last[next(iter(slots.values()))] < t - self.ttl:
+                self.free.append(slots.popitem(last=False)[1])
+                self.expirations += 1
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = slots.popitem(last=False)[1]
+            self.evictions += 1
+        slots[key] = slot
+        self._head[slot] = 0
+        self._size[slot] = 0
+        return slot
+
+    def _touch(self, key, t):
+        """Slot of key, moved to the most recent end; a new or expired key gets a fresh slot. (slot, is_new)"""
+        slot = self.slots.get(key)
+        if slot is not None and self.ttl is not None and self._last[slot] < t - self.ttl:
+            del self.slots[key]
+            self.free.append(slot)
+            self.expirations += 1
+            slot = None
+        if slot is None:
+            return self._allocate(key, t), True
+        self.slots.move_to_end(key)
+        return slot, False
+
+    def update(self, key, t, value=0):
+        """
+        Records an event at time t (int seconds) in O(1).
+        :return: (slot, time of the key's previous event or None).
+        """
+        slot, is_new = self._touch(key, t)
+        previous = None if is_new else self._last[slot]
+        position = self._head[slot]
+        index = slot * self.capacity + position
+        self._times[index] = t
+        if self._values is not None:
+            self._values[index] = value
+        self._head[slot] = position + 1 if position + 1 < self.capacity else 0
+        if self._size[slot] < self.capacity:
+            self._size[slot] += 1
+        self._last[slot] = t
+        return slot, previous
+
+    def update_many(self, keys, times, values=None):
+        """
+        `update` for a batch of events in time order, vectorized: the Python loop only runs once per distinct
+        key (to find its slot), and the buffers are written with NumPy scatters.
+        Only the last `capacity` events of a key can survive, so earlier ones are never written.
+        When a batch has more distinct keys than max_keys, the keys seen last are kept with all their batch
+        events, where `update` would also drop the events before an eviction and re-insert of the same key.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        codes, uniques = pd.factorize(pd.Series(keys), use_na_sentinel=False)
+        uniques = uniques.tolist()
+        index = np.arange(len(codes))
+        # Index of every key's last and first event (later writes win); keys are touched in last-event
+        # order so the LRU order matches `update`
+        last_index = np.zeros(len(uniques), dtype=np.int64)
+        last_index[codes] = index
+        first_index = np.zeros(len(uniques), dtype=np.int64)
+        first_index[codes[::-1]] = index[::-1]
+        touch_order = np.argsort(last_index)[-self.max_keys:]
+        unique_slots = np.full(len(uniques), -1, dtype=np.int64)
+        first_times = times[first_index].tolist()
+        for code in touch_order.tolist():
+            unique_slots[code] = self._touch(uniques[code], first_times[code])[0]
+
+        last_times = times[last_index]
+        # Keys that did not fit in the store (more distinct keys than max_keys) are skipped
+        if len(touch_order) < len(uniques):
+            kept = unique_slots[codes] >= 0
+            codes, times, index = codes[kept], times[kept], index[kept]
+        per_key = np.bincount(codes, minlength=len(uniques))
+        # Rank of every event among its key's events in the batch; only the last `capacity` ranks are written
+        order = np.argsort(codes, kind="stable")
+        starts = np.cumsum(per_key) - per_key
+        rank = np.empty(len(codes), dtype=np.int64)
+        rank[order] = np.arange(len(codes)) - np.repeat(starts, per_key)
+        write = np.flatnonzero(rank >= per_key[codes] - self.capacity)
+        slots = unique_slots[codes[write]]
+        flat = slots * self.capacity + (self.head[slots] + rank[write]) % self.capacity
+        self.times.reshape(-1)[flat] = times[write]
+        if self.values is not None and values is not None:
+            self.values.reshape(-1)[flat] = np.asarray(values, dtype=np.int64)[index[write]]
+
+        touched = unique_slots >= 0
+        slots, added = unique_slots[touched], per_key[touched]
+        self.head[slots] = (self.head[slots] + added) % self.capacity
+        self.size[slots] = np.minimum(self.size[slots] + added, self.capacity)
+        self.last[slots] = last_times[touched]
+        return len(codes)
+
+    def events(self, slot):
+        """(times, values, last time) of the slot's stored events, oldest first (values is None if not tracked)."""
+        size = self._size[slot]
+        # A buffer that has not wrapped yet is already in order
+        order = slice(0, size) if size < self.capacity else np.roll(np.arange(size), -self._head[slot])
+        values = self.values[slot, order] if self.values is not None else None
+        return self.times[slot, order], values, self._last[slot]
+
+    def window_masks(self, slot, t, windows):
+        """(n_windows, size) mask of the slot's events in (t - window, t]."""
+        return window_masks(self.times[slot, :self._size[slot]], t, windows)
+
+    def counts(self, slot, t, windows):
+        """Events of the slot in (t - window, t] for every window; O(capacity)."""
+        return np.count_nonzero(self.window_masks(slot, t, windows), axis=1)
+
+    def distinct(self, slot, t, windows):
+        """Distinct values among the slot's events in (t - window, t] for every window."""
+        return distinct_counts(self.values[slot, :self._size[slot]], self.window_masks(slot, t, windows))
+
+    def stats(self):
+        return {"keys": len(self), "evictions": self.evictions, "expirations": self.expirations,
+                "bytes": self.times.nbytes + (self.values.nbytes if self.values is not None else 0)}
+
+    def state(self):
+        """Arrays describing every live key, for snapshots."""
+        keys = list(self.slots)
+        slots = np.array([self.slots[key] for key in keys], dtype=np.int64)
+        state = {"keys": np.array(json.dumps(keys)), "times": self.times[slots], "head": self.head[slots],
+                 "size": self.size[slots], "last": self.last[slots]}
+        if self.values is not None:
+            state["values"] = self.values[slots]
+        return state
+
+    def restore(self, state):
+        """Loads the keys of `state` (from `state()`), oldest first so the LRU order is kept."""
+        keys = json.loads(str(state["keys"]))
+        if state["times"].shape[1] != self.capacity:
+            raise ValueError(f"Snapshot has {state['times'].shape[1]} events per key, this store {self.capacity}.")
+        # Keep the most recent keys if the snapshot came from a larger store
+        start = max(len(keys) - self.max_keys, 0)
+        for row in range(start, len(keys)):
+            slot = self._allocate(keys[row], int(state["last"][row]))
+            self.times[slot] = state["times"][row]
+            if self.values is not None and "values" in state:
+                self.values[slot] = state["values"][row]
+            self.head[slot] = int(state["head"][row])
+            self.size[slot] = int(state["size"][row])
+            self.last[slot] = int(state["last"][row])
+
+
+class BufferPreview:
+    def __init__(self, buffers):
+        """
+        What a RingBuffers would hold after a run of updates, without changing it: touched keys get local
+        copies of their events, and the LRU/TTL evictions the updates would cause are tracked as removed keys.
+        The buffers must not change while the preview is used (VelocityStore holds its lock). A run with more
+        distinct keys than max_keys, which would evict keys it touched itself, is not followed exactly.
+        """
+        self.buffers = buffers
+        self.touched = {}       # key -> (times, values, last) after the previewed updates
+        self.removed = set()    # Stored keys the previewed updates would expire or evict
+        self.free = len(buffers.free)
+        self._lru = iter(buffers.slots)  # Stored keys from least recently updated
+        self._front = None
+
+    def _next_lru(self):
+        """Least recently updated stored key the preview has not touched or removed yet (None if none left)."""
+        while self._front is None:
+            key = next(self._lru, None)
+            if key is None:
+                return None
+            if key not in self.touched and key not in self.removed:
+                self._front = key
+        return self._front
+
+    def _allocate(self, t):
+        """Takes a slot as RingBuffers._allocate would: expired keys first, then a free slot, then the LRU key."""
+        buffers = self.buffers
+        if buffers.ttl is not None:
+            while (key := self._next_lru()) is not None and buffers._last[buffers.slots[key]] < t - buffers.ttl:
+                self.removed.add(key)
+                self._front = None
+                self.free += 1
+        if self.free:
+            self.free -= 1
+        elif (key := self._next_lru()) is not None:
+            self.removed.add(key)
+            self._front = None
+
+    def update(self, key, t, value=0):
+        """
+        RingBuffers.update on the preview.
+        :return: (times, values, time of the key's previous event or None), events oldest first.
+        """
+        buffers = self.buffers
+        state = self.touched.get(key)
+        if state is None and key not in self.removed:
+            slot = buffers.slots.get(key)
+            if slot is not None:
+                state = buffers.events(slot)
+                self._front = None if self._front == key else self._front
+        if state is not None and buffers.ttl is not None and state[2] < t - buffers.ttl:
+            state = None
+            self.free += 1
+        if state is None:
+            self._allocate(t)
+            times, values, previous = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), None
+        else:
+            times, values, previous = state
+        times = np.append(times, t)[-buffers.capacity:]
+        if buffers.values is not None:
+            values = np.append(values, value)[-buffers.capacity:]
+        self.touched[key] = (times, values, t)
+        return times, values, previous
+
+
+class VelocityStore:
+    def __init__(self, windows=DEFAULT_WINDOWS, keys=DEFAULT_KEYS, distinct_keys=DISTINCT_USER_KEYS,
+                 user_col="user_id", time_col="purchase_time", capacity=32, max_keys=50_000, ttl=None):
+        """
+        Online counterpart of velocity_features: per-key ring buffers updated one transaction at a time.
+
+        Feature names and values match the offline features for transactions fed in time order, as long as
+        no key has more than `capacity` events in a window and no key is evicted while still in a window.
+        Keys are compared as given, so send them as they appear in the training data.
+        :param windows: Dict of window name -> seconds.
+        :param keys: Transaction fields to keep buffers for.
+        :param distinct_keys: Keys that also count distinct users per window.
+        :param capacity: Events kept per key.
+        :param max_keys: Keys kept per field (memory is max_keys * capacity * 8 bytes per array).
+        :param ttl: Drop keys idle for this many seconds of event time (None: only LRU eviction). The longest
+                    window is a good value for memory, but a dropped key also forgets its last time, so its
+                    next secs_since_prev reads as a first transaction where the offline value has the gap.
+        """
+        self.windows = dict(windows)
+        self.window_seconds = np.array(list(self.windows.values()), dtype=np.int64)
+        self.keys = tuple(keys)
+        self.distinct_keys = tuple(key for key in distinct_keys if key in self.keys and key != user_col)
+        self.user_col = user_col
+        self.time_col = time_col
+        self.buffers = {key: RingBuffers(capacity, max_keys, ttl, track_values=key in self.distinct_keys)
+                        for key in self.keys}
+        self.feature_names = velocity_feature_names(self.keys, self.windows, self.distinct_keys, user_col)
+        self.updates = 0
+        self._lock = threading.Lock()
+
+    def seconds(self, records):
+        """Event time of every record in whole seconds (None where it does not parse)."""
+        ns = parse_datetimes([record[self.time_col] for record in records]).view(np.int64)
+        return [None if value == np.iinfo(np.int64).min else value // NANOSECONDS for value in ns.tolist()]
+
+    def warm_up(self, df):
+        """
+        Records past transactions (e.g. the training data) without computing features, so the first requests
+        after a start see the same history the offline features did. Vectorized per field.
+        :param df: DataFrame with the key fields, the user and the time.
+        :return: Number of transactions recorded.
+        """
+        df = df.sort_values(self.time_col, kind="stable")
+        seconds = to_seconds(df[self.time_col])
+        users = value_codes(df[self.user_col]) if self.distinct_keys else None
+        with self._lock:
+            for key, buffers in self.buffers.items():
+                buffers.update_many(df[key].to_numpy(), seconds, users)
+            self.updates += len(df)
+        return len(df)
+
+    def observe(self, records):
+        """
+        Records transactions in order and returns their features, each computed right after its own update
+        so it includes itself, as the offline features do.
+        :param records: List of transaction dicts with the key fields, the user and the time.
+        :return: Dict of feature name -> float64 array (NaN for records whose time does not parse).
+        """
+        with self._lock:
+            features, pending = self._preview(records)
+            self._commit(pending)
+        return features
+
+    def preview(self, records):
+        """
+        The features observe() would return, without recording anything, so a request can be validated
+        and scored before its transactions count. Pass the second value to commit() once it succeeds.
+        Another request committed between the two is not seen by these features (nor these by it).
+        :return: (dict of feature name -> float64 array, pending updates).
+        """
+        with self._lock:
+            return self._preview(records)
+
+    def commit(self, pending):
+        """Records the transactions of a preview()."""
+        with self._lock:
+            self._commit(pending)
+
+    def _preview(self, records):
+        """preview() with the lock held. Every lookup that can fail (missing field, bad key) happens here."""
+        try:
+            times = self.seconds(records)
+        except KeyError as e:
+            raise ValueError(f"Missing field {e} in transaction.") from None
+        features = {name: np.full(len(records), np.nan) for name in self.feature_names}
+        previews = {key: BufferPreview(buffers) for key, buffers in self.buffers.items()}
+        pending = []
+        for row, (record, t) in enumerate(zip(records, times)):
+            if t is None:
+                continue
+            try:
+                user = value_code(record[self.user_col]) if self.distinct_keys else 0
+                values = [record[key] for key in self.keys]
+            except KeyError as e:
+                raise ValueError(f"Missing field {e} in transaction {row}.") from None
+            for key, value in zip(self.keys, values):
+                events, users, previous = previews[key].update(value, t, user)
+                masks = window_masks(events, t, self.window_seconds)
+                counts = np.count_nonzero(masks, axis=1)
+                for i, name in enumerate(self.windows):
+                    features[f"{key}_txn_{name}"][row] = counts[i]
+                if key in self.distinct_keys:
+                    distinct = distinct_counts(users, masks)
+                    for i, name in enumerate(self.windows):
+                        features[f"{key}_users_{name}"][row] = distinct[i]
+                if previous is not None:
+                    features[f"{key}_secs_since_prev"][row] = t - previous
+            pending.append((values, t, user))
+        return features, pending
+
+    def _commit(self, pending):
+        for values, t, user in pending:
+            for buffers, value in zip(self.buffers.values(), values):
+                buffers.update(value, t, user)
+        self.updates += len(pending)
+
+    def stats(self):
+        """Keys, evictions and memory per field."""
+        return {"updates": self.updates, "keys": {key: buffers.stats() for key, buffers in self.buffers.items()}}
+
+    def save(self, path):
+        """Snapshots every buffer to one .npz file (written to a temporary file first)."""
+        arrays = {"format_version": np.array(FORMAT_VERSION), "updates": np.array(self.updates)}
+        with self._lock:
+            for key, buffers in self.buffers.items():
+                arrays.update({f"{key}__{name}": value for name, value in buffers.state().items()})
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    def restore(self, path):
+        """Loads a snapshot written by `save` into this (empty) store; fields it does not track are ignored."""
+        with np.load(path, allow_pickle=False) as data, self._lock:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported velocity snapshot format {int(data['format_version'])} in {path}")
+            self.updates = int(data["updates"])
+            for key, buffers in self.buffers.items():
+                state = {name[len(key) + 2:]: data[name] for name in data.files if name.startswith(f"{key}__")}
+                if state:
+                    buffers.restore(state)
+        return self
@@ -1,6 +1,5 @@
-import pandas as pd
-import numpy as np
 from sklearn.preprocessing import MinMaxScaler, StandardScaler, LabelEncoder
+from frame_io import read_frame, write_frame
 
 class FraudDataProcessor:
     def __init__(self, input_path: str, output_path: str, scaling_method: str = 'standard', encoding_method: str = 'label'):
@@ -14,7 +13,7 @@ class FraudDataProcessor:
 
     def load_data(self):
         """Load processed fraud dataset."""
-        self.df = pd.read_csv(self.input_path)
+        self.df = read_frame(self.input_path)
     
     def encode_categorical_features(self):
         """Convert all non-numeric categorical features into numeric format."""
@@ -43,8 +42,8 @@ class FraudDataProcessor:
         self.df_scaled[self.numeric_cols] = self.scaler.fit_transform(self.df_numeric)
     
     def save_processed_data(self):
-        """Save processed dataset."""
-        self.df_scaled.to_csv(self.output_path, index=False)
+        """Save processed dataset as CSV, Parquet or Feather, chosen by the file extension."""
+        write_frame(self.df_scaled, self.output_path)
         print(f"Processed data saved to {self.output_path}")
     
     def run_pipeline(self):
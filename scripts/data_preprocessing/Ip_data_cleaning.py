@@ -1,11 +1,16 @@
-import pandas as pd
 import logging
 import numpy as np
-import ipaddress
+from ip_utils import parse_ipv4
+from schemas import IP_COUNTRY_SCHEMA
+from frame_io import read_frame, write_frame
+from streaming import DEFAULT_CHUNKSIZE, SeenKeys, StreamingInterpolator, append_csv, iter_csv_chunks, row_hashes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+IP_BOUND_COLUMNS = ["lower_bound_ip_address", "upper_bound_ip_address"]
+
+
 class IPAddressDataCleaner:
     def __init__(self, file_path: str):
         """Initialize with dataset file path."""
@@ -15,7 +20,7 @@ class IPAddressDataCleaner:
     def load_data(self):
         """Loads data from a CSV file."""
         try:
-            self.data = pd.read_csv(self.file_path)
+            self.data = read_frame(self.file_path, schema=IP_COUNTRY_SCHEMA)
             logging.info(f"✅ Data loaded successfully from {self.file_path}")
         except Exception as e:
             logging.error(f"❌ Error loading data: {e}")
@@ -31,15 +36,20 @@ class IPAddressDataCleaner:
             logging.error("❌ Data is not loaded. Call `load_data()` first.")
 
     def convert_ip_to_integer(self):
-        """Converts IP addresses to integer format for efficient processing."""
+        """
+        Converts IP addresses to integer format for efficient processing.
+        Both bound columns are parsed in one vectorized pass each; invalid entries become NaN so
+        `handle_missing_values` can interpolate them.
+        """
         if self.data is not None:
             try:
-                self.data["lower_bound_ip_address"] = self.data["lower_bound_ip_address"].apply(
-                    lambda ip: int(ipaddress.ip_address(ip)) if isinstance(ip, str) else ip
-                )
-                self.data["upper_bound_ip_address"] = self.data["upper_bound_ip_address"].apply(
-                    lambda ip: int(ipaddress.ip_address(ip)) if isinstance(ip, str) else ip
-                )
+                for col in IP_BOUND_COLUMNS:
+                    numeric, valid = parse_ipv4(self.data[col])
+                    if valid.all():
+                        self.data[col] = numeric.astype(np.int64)
+                    else:
+                        self.data[col] = np.where(valid, numeric, np.nan)
+                        logging.warning(f"⚠️ {int((~valid).sum())} invalid IP addresses in '{col}' set to NaN.")
                 logging.info("🔢 Converted IP addresses to integer format.")
             except Exception as e:
                 logging.error(f"❌ Error converting IP addresses: {e}")
@@ -58,20 +68,56 @@ class IPAddressDataCleaner:
         """Handles missing values by filling with 'Unknown' for country and interpolating IPs."""
         if self.data is not None:
             # Fill missing countries with "Unknown"
-            self.data["country"].fillna("Unknown", inplace=True)
+            self.data["country"] = self.data["country"].fillna("Unknown")
             
             # Fill missing IP values using interpolation (linear fill)
-            self.data["lower_bound_ip_address"].interpolate(method="linear", inplace=True)
-            self.data["upper_bound_ip_address"].interpolate(method="linear", inplace=True)
+            for col in IP_BOUND_COLUMNS:
+                self.data[col] = self.data[col].interpolate(method="linear")
 
             logging.info("🧪 Handled missing values (filled missing countries, interpolated IPs).")
         else:
             logging.error("❌ Data is not loaded.")
 
+    def clean_in_chunks(self, output_path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+        """
+        Runs remove_duplicates, convert_ip_to_integer, standardize_country_names and handle_missing_values on a
+        CSV that does not fit in memory, in one streaming pass. Interpolated IPs whose next known value is in a
+        later chunk are held back until that chunk arrives.
+        :param output_path: Cleaned CSV to write.
+        :param chunksize: Rows per chunk.
+        """
+        seen = SeenKeys()
+        interpolator = StreamingInterpolator(IP_BOUND_COLUMNS)
+        rows, written, first = 0, 0, True
+        # Rows are read as text so a duplicate hashes the same whatever types its chunk was inferred as
+        chunks = iter_csv_chunks(self.file_path, chunksize, dtype=object)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            following = next(chunks, None)
+            rows += len(chunk)
+            self.data = chunk[seen.add(row_hashes(chunk))].copy()
+            for col in IP_BOUND_COLUMNS:
+                numeric, valid = parse_ipv4(self.data[col])
+                self.data[col] = np.where(valid, numeric, np.nan)
+            self.data["country"] = self.data["country"].str.strip().str.title().fillna("Unknown")
+            ready = interpolator.feed(self.data, final=following is None)
+            for col in IP_BOUND_COLUMNS:
+                # Whole-number chunks are written as integers, like convert_ip_to_integer does for clean columns
+                values = ready[col].to_numpy()
+                if np.isfinite(values).all() and (values == np.floor(values)).all():
+                    ready[col] = values.astype(np.int64)
+            if len(ready) or first:
+                append_csv(ready, output_path, first)
+                first = False
+            written += len(ready)
+            chunk = following
+        self.data = None
+        logging.info(f"✅ Cleaned data saved to {output_path} ({written} of {rows} rows, chunks of {chunksize})")
+
     def save_cleaned_data(self, output_path: str):
-        """Saves the cleaned dataset to a new CSV file."""
+        """Saves the cleaned dataset as CSV, Parquet or Feather, chosen by the file extension."""
         if self.data is not None:
-            self.data.to_csv(output_path, index=False)
+            write_frame(self.data, output_path)
             logging.info(f"✅ Cleaned data saved to {output_path}")
         else:
             logging.error("❌ No data available to save.")
@@ -1,21 +1,44 @@
 import pandas as pd
 import logging
 from typing import Optional
+from schemas import FRAUD_DATA_SCHEMA
+from frame_io import read_frame, write_frame
+from streaming import DEFAULT_CHUNKSIZE, SeenKeys, append_csv, iter_csv_chunks, row_hashes
 
 # Setting up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def correct_types(df: pd.DataFrame):
+    """
+    Converts purchase_time to datetime, object columns to numeric and anything left to category, in place.
+    :return: (numeric columns, categorical columns) that were converted.
+    """
+    if 'purchase_time' in df.columns:
+        df['purchase_time'] = pd.to_datetime(df['purchase_time'], errors='coerce')
+    numerical_cols = df.select_dtypes(include=['object']).columns
+    for col in numerical_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    categorical_cols = df.select_dtypes(include=['object']).columns
+    for col in categorical_cols:
+        df[col] = df[col].astype('category')
+    return list(numerical_cols), list(categorical_cols)
+
+
 class DataCleaner:
-    def __init__(self, file_path: str):
-        """Initialize the class with a dataset file path."""
+    def __init__(self, file_path: str, schema: Optional[dict] = None):
+        """
+        Initialize the class with a dataset file path.
+        :param schema: Column types to load CSVs with (e.g. FRAUD_DATA_SCHEMA); None keeps read_csv's defaults.
+        """
         self.file_path = file_path
+        self.schema = schema
         self.data: Optional[pd.DataFrame] = None
         logging.info("DataCleaner initialized with file: %s", file_path)
 
     def load_data(self):
         """Loads data from a CSV file."""
         try:
-            self.data = pd.read_csv(self.file_path)
+            self.data = read_frame(self.file_path, schema=self.schema)
             logging.info("✅ Data loaded successfully from %s", self.file_path)
         except Exception as e:
             logging.error("❌ Error loading data: %s", e)
@@ -33,37 +56,45 @@ class DataCleaner:
     def correct_data_types(self):
         """Corrects data types (e.g., datetime, numeric)."""
         if self.data is not None:
-            # Example: Convert purchase_time to datetime
-            if 'purchase_time' in self.data.columns:
-                self.data['purchase_time'] = pd.to_datetime(self.data['purchase_time'], errors='coerce')
+            has_purchase_time = 'purchase_time' in self.data.columns
+            numerical_cols, categorical_cols = correct_types(self.data)
+            if has_purchase_time:
                 logging.info("📅 Corrected 'purchase_time' to datetime format.")
-
-            # Example: Convert numerical columns to appropriate types
-            numerical_cols = self.data.select_dtypes(include=['object']).columns
             for col in numerical_cols:
-                self.data[col] = pd.to_numeric(self.data[col], errors='coerce')
                 logging.info("🔢 Converted column '%s' to numeric.", col)
-
-            # Handle categorical features as needed (e.g., converting to category)
-            categorical_cols = self.data.select_dtypes(include=['object']).columns
             for col in categorical_cols:
-                self.data[col] = self.data[col].astype('category')
                 logging.info("🔠 Converted column '%s' to category.", col)
 
         else:
             logging.error("❌ Data is not loaded. Call `load_data()` first.")
 
+    def clean_in_chunks(self, output_path: str, chunksize: int = DEFAULT_CHUNKSIZE):
+        """
+        Runs remove_duplicates and correct_data_types on a CSV that does not fit in memory, in one streaming
+        pass. Memory depends on the chunk size, plus 8 bytes per distinct row for duplicate detection.
+        """
+        seen = SeenKeys()
+        rows, written = 0, 0
+        # Rows are read as text so a duplicate hashes the same whatever types its chunk was inferred as
+        for index, chunk in enumerate(iter_csv_chunks(self.file_path, chunksize, dtype=object)):
+            rows += len(chunk)
+            chunk = chunk[seen.add(row_hashes(chunk))].copy()
+            correct_types(chunk)
+            written += len(chunk)
+            append_csv(chunk, output_path, first=index == 0)
+        logging.info("✅ Cleaned data saved to %s (%d of %d rows, chunks of %d)", output_path, written, rows, chunksize)
+
     def save_cleaned_data(self, output_path: str):
-        """Saves the cleaned dataset to a new CSV file."""
+        """Saves the cleaned dataset as CSV, Parquet or Feather, chosen by the file extension."""
         if self.data is not None:
-            self.data.to_csv(output_path, index=False)
+            write_frame(self.data, output_path)
             logging.info("✅ Cleaned data saved to %s", output_path)
         else:
             logging.error("❌ No data available to save.")
 
 # Example Usage:
 if __name__ == "__main__":
-    preprocessor = DataCleaner("Fraud_Data.csv")
+    preprocessor = DataCleaner("Fraud_Data.csv", schema=FRAUD_DATA_SCHEMA)
     
     # Step 1: Load data
     preprocessor.load_data()
@@ -1,40 +1,44 @@
-import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler, StandardScaler, LabelEncoder
+from ip_range_index import IPRangeIndex
+from ip_utils import parse_ipv4
+from schemas import IP_COUNTRY_SCHEMA
+from frame_io import read_frame, write_frame
+from feature_transform import FeatureTransform
 
 class FraudDataProcessor:
-    def __init__(self, input_path: str, ip_mapping_path: str, output_path: str, scaling_method: str = 'standard', encoding_method: str = 'label'):
+    def __init__(self, input_path: str, ip_mapping_path: str, output_path: str, scaling_method: str = 'standard', encoding_method: str = 'label', transform_path: str = None):
         self.input_path = input_path
         self.ip_mapping_path = ip_mapping_path
         self.output_path = output_path
         self.scaling_method = scaling_method.lower()
         self.encoding_method = encoding_method.lower()
+        self.transform_path = transform_path
         self.df = None
         self.ip_mapping = None
+        self.ip_index = None
         self.scaler = None
         self.label_encoders = {}
     
     def load_data(self):
         """Load processed fraud dataset and IP mapping dataset."""
-        self.df = pd.read_csv(self.input_path)
-        self.ip_mapping = pd.read_csv(self.ip_mapping_path)
+        self.df = read_frame(self.input_path)
+        self.ip_mapping = read_frame(self.ip_mapping_path, schema=IP_COUNTRY_SCHEMA)
     
     def map_ip_to_country(self):
-        """Map IP addresses to corresponding countries."""
-        self.df['ip_address_numeric'] = self.df['ip_address'].apply(self.ip_to_numeric)
-        
-        def find_country(ip):
-            match = self.ip_mapping[(self.ip_mapping['lower_bound_ip_address'] <= ip) &
-                                    (self.ip_mapping['upper_bound_ip_address'] >= ip)]
-            return match['country'].values[0] if not match.empty else 'Unknown'
-        
-        self.df['ip_country'] = self.df['ip_address_numeric'].apply(find_country)
+        """Map IP addresses to corresponding countries with one sorted-range lookup for the whole column."""
+        self.df['ip_address_numeric'] = self.ip_to_numeric(self.df['ip_address'])
+        self.ip_index = IPRangeIndex.from_frame(self.ip_mapping)
+        self.df['ip_country'] = self.ip_index.lookup(self.df['ip_address_numeric'].to_numpy())
         self.df.drop(columns=['ip_address', 'ip_address_numeric'], inplace=True)
     
-    def ip_to_numeric(self, ip_str):
-        """Convert IP address from string to numeric format."""
-        parts = list(map(int, ip_str.split('.')))
-        return (parts[0] << 24) + (parts[1] << 16) + (parts[2] << 8) + parts[3]
+    def ip_to_numeric(self, ips):
+        """
+        Convert a column of IP addresses (dotted quads or numbers) to numeric format in one vectorized pass.
+        Unparseable addresses become NaN, which the country lookup maps to 'Unknown'.
+        """
+        numeric, valid = parse_ipv4(ips)
+        return np.where(valid, numeric, np.nan)
     
     def encode_categorical_features(self):
         """Convert all non-numeric categorical features into numeric format."""
@@ -63,9 +67,19 @@ class FraudDataProcessor:
         self.df_scaled[self.numeric_cols] = self.scaler.fit_transform(self.df_numeric)
     
     def save_processed_data(self):
-        """Save processed dataset."""
-        self.df_scaled.to_csv(self.output_path, index=False)
+        """Save processed dataset as CSV, Parquet or Feather, chosen by the file extension."""
+        write_frame(self.df_scaled, self.output_path)
         print(f"Processed data saved to {self.output_path}")
+
+    def export_transform(self, path=None, unseen_code=-1):
+        """
+        Save the fitted IP mapping, encoders and scaler as one FeatureTransform artifact, so serving and
+        batch scoring can turn raw transactions into the scaled features without refitting anything.
+        """
+        path = path or self.transform_path
+        FeatureTransform.from_processor(self, unseen_code=unseen_code).save(path)
+        print(f"Feature transform saved to {path}")
+        return path
     
     def run_pipeline(self):
         print("Loading data...")
@@ -80,6 +94,9 @@ class FraudDataProcessor:
         self.apply_scaling()
         print("Saving processed data...")
         self.save_processed_data()
+        if self.transform_path:
+            print("Exporting feature transform...")
+            self.export_transform()
         print("Processing complete!")
 
 if __name__ == "__main__":
@@ -88,6 +105,8 @@ if __name__ == "__main__":
     OUTPUT_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/featured/processed_fraud_data.csv"
     SCALING_METHOD = 'standard'  # Change to 'minmax' for Min-Max scaling
     ENCODING_METHOD = 'label'  # Change to 'frequency' or 'target' for different encoding methods
+    TRANSFORM_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/feature_transform.npz"
     
-    processor = FraudDataProcessor(INPUT_PATH, IP_MAPPING_PATH, OUTPUT_PATH, SCALING_METHOD, ENCODING_METHOD)
+    processor = FraudDataProcessor(INPUT_PATH, IP_MAPPING_PATH, OUTPUT_PATH, SCALING_METHOD, ENCODING_METHOD,
+                                   TRANSFORM_PATH)
     processor.run_pipeline()
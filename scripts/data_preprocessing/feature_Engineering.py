@@ -1,6 +1,4 @@
-import pandas as pd
-import numpy as np
-from pathlib import Path
+from frame_io import read_frame, write_frame
 
 class FraudFeatureEngineer:
     def __init__(self, fraud_path: str, output_path: str):
@@ -10,7 +8,11 @@ class FraudFeatureEngineer:
 
     def load_data(self):
         """Load fraud dataset and validate required columns."""
-        self.df = pd.read_csv(self.fraud_path, parse_dates=['signup_time', 'purchase_time'])
+        self.df = read_frame(self.fraud_path, parse_dates=['signup_time', 'purchase_time'])
+        self.validate_columns()
+
+    def validate_columns(self):
+        """Check the fraud dataset has every column the features are built from."""
         required_cols = {'user_id', 'signup_time', 'purchase_time', 'purchase_value', 'device_id',
                          'source', 'browser', 'sex', 'age', 'ip_address', 'class'}
         if not required_cols.issubset(self.df.columns):
@@ -41,9 +43,8 @@ class FraudFeatureEngineer:
         return self.df
     
     def save_processed_data(self):
-        """Save processed data to CSV."""
-        Path(self.output_path).parent.mkdir(parents=True, exist_ok=True)
-        self.df.to_csv(self.output_path, index=False)
+        """Save processed data as CSV, Parquet or Feather, chosen by the file extension."""
+        write_frame(self.df, self.output_path)
         print(f"Data saved successfully to {self.output_path}")
     
     def run_pipeline(self):
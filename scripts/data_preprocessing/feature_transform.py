@@ -0,0 +1,274 @@
+import logging
+import numpy as np
+import pandas as pd
+from ip_range_index import IPRangeIndex
+from ip_utils import parse_ipv4
+from velocity_features import VELOCITY_FEATURE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+FORMAT_VERSION = 1
+# Features FraudFeatureEngineer derives from signup_time and purchase_time
+TIME_FEATURES = ("signup_timestamp", "purchase_timestamp", "time_since_signup", "signup_hour", "signup_dayofweek",
+                 "purchase_hour", "purchase_dayofweek", "is_night_purchase", "fast_purchase")
+PASSTHROUGH_FEATURES = ("user_id", "purchase_value", "age")
+ENCODED_SUFFIX = "_encoded"
+NANOSECONDS = 10**9
+# 1970-01-01 was a Thursday (weekday 3)
+EPOCH_WEEKDAY = 3
+
+
+def parse_datetimes(values):
+    """datetime64[ns] array from datetimes or text; unparseable values become NaT."""
+    if isinstance(values, pd.Series) and pd.api.types.is_datetime64_dtype(values.dtype):
+        return values.to_numpy(dtype="datetime64[ns]")
+    try:
+        # NumPy parses ISO 8601 text ("2015-02-24 22:55:49") without pandas' per-call format inference
+        return np.asarray(values, dtype="datetime64[ns]")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(pd.Series(values), errors="coerce")
+        if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+            parsed = parsed.dt.tz_convert(None)
+        return parsed.to_numpy(dtype="datetime64[ns]")
+
+
+def parse_numbers(values):
+    """float64 array; non-numeric values become NaN."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class FeatureTransform:
+    def __init__(self, feature_names, classes, ip_index, scale_kind, shift, scale, unseen_code=-1):
+        """
+        Fitted FraudFeatureEngineer + FraudDataProcessor steps, applied to a batch in one pass.
+        Build it with `from_processor` or `load` rather than directly.
+        :param feature_names: Output column order (the model's training columns).
+        :param classes: Dict of categorical column -> sorted LabelEncoder classes.
+        :param ip_index: IPRangeIndex used for the IP -> country mapping.
+        :param scale_kind: 'standard' ((x - shift) / scale) or 'minmax' (x * scale + shift).
+        :param shift: Per-feature shift; 0 for columns that are not scaled.
+        :param scale: Per-feature scale; 1 for columns that are not scaled.
+        :param unseen_code: Code for categories the encoders never saw (LabelEncoder would raise).
+        """
+        if scale_kind not in ("standard", "minmax"):
+            raise ValueError("Invalid scale kind. Choose 'standard' or 'minmax'.")
+        self.feature_names = [str(name) for name in feature_names]
+        self.classes = {col: np.asarray(values, dtype=object) for col, values in classes.items()}
+        self.ip_index = ip_index
+        self.scale_kind = scale_kind
+        self.shift = np.asarray(shift, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.unseen_code = int(unseen_code)
+        # Velocity features depend on earlier transactions, so they are passed in by the caller (VelocityStore)
+        self.velocity_features = [name for name in self.feature_names if VELOCITY_FEATURE.match(name)]
+        for name in self.feature_names:
+            if (name not in TIME_FEATURES and name not in PASSTHROUGH_FEATURES and self._encoded_column(name) is None
+                    and name not in self.velocity_features):
+                raise ValueError(f"Don't know how to compute feature '{name}' from a raw transaction.")
+        self._lookups = {col: pd.Index(values) for col, values in self.classes.items()}
+        # Plain dicts beat a hash-table Index for the handful of values in an API request
+        self._tables = {col: {value: code for code, value in enumerate(values)} for col, values in self.classes.items()}
+        # Country label code from the IP index (with its trailing 'unknown' slot) -> encoder code in one take()
+        if "ip_country" in self.classes:
+            codes = self._lookups["ip_country"].get_indexer(ip_index._lookup_labels)
+            self._country_codes = np.where(codes >= 0, codes, self.unseen_code).astype(np.float64)
+        self.input_columns = self._input_columns()
+
+    def _encoded_column(self, name):
+        """'browser' for 'browser_encoded' when an encoder was fitted for it, else None."""
+        if name.endswith(ENCODED_SUFFIX) and name[:-len(ENCODED_SUFFIX)] in self.classes:
+            return name[:-len(ENCODED_SUFFIX)]
+        return None
+
+    def _input_columns(self):
+        """Raw transaction fields the features are computed from."""
+        columns = []
+        for name in self.feature_names:
+            if name in TIME_FEATURES:
+                needed = ["signup_time", "purchase_time"]
+            elif name in self.velocity_features:
+                needed = []
+            elif name in PASSTHROUGH_FEATURES:
+                needed = [name]
+            else:
+                col = self._encoded_column(name)
+                needed = ["ip_address"] if col == "ip_country" else [col]
+            columns.extend(col for col in needed if col not in columns)
+        return columns
+
+    @classmethod
+    def from_processor(cls, processor, ip_index=None, feature_names=None, target_col="class", unseen_code=-1):
+        """
+        Captures what a FraudDataProcessor fitted in run_pipeline/encode_categorical_features/apply_scaling.
+        :param processor: Processor after apply_scaling.
+        :param ip_index: IPRangeIndex to use; defaults to the one built by map_ip_to_country.
+        :param feature_names: Output column order; defaults to the scaled frame's columns without the target.
+        """
+        ip_index = ip_index if ip_index is not None else processor.ip_index
+        if ip_index is None or processor.scaler is None:
+            raise ValueError("Processor is not fitted; run map_ip_to_country and apply_scaling first.")
+        if feature_names is None:
+            feature_names = [col for col in processor.df_scaled.columns if col != target_col]
+        classes = {col: encoder.classes_ for col, encoder in processor.label_encoders.items()}
+
+        scaler = processor.scaler
+        scaled = {name: i for i, name in enumerate(processor.numeric_cols)}
+        if hasattr(scaler, "data_min_"):
+            scale_kind, fitted_shift, fitted_scale = "minmax", scaler.min_, scaler.scale_
+        else:
+            scale_kind = "standard"
+            fitted_shift = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(scaled))
+            fitted_scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(scaled))
+        shift = [fitted_shift[scaled[name]] if name in scaled else 0.0 for name in feature_names]
+        scale = [fitted_scale[scaled[name]] if name in scaled else 1.0 for name in feature_names]
+        return cls(feature_names, classes, ip_index, scale_kind, shift, scale, unseen_code)
+
+    def _gather(self, data):
+        """Dict of input column -> array from a DataFrame, a dict of columns, a list of dicts or one dict."""
+        if isinstance(data, dict) and not any(isinstance(value, (list, np.ndarray, pd.Series))
+                                              for value in data.values()):
+            data = [data]
+        if isinstance(data, list):
+            try:
+                return {col: [record[col] for record in data] for col in self.input_columns}
+            except KeyError as e:
+                raise ValueError(f"Missing field {e} in transaction.") from None
+            except TypeError:
+                raise ValueError("Transactions must be JSON objects.") from None
+        missing = [col for col in self.input_columns if col not in data]
+        if missing:
+            raise ValueError(f"Missing fields: {missing}")
+        return {col: data[col] for col in self.input_columns}
+
+    def _time_features(self, signup, purchase):
+        """Every time feature from the two timestamp columns, computed on int64 nanoseconds."""
+        times = {}
+        for name, values in (("signup", signup), ("purchase", purchase)):
+            ns = parse_datetimes(values).view(np.int64)
+            missing = ns == np.iinfo(np.int64).min
+            seconds = (ns // NANOSECONDS).astype(np.float64)
+            seconds[missing] = np.nan
+            times[name] = (ns, seconds, missing)
+
+        features = {}
+        for name, (ns, seconds, missing) in times.items():
+            features[f"{name}_timestamp"] = seconds
+            features[f"{name}_hour"] = seconds // 3600 % 24
+            features[f"{name}_dayofweek"] = (seconds // 86400 + EPOCH_WEEKDAY) % 7
+        (signup_ns, _, signup_missing), (purchase_ns, _, purchase_missing) = times["signup"], times["purchase"]
+        since = (purchase_ns - signup_ns) / NANOSECONDS
+        since[signup_missing | purchase_missing] = np.nan
+        features["time_since_signup"] = since
+        hour = features["purchase_hour"]
+        features["is_night_purchase"] = np.where(np.isnan(hour), np.nan, (hour >= 22) | (hour <= 5))
+        features["fast_purchase"] = np.where(np.isnan(since), np.nan, since < 300)
+        return features
+
+    def _codes(self, col, values):
+        """Encoder codes of a categorical column, `unseen_code` for categories (or missing values) not fitted."""
+        lookup = self._lookups[col]
+        if isinstance(values, list):
+            table = self._tables[col]
+            codes = np.fromiter((table.get(value, -1) for value in values), dtype=np.int64, count=len(values))
+        elif isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # Look up each distinct category once and expand through the column's own codes
+            per_category = np.append(lookup.get_indexer(values.cat.categories), -1)
+            codes = per_category.take(values.cat.codes.to_numpy())
+        else:
+            codes = lookup.get_indexer(pd.Index(values, dtype=object))
+        return np.where(codes >= 0, codes, self.unseen_code), codes < 0
+
+    def transform(self, data, dtype=np.float64, return_unseen=False, velocity=None):
+        """
+        Raw transactions -> scaled model input, in feature_names order.
+        :param data: DataFrame, dict of columns, list of transaction dicts or a single transaction dict.
+                     Times may be strings or datetimes; IP addresses dotted quads or numbers.
+        :param dtype: Output dtype.
+        :param return_unseen: Also return a per-row mask of rows with at least one unseen category.
+        :param velocity: Dict of velocity feature -> array, required when the model uses velocity features.
+        :return: (n, n_features) matrix, plus the mask when return_unseen is set. Rows with unparseable
+                 times or numbers contain NaN.
+        """
+        columns = self._gather(data)
+        derived = {}
+        unseen = None
+        if "signup_time" in columns:
+            derived.update(self._time_features(columns["signup_time"], columns["purchase_time"]))
+        for col in self.input_columns:
+            values = columns[col]
+            if col in PASSTHROUGH_FEATURES:
+                derived[col] = parse_numbers(values)
+            elif col == "ip_address":
+                ips, valid = parse_ipv4(values)
+                # Invalid addresses fall in the 'unknown' slot like in map_ip_to_country
+                derived["ip_country_encoded"] = self._country_codes.take(self.ip_index.lookup_codes(
+                    np.where(valid, ips, np.nan)))
+                missed = derived["ip_country_encoded"] == self.unseen_code
+                unseen = missed if unseen is None else unseen | missed
+            elif col in self.classes:
+                derived[col + ENCODED_SUFFIX], missed = self._codes(col, values)
+                unseen = missed if unseen is None else unseen | missed
+
+        if self.velocity_features:
+            missing = [name for name in self.velocity_features if velocity is None or name not in velocity]
+            if missing:
+                raise ValueError(f"Velocity features {missing} must be passed in.")
+            derived.update({name: velocity[name] for name in self.velocity_features})
+
+        n = len(next(iter(derived.values()))) if derived else 0
+        X = np.empty((n, len(self.feature_names)), dtype=np.float64)
+        for i, name in enumerate(self.feature_names):
+            X[:, i] = derived[name]
+        if self.scale_kind == "standard":
+            X -= self.shift
+            X /= self.scale
+        else:
+            X *= self.scale
+            X += self.shift
+        X = X.astype(dtype, copy=False)
+        if return_unseen:
+            return X, unseen if unseen is not None else np.zeros(n, dtype=bool)
+        return X
+
+    def transform_frame(self, data):
+        """`transform` as a DataFrame with the feature names as columns."""
+        return pd.DataFrame(self.transform(data), columns=self.feature_names)
+
+    def save(self, path):
+        """Saves the transform as a single .npz file (no pickled objects)."""
+        arrays = {f"classes__{col}": values.astype(str) for col, values in self.classes.items()}
+        np.savez(path, format_version=np.array(FORMAT_VERSION), feature_names=np.array(self.feature_names),
+                 scale_kind=np.array(self.scale_kind), shift=self.shift, scale=self.scale,
+                 unseen_code=np.array(self.unseen_code), ip_starts=self.ip_index.starts, ip_stops=self.ip_index.stops,
+                 ip_codes=self.ip_index.codes, ip_labels=self.ip_index.labels.astype(str),
+                 ip_unknown=np.array(self.ip_index.unknown), **arrays)
+        logging.info(f"✅ Feature transform with {len(self.feature_names)} features saved to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Loads a transform written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported feature transform format {int(data['format_version'])} in {path}")
+            classes = {key[len("classes__"):]: data[key].astype(object) for key in data.files
+                       if key.startswith("classes__")}
+            ip_index = IPRangeIndex(data["ip_starts"], data["ip_stops"], data["ip_codes"],
+                                    data["ip_labels"].astype(object), str(data["ip_unknown"]))
+            return cls(data["feature_names"].tolist(), classes, ip_index, str(data["scale_kind"]), data["shift"],
+                       data["scale"], int(data["unseen_code"]))
+
+
+if __name__ == "__main__":
+    from frame_io import read_frame, write_frame
+
+    TRANSFORM_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/feature_transform.npz"
+    INPUT_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/cleaned/cleaned_Fraud_Data.csv"
+    OUTPUT_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/featured/scoring_features.parquet"
+
+    transform = FeatureTransform.load(TRANSFORM_PATH)
+    write_frame(transform.transform_frame(read_frame(INPUT_PATH, columns=transform.input_columns)), OUTPUT_PATH)
@@ -0,0 +1,96 @@
+import logging
+from pathlib import Path
+import pandas as pd
+from schemas import load_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet and Feather need pyarrow; CSV works without it
+    pa = feather = pq = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+
+def format_of(path):
+    """'csv', 'parquet' or 'feather', from the file extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file format '{suffix}' for {path}; use one of {sorted(FORMATS)}.")
+    return FORMATS[suffix]
+
+
+def _require_pyarrow(path):
+    if feather is None:
+        raise ImportError(f"pyarrow is required to read or write {path}")
+
+
+def read_frame(path, columns=None, memory_map=True, schema=None, parse_dates=None):
+    """
+    Reads a DataFrame from CSV, Parquet or Feather, chosen by extension.
+    :param path: Input file.
+    :param columns: Only load these columns. Parquet and Feather skip the other columns on disk; CSV still
+                    scans every line but only parses and keeps these.
+    :param memory_map: Feather only: map the file instead of reading it, so numeric columns of an
+                       uncompressed file are used in place without a copy.
+    :param schema: CSV only: schema passed to load_csv (None keeps read_csv's defaults). Parquet and Feather
+                   keep the dtypes they were written with.
+    :param parse_dates: Columns to return as datetimes, whatever the format stored them as.
+    :return: DataFrame.
+    """
+    fmt = format_of(path)
+    columns = list(columns) if columns is not None else None
+    if fmt == "csv":
+        df = load_csv(path, schema=schema, usecols=columns, parse_dates=parse_dates)
+    elif fmt == "parquet":
+        _require_pyarrow(path)
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        _require_pyarrow(path)
+        df = feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas(split_blocks=True)
+    if fmt != "csv":
+        for col in parse_dates or []:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col])
+    # CSV and Feather return the file's column order; always use the requested one
+    return df[columns] if columns is not None else df
+
+
+def frame_columns(path):
+    """Column names of a CSV, Parquet or Feather file, read from its header or schema only."""
+    fmt = format_of(path)
+    if fmt == "csv":
+        return pd.read_csv(path, nrows=0).columns.tolist()
+    _require_pyarrow(path)
+    if fmt == "parquet":
+        return pq.read_schema(path).names
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def write_frame(df, path):
+    """
+    Writes a DataFrame as CSV, Parquet or Feather, chosen by extension.
+    Feather files are written uncompressed so read_frame can memory-map them.
+    """
+    fmt = format_of(path)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        _require_pyarrow(path)
+        df.to_parquet(path, index=False)
+    else:
+        _require_pyarrow(path)
+        feather.write_feather(df.reset_index(drop=True), path, compression="uncompressed")
+    return path
@@ -1,10 +1,35 @@
 import pandas as pd
 import logging
 import numpy as np
+from schemas import FRAUD_DATA_SCHEMA, apply_schema
+from frame_io import read_frame, write_frame
+from streaming import (DEFAULT_CHUNKSIZE, RunningMoments, SeenKeys, StreamingMode, StreamingQuantile,
+                       append_csv, iter_csv_chunks, row_hashes)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+DUPLICATE_SUBSET = ["user_id", "purchase_time", "device_id"]
+DATETIME_COLUMNS = ["purchase_time", "signup_time"]
+NUMERIC_COLUMNS = ["age", "purchase_value"]
+MEDIAN_COLUMNS = ["age", "purchase_value"]
+CATEGORICAL_COLUMNS = ["source", "browser", "sex"]
+
+
+def convert_types(df):
+    """Parses the datetime and numeric columns of a frame in place; returns the converted column names."""
+    converted = []
+    for col in DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+            converted.append(col)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            converted.append(col)
+    return converted
+
+
 class FraudDataCleaner:
     def __init__(self, file_path: str):
         """Initialize with dataset file path."""
@@ -14,7 +39,7 @@ class FraudDataCleaner:
     def load_data(self):
         """Loads data from a CSV file."""
         try:
-            self.data = pd.read_csv(self.file_path)
+            self.data = read_frame(self.file_path, schema=FRAUD_DATA_SCHEMA)
             logging.info(f"✅ Data loaded successfully from {self.file_path}")
         except Exception as e:
             logging.error(f"❌ Error loading data: {e}")
@@ -23,7 +48,7 @@ class FraudDataCleaner:
         """Removes duplicate transactions based on key features."""
         if self.data is not None:
             initial_shape = self.data.shape
-            self.data.drop_duplicates(subset=["user_id", "purchase_time", "device_id"], inplace=True)
+            self.data.drop_duplicates(subset=DUPLICATE_SUBSET, inplace=True)
             final_shape = self.data.shape
             logging.info(f"🔄 Removed {initial_shape[0] - final_shape[0]} duplicate transactions.")
         else:
@@ -32,19 +57,10 @@ class FraudDataCleaner:
     def fix_data_types(self):
         """Converts columns to correct data types."""
         if self.data is not None:
-            if "purchase_time" in self.data.columns:
-                self.data["purchase_time"] = pd.to_datetime(self.data["purchase_time"], errors="coerce")
-                logging.info("📅 Converted 'purchase_time' to datetime.")
-
-            if "signup_time" in self.data.columns:
-                self.data["signup_time"] = pd.to_datetime(self.data["signup_time"], errors="coerce")
-                logging.info("📅 Converted 'signup_time' to datetime.")
-
-            # Convert numeric columns
-            numeric_cols = ["age", "purchase_value"]
-            for col in numeric_cols:
-                if col in self.data.columns:
-                    self.data[col] = pd.to_numeric(self.data[col], errors="coerce")
+            for col in convert_types(self.data):
+                if col in DATETIME_COLUMNS:
+                    logging.info(f"📅 Converted '{col}' to datetime.")
+                else:
                     logging.info(f"🔢 Converted '{col}' to numeric type.")
 
         else:
@@ -56,21 +72,20 @@ class FraudDataCleaner:
             # Fill missing ages with median
             if "age" in self.data.columns:
                 median_age = self.data["age"].median()
-                self.data["age"].fillna(median_age, inplace=True)
+                self.data["age"] = self.data["age"].fillna(median_age)
                 logging.info(f"🧪 Filled missing 'age' values with median: {median_age}")
 
             # Fill missing purchase_value with median
             if "purchase_value" in self.data.columns:
                 median_value = self.data["purchase_value"].median()
-                self.data["purchase_value"].fillna(median_value, inplace=True)
+                self.data["purchase_value"] = self.data["purchase_value"].fillna(median_value)
                 logging.info(f"🧪 Filled missing 'purchase_value' values with median: {median_value}")
 
             # Fill missing categorical values with most common category
-            categorical_cols = ["source", "browser", "sex"]
-            for col in categorical_cols:
+            for col in CATEGORICAL_COLUMNS:
                 if col in self.data.columns:
                     most_frequent = self.data[col].mode()[0]
-                    self.data[col].fillna(most_frequent, inplace=True)
+                    self.data[col] = self.data[col].fillna(most_frequent)
                     logging.info(f"🔠 Filled missing '{col}' with most frequent: {most_frequent}")
 
         else:
@@ -91,10 +106,76 @@ class FraudDataCleaner:
         else:
             logging.error("❌ Data is not loaded.")
 
+    def clean_in_chunks(self, output_path: str, chunksize: int = DEFAULT_CHUNKSIZE, threshold=3):
+        """
+        Runs remove_duplicates, fix_data_types, handle_missing_values and detect_outliers on a CSV that does not
+        fit in memory and writes the result to output_path.
+        The first pass streams the file once to find duplicates and gather the medians, modes and the
+        purchase_value mean/std; the second pass streams it again and applies them chunk by chunk. Memory
+        depends on the chunk size, plus 8 bytes per distinct transaction key for duplicate detection.
+        :param output_path: Cleaned CSV to write.
+        :param chunksize: Rows per chunk.
+        :param threshold: Z-score threshold for purchase_value outliers.
+        :return: The statistics used for filling and outlier removal.
+        """
+        seen = SeenKeys()
+        duplicates = []
+        medians = {col: StreamingQuantile() for col in MEDIAN_COLUMNS}
+        modes = {col: StreamingMode() for col in CATEGORICAL_COLUMNS}
+        moments = RunningMoments()
+        missing_values = 0
+        rows, columns = 0, []
+        # Key columns are read as text so a duplicate hashes the same whatever types its chunk was inferred as
+        key_dtypes = {col: object for col in DUPLICATE_SUBSET}
+        for chunk in iter_csv_chunks(self.file_path, chunksize, dtype=key_dtypes):
+            columns = chunk.columns
+            first = seen.add(row_hashes(chunk, DUPLICATE_SUBSET))
+            duplicates.append(rows + np.flatnonzero(~first))
+            rows += len(chunk)
+            chunk = apply_schema(chunk[first].copy(), FRAUD_DATA_SCHEMA)
+            convert_types(chunk)
+            for col in MEDIAN_COLUMNS:
+                if col in columns:
+                    medians[col].update(chunk[col])
+            for col in CATEGORICAL_COLUMNS:
+                if col in columns:
+                    modes[col].update(chunk[col])
+            if "purchase_value" in columns:
+                moments.update(chunk["purchase_value"])
+                missing_values += int(chunk["purchase_value"].isna().sum())
+        del seen
+        duplicates = np.concatenate(duplicates) if duplicates else np.array([], dtype=np.int64)
+
+        fill_values = {col: medians[col].median() for col in MEDIAN_COLUMNS if col in columns}
+        fill_values.update({col: modes[col].mode() for col in CATEGORICAL_COLUMNS if col in columns})
+        stats = {"rows": rows, "duplicates": len(duplicates), "fill_values": fill_values}
+        if "purchase_value" in columns:
+            # Outliers are scored after the fill, so the filled medians count towards the mean and std
+            moments.add_constant(fill_values["purchase_value"], missing_values)
+            stats.update(mean=float(moments.mean), std=moments.std())
+        logging.info(f"📊 First pass: {rows} rows, {len(duplicates)} duplicates, fill values {fill_values}")
+
+        offset, kept = 0, 0
+        for index, chunk in enumerate(iter_csv_chunks(self.file_path, chunksize, dtype=key_dtypes)):
+            in_chunk = duplicates[(duplicates >= offset) & (duplicates < offset + len(chunk))] - offset
+            offset += len(chunk)
+            chunk = apply_schema(chunk.drop(index=chunk.index[in_chunk]), FRAUD_DATA_SCHEMA)
+            convert_types(chunk)
+            for col, value in fill_values.items():
+                chunk[col] = chunk[col].fillna(value)
+            if "purchase_value" in columns:
+                z_scores = (chunk["purchase_value"] - stats["mean"]) / stats["std"]
+                chunk = chunk[np.abs(z_scores) <= threshold]
+            kept += len(chunk)
+            append_csv(chunk, output_path, first=index == 0)
+        stats["rows_written"] = kept
+        logging.info(f"✅ Cleaned data saved to {output_path} ({kept} of {rows} rows, chunks of {chunksize})")
+        return stats
+
     def save_cleaned_data(self, output_path: str):
-        """Saves the cleaned dataset to a new CSV file."""
+        """Saves the cleaned dataset as CSV, Parquet or Feather, chosen by the file extension."""
         if self.data is not None:
-            self.data.to_csv(output_path, index=False)
+            write_frame(self.data, output_path)
             logging.info(f"✅ Cleaned data saved to {output_path}")
         else:
             logging.error("❌ No data available to save.")
@@ -1,10 +1,24 @@
 import pandas as pd
 from typing import Optional, Union
+from schemas import FRAUD_DATA_SCHEMA, apply_schema
+from frame_io import read_frame, write_frame
+from streaming import DEFAULT_CHUNKSIZE, RunningMoments, StreamingMode, StreamingQuantile, append_csv, iter_csv_chunks
+
+def fill_missing(values: pd.Series, value) -> pd.Series:
+    """fillna that also works when a categorical column does not have the fill value among its categories."""
+    if isinstance(values.dtype, pd.CategoricalDtype) and value not in values.cat.categories:
+        values = values.cat.add_categories([value])
+    return values.fillna(value)
+
 
 class DataPreprocessor:
-    def __init__(self, file_path: str):
-        """Initialize the class with a dataset file path."""
+    def __init__(self, file_path: str, schema: Optional[dict] = None):
+        """
+        Initialize the class with a dataset file path.
+        :param schema: Column types to load CSVs with (e.g. FRAUD_DATA_SCHEMA); None keeps read_csv's defaults.
+        """
         self.file_path = file_path
+        self.schema = schema
         self.data: Optional[pd.DataFrame] = None
         self.numerical_cols = []
         self.categorical_cols = []
@@ -12,7 +26,7 @@ class DataPreprocessor:
     def load_data(self):
         """Loads data from a CSV file."""
         try:
-            self.data = pd.read_csv(self.file_path)
+            self.data = read_frame(self.file_path, schema=self.schema)
             self._identify_column_types()
             print(f"✅ Data loaded successfully from {self.file_path}")
         except Exception as e:
@@ -57,30 +71,106 @@ class DataPreprocessor:
             for col in self.data.columns:
                 if self.data[col].isnull().sum() > 0:  # Only process columns with missing values
                     if fill_values and col in fill_values:
-                        self.data[col].fillna(fill_values[col], inplace=True)
+                        self.data[col] = fill_missing(self.data[col], fill_values[col])
                         print(f"🧪 Filled {col} with custom value: {fill_values[col]}")
                     elif col in self.numerical_cols:
                         fill_val = self.data[col].mean() if method == "auto" else self.data[col].median()
-                        self.data[col].fillna(fill_val, inplace=True)
+                        self.data[col] = self.data[col].fillna(fill_val)
                         print(f"📈 Filled {col} with {'mean' if method == 'auto' else 'median'}: {fill_val}")
                     elif col in self.categorical_cols:
                         fill_val = self.data[col].mode()[0]
-                        self.data[col].fillna(fill_val, inplace=True)
+                        self.data[col] = fill_missing(self.data[col], fill_val)
                         print(f"🔠 Filled {col} with mode: {fill_val}")
         else:
             print("❌ Invalid method! Use 'drop', 'fill', or 'auto'.")
 
+    def handle_missing_values_in_chunks(self, output_path: str, method: str = "auto",
+                                        fill_values: Optional[dict] = None, chunksize: int = DEFAULT_CHUNKSIZE):
+        """
+        handle_missing_values for a CSV that does not fit in memory. A first pass streams the file to find the
+        column types, missing counts and the mean (exact), median (exact or within 0.1%) or mode of every column;
+        a second pass fills the chunks with them and writes output_path. Memory only depends on the chunk size.
+        Every chunk is converted with the same schema load_data uses, so both modes see the same dtypes.
+
+        Parameters:
+        - output_path: str, CSV to write.
+        - method, fill_values: as for handle_missing_values.
+        - chunksize: int, Rows per chunk.
+        """
+        if method not in ("drop", "fill", "auto"):
+            print("❌ Invalid method! Use 'drop', 'fill', or 'auto'.")
+            return
+
+        numerical, categorical, missing = {}, set(), None
+        means, medians, modes = {}, {}, {}
+        for chunk in self._iter_chunks(chunksize):
+            chunk_missing = chunk.isnull().sum()
+            missing = chunk_missing if missing is None else missing + chunk_missing
+            chunk_numerical = set(chunk.select_dtypes(include=["number"]).columns)
+            categorical |= set(chunk.select_dtypes(include=["object", "category"]).columns)
+            for col in chunk.columns:
+                # A column is numerical only if every chunk parsed it as numbers
+                numerical[col] = numerical.get(col, True) and col in chunk_numerical
+            if method == "drop":
+                continue
+            for col in chunk.columns:
+                if col in chunk_numerical:
+                    means.setdefault(col, RunningMoments()).update(chunk[col])
+                    medians.setdefault(col, StreamingQuantile()).update(chunk[col])
+                else:
+                    modes.setdefault(col, StreamingMode()).update(chunk[col])
+        if missing is None:
+            print("❌ No data to process.")
+            return
+
+        self.numerical_cols = [col for col in missing.index if numerical[col]]
+        self.categorical_cols = [col for col in missing.index if col in categorical and not numerical[col]]
+        print("📊 Missing values per column:\n", missing[missing > 0])
+
+        fills = {}
+        for col in missing.index[missing > 0] if method != "drop" else []:
+            if fill_values and col in fill_values:
+                fills[col] = fill_values[col]
+            elif col in self.numerical_cols:
+                fills[col] = float(means[col].mean) if method == "auto" else medians[col].median()
+            elif col in self.categorical_cols:
+                fills[col] = modes[col].mode()
+        if fills:
+            print(f"🧪 Fill values: {fills}")
+
+        # A column with missing values anywhere is float64 in memory; chunks where it is complete would
+        # otherwise keep a downcast integer type and write "5" where load_data's frame writes "5.0"
+        floats = [col for col in self.numerical_cols if missing[col] > 0]
+        rows = 0
+        for index, chunk in enumerate(self._iter_chunks(chunksize)):
+            for col in floats:
+                chunk[col] = chunk[col].astype("float64")
+            if method == "drop":
+                chunk = chunk.dropna()
+            else:
+                for col, value in fills.items():
+                    chunk[col] = fill_missing(chunk[col], value)
+            rows += len(chunk)
+            append_csv(chunk, output_path, first=index == 0)
+        print(f"✅ Cleaned data saved to {output_path} ({rows} rows, chunks of {chunksize})")
+        return missing
+
+    def _iter_chunks(self, chunksize: int):
+        """CSV chunks converted with the schema, if one was given."""
+        for chunk in iter_csv_chunks(self.file_path, chunksize):
+            yield apply_schema(chunk, self.schema) if self.schema else chunk
+
     def save_cleaned_data(self, output_path: str):
-        """Saves the cleaned dataset to a new CSV file."""
+        """Saves the cleaned dataset as CSV, Parquet or Feather, chosen by the file extension."""
         if self.data is not None:
-            self.data.to_csv(output_path, index=False)
+            write_frame(self.data, output_path)
             print(f"✅ Cleaned data saved to {output_path}")
         else:
             print("❌ No data available to save.")
 
 # Example Usage:
 if __name__ == "__main__":
-    preprocessor = DataPreprocessor("Fraud_Data.csv")
+    preprocessor = DataPreprocessor("Fraud_Data.csv", schema=FRAUD_DATA_SCHEMA)
     preprocessor.load_data()
     preprocessor.check_missing_values()
     
@@ -0,0 +1,143 @@
+import heapq
+import logging
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+class IPRangeIndex:
+    def __init__(self, starts, stops, codes, labels, unknown="Unknown"):
+        """
+        Sorted, disjoint IP segments for vectorized range lookups.
+        Segment i covers the half-open interval [starts[i], stops[i]) and maps to labels[codes[i]].
+        Build it with `from_ranges`/`from_frame` rather than directly.
+        :param starts: Sorted segment starts (float64, exact for every IPv4 integer).
+        :param stops: Segment ends, exclusive.
+        :param codes: Label index of each segment.
+        :param labels: Distinct country names.
+        :param unknown: Label returned for addresses outside every range.
+        """
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.stops = np.asarray(stops, dtype=np.float64)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.labels = np.asarray(labels, dtype=object)
+        self.unknown = unknown
+        # The extra slot makes "no match" (code -1) resolve to `unknown` in a single take()
+        self._lookup_labels = np.append(self.labels, np.array([unknown], dtype=object))
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_ranges(cls, lower, upper, countries, unknown="Unknown"):
+        """
+        Builds the index from inclusive [lower, upper] ranges.
+
+        Gaps between ranges map to `unknown`. Where ranges overlap, the one that appears first in the
+        input wins, which is what scanning the table top to bottom and taking the first match returns.
+        Ranges with a missing bound or lower > upper can never match and are dropped.
+        """
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        valid = ~np.isnan(lower) & ~np.isnan(upper) & (lower <= upper)
+        codes, labels = pd.factorize(pd.Series(countries, dtype=object).fillna(unknown), sort=True)
+        lower, upper, codes = lower[valid], upper[valid], codes[valid]
+        # Inclusive upper bound -> exclusive stop: the next representable double after it
+        stops = np.nextafter(upper, np.inf)
+
+        order = np.argsort(lower, kind="stable")
+        if np.all(lower[order][1:] >= stops[order][:-1]):
+            # Disjoint ranges (the usual case): sorting is all that is needed
+            segments = lower[order], stops[order], codes[order]
+        else:
+            segments = cls._resolve_overlaps(lower, stops, codes)
+        return cls(*cls._merge_adjacent(*segments), labels, unknown)
+
+    @classmethod
+    def from_frame(cls, ip_mapping, lower_col="lower_bound_ip_address", upper_col="upper_bound_ip_address",
+                   country_col="country", unknown="Unknown"):
+        """Builds the index from the IP-to-country table."""
+        return cls.from_ranges(ip_mapping[lower_col].to_numpy(), ip_mapping[upper_col].to_numpy(),
+                               ip_mapping[country_col].to_numpy(), unknown)
+
+    @staticmethod
+    def _resolve_overlaps(starts, stops, codes):
+        """
+        Sweeps the range boundaries in order and keeps, for every elementary segment, the covering
+        range with the lowest input position. Only used when the table actually has overlaps.
+        """
+        events = np.concatenate([starts, stops])
+        order = np.argsort(events, kind="stable")
+        n = len(starts)
+        active = []
+        ended = np.zeros(n, dtype=bool)
+        seg_starts, seg_stops, seg_codes = [], [], []
+        i = 0
+        while i < len(order):
+            position = events[order[i]]
+            # Apply every boundary at this position before deciding who owns the next segment
+            while i < len(order) and events[order[i]] == position:
+                row = order[i]
+                if row < n:
+                    heapq.heappush(active, row)
+                else:
+                    ended[row - n] = True
+                i += 1
+            while active and ended[active[0]]:
+                heapq.heappop(active)
+            if active and i < len(order):
+                seg_starts.append(position)
+                seg_stops.append(events[order[i]])
+                seg_codes.append(codes[active[0]])
+        return np.array(seg_starts), np.array(seg_stops), np.array(seg_codes, dtype=np.int32)
+
+    @staticmethod
+    def _merge_adjacent(starts, stops, codes):
+        """Joins touching segments that map to the same label."""
+        if len(starts) < 2:
+            return starts, stops, codes
+        joins = (starts[1:] == stops[:-1]) & (codes[1:] == codes[:-1])
+        keep_start = np.concatenate([[True], ~joins])
+        keep_stop = np.concatenate([~joins, [True]])
+        return starts[keep_start], stops[keep_stop], codes[keep_start]
+
+    def lookup_codes(self, ips):
+        """
+        Label index for every address in `ips` (-1 when no range contains it), using one binary search
+        per address over the sorted segment starts.
+        """
+        ips = np.asarray(ips, dtype=np.float64)
+        if not len(self):
+            return np.full(ips.shape, -1, dtype=np.int32)
+        segment = np.searchsorted(self.starts, ips, side="right") - 1
+        clipped = np.maximum(segment, 0)
+        # NaN addresses fail the comparison and fall through to -1
+        hit = (segment >= 0) & (ips < self.stops[clipped])
+        return np.where(hit, self.codes[clipped], -1)
+
+    def lookup(self, ips):
+        """Country for every address in `ips` (integers or floats), `unknown` for misses."""
+        return self._lookup_labels.take(self.lookup_codes(ips))
+
+    def save(self, path):
+        """Saves the index as an .npz file."""
+        np.savez(path, starts=self.starts, stops=self.stops, codes=self.codes,
+                 labels=self.labels.astype(str), unknown=np.array(self.unknown))
+        logging.info(f"✅ IP range index with {len(self)} segments saved to {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["starts"], data["stops"], data["codes"], data["labels"].astype(object),
+                       str(data["unknown"]))
+
+
+if __name__ == "__main__":
+    IP_MAPPING_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/mappings/ip_address_to_country.csv"
+    INDEX_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/mappings/ip_range_index.npz"
+
+    index = IPRangeIndex.from_frame(pd.read_csv(IP_MAPPING_PATH))
+    index.save(INDEX_PATH)
@@ -0,0 +1,147 @@
+import logging
+import sys
+import numpy as np
+import pandas as pd
+from ip_utils import parse_ipv4
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Column types:
+#   "category"  repeated strings, stored once plus small integer codes
+#   "datetime"  datetime64[ns]; unparseable values become NaT
+#   "int"/"uint" smallest (unsigned) integer type that holds the column; left as float64 if values are missing
+#   "float32"   single precision floats
+#   "ipv4"      uint32 addresses (dotted quads or numbers, fractional part dropped); float64 if any are invalid
+FRAUD_DATA_SCHEMA = {
+    "user_id": "uint",
+    "signup_time": "datetime",
+    "purchase_time": "datetime",
+    "purchase_value": "uint",
+    "device_id": "category",
+    "source": "category",
+    "browser": "category",
+    "sex": "category",
+    "age": "uint",
+    "ip_address": "ipv4",
+    "class": "uint",
+    "ip_country": "category",
+}
+
+IP_COUNTRY_SCHEMA = {
+    "lower_bound_ip_address": "ipv4",
+    "upper_bound_ip_address": "ipv4",
+    "country": "category",
+}
+
+CREDITCARD_SCHEMA = {
+    "Time": "float32",
+    **{f"V{i}": "float32" for i in range(1, 29)},
+    "Amount": "float32",
+    "Class": "uint",
+}
+
+SCHEMAS = {
+    "Fraud_Data": FRAUD_DATA_SCHEMA,
+    "IpAddress_to_Country": IP_COUNTRY_SCHEMA,
+    "creditcard": CREDITCARD_SCHEMA,
+}
+
+
+def apply_schema(df, schema):
+    """
+    Converts the columns of df that appear in schema, in place.
+    :param df: DataFrame with default read_csv dtypes (or already converted columns).
+    :param schema: Dict of column -> column type, e.g. FRAUD_DATA_SCHEMA.
+    :return: df
+    """
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if kind == "category":
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[col] = values.astype("category")
+        elif kind == "datetime":
+            df[col] = pd.to_datetime(values, errors="coerce").astype("datetime64[ns]")
+        elif kind in ("int", "uint"):
+            if pd.api.types.is_numeric_dtype(values) and not values.isna().any():
+                df[col] = pd.to_numeric(values, downcast="integer" if kind == "int" else "unsigned")
+        elif kind == "float32":
+            if pd.api.types.is_numeric_dtype(values):
+                df[col] = values.astype(np.float32)
+        elif kind == "ipv4":
+            ips, valid = parse_ipv4(values)
+            df[col] = ips if valid.all() else np.where(valid, ips, np.nan)
+        else:
+            raise ValueError(f"Unknown column type '{kind}' for column '{col}'.")
+    return df
+
+
+def default_dtype_memory(df, schema):
+    """
+    Bytes each column would take with read_csv's default dtypes: 8 per number and, for text read as object,
+    an 8-byte pointer plus the string object per row.
+    """
+    memory = {}
+    for col in df.columns:
+        values = df[col]
+        kind = schema.get(col)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            sizes = np.array([sys.getsizeof(value) for value in values.cat.categories], dtype=np.int64)
+            codes = values.cat.codes.to_numpy()
+            memory[col] = 8 * len(values) + int(sizes[codes[codes >= 0]].sum())
+        elif kind == "datetime":
+            text = values.dropna().iloc[:1].astype(str)
+            memory[col] = len(values) * (8 + (sys.getsizeof(text.iloc[0]) if len(text) else 0))
+        elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            memory[col] = 8 * len(values)
+        else:
+            memory[col] = int(values.memory_usage(index=False, deep=True))
+    return pd.Series(memory, dtype=np.int64)
+
+
+def memory_report(before, after):
+    """Per-column bytes before and after, with their ratio and a total row."""
+    report = pd.DataFrame({"before": before, "after": after})
+    report.loc["total"] = report.sum()
+    report["ratio"] = (report["before"] / report["after"]).round(2)
+    return report
+
+
+def log_memory_report(report, name):
+    """Logs the total and the columns that changed."""
+    changed = report.drop(index="total")
+    changed = changed[changed["before"] != changed["after"]]
+    for col, row in changed.iterrows():
+        logging.info(f"   {col:<24} {row['before'] / 2**20:9.2f} MB -> {row['after'] / 2**20:9.2f} MB")
+    total = report.loc["total"]
+    logging.info(f"🗜️ {name}: {total['before'] / 2**20:.2f} MB -> {total['after'] / 2**20:.2f} MB "
+                 f"({total['ratio']:.1f}x smaller)")
+
+
+def load_csv(path, schema=None, report=True, **kwargs):
+    """
+    Reads a CSV with compact dtypes.
+    Categorical columns are parsed straight into categories, so the object strings never exist for the whole
+    file; the other declared columns are converted right after reading.
+    :param path: CSV file.
+    :param schema: Schema dict, a name from SCHEMAS, or None for read_csv's default dtypes.
+    :param report: Log memory with default dtypes against memory after the schema.
+    :param kwargs: Passed on to pd.read_csv.
+    :return: DataFrame.
+    """
+    name = None
+    if isinstance(schema, str):
+        name, schema = schema, SCHEMAS[schema]
+    if not schema:
+        return pd.read_csv(path, **kwargs)
+    header = pd.read_csv(path, nrows=0).columns
+
+    dtype = {col: "category" for col, kind in schema.items() if kind == "category" and col in header}
+    dtype.update(kwargs.pop("dtype", None) or {})
+    df = apply_schema(pd.read_csv(path, dtype=dtype, **kwargs), schema)
+    if report:
+        log_memory_report(memory_report(default_dtype_memory(df, schema), df.memory_usage(index=False, deep=True)),
+                          name or str(path))
+    return df
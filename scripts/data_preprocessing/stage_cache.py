@@ -0,0 +1,193 @@
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import textwrap
+import time
+from pathlib import Path
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df):
+    """SHA-256 of an in-memory DataFrame's columns and values."""
+    digest = hashlib.sha256(json.dumps([str(column) for column in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def imported_modules(tree):
+    """Names bound by the import statements of a syntax tree, mapped to the absolute modules they come from."""
+    imports = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports[alias.asname or alias.name.split(".")[0]] = alias.name
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                imports[alias.asname or alias.name] = node.module
+    return imports
+
+
+def module_file(name):
+    """Source file of a module found on sys.path (without importing it), or None."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return Path(spec.origin).resolve() if spec is not None and spec.has_location else None
+
+
+def dependency_files(objects, root):
+    """
+    Source files under `root` the objects can run: every module a module imports, the modules of the names a
+    function or class uses, and transitively everything those modules import (including imports inside
+    functions).
+    """
+    root = Path(root).resolve()
+    pending = []
+    for obj in objects:
+        if inspect.ismodule(obj):
+            pending.extend(imported_modules(ast.parse(inspect.getsource(obj))).values())
+        else:
+            imports = imported_modules(ast.parse(inspect.getsource(inspect.getmodule(obj))))
+            used = {node.id for node in ast.walk(ast.parse(textwrap.dedent(inspect.getsource(obj))))
+                    if isinstance(node, ast.Name)}
+            pending.extend(imports[name] for name in used if name in imports)
+    files = set()
+    while pending:
+        path = module_file(pending.pop())
+        if path is None or path in files or root not in path.parents:
+            continue
+        files.add(path)
+        pending.extend(imported_modules(ast.parse(path.read_text())).values())
+    return sorted(files)
+
+
+def source_fingerprint(*objects, root=None):
+    """
+    SHA-256 of the source code of modules, classes or functions; changes whenever the code does.
+    :param root: Also hash every module under this directory the objects depend on (see dependency_files), so
+                 a change to a helper module they import changes the fingerprint too.
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    for path in dependency_files(objects, root) if root is not None else []:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def stage_key(previous_key, stage, params, code_version, input_fingerprints=()):
+    """
+    Fingerprint of one stage's output: the key of the stage that produced its input, the stage's
+    parameters, the version of the code it runs and the hashes of any extra files it reads.
+    Chaining the keys means a change anywhere invalidates that stage and everything after it.
+    """
+    payload = json.dumps({
+        "previous": previous_key,
+        "stage": stage,
+        "params": params,
+        "code": code_version,
+        "inputs": list(input_fingerprints),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024**3):
+        """
+        Content-addressed store for stage outputs (pickled DataFrames keyed by stage_key).
+        Reading an entry marks it as recently used; when the store grows past `max_bytes` the least
+        recently used entries are deleted.
+        :param cache_dir: Directory holding the entries.
+        :param max_bytes: Size limit for all entries together.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    def _paths(self, key):
+        folder = self.cache_dir / key[:2]
+        return folder / f"{key}.pkl", folder / f"{key}.json"
+
+    def info(self, key):
+        """Metadata of a cached entry (stage, compute seconds, size), or None when it is not cached."""
+        data_path, meta_path = self._paths(key)
+        if not (data_path.is_file() and meta_path.is_file()):
+            return None
+        with open(meta_path) as file:
+            return json.load(file)
+
+    def get(self, key):
+        """Loads a cached DataFrame, or returns None on a miss."""
+        info = self.info(key)
+        if info is None:
+            self.misses += 1
+            return None
+        data_path, meta_path = self._paths(key)
+        df = pd.read_pickle(data_path)
+        os.utime(meta_path)
+        self.hits += 1
+        return df
+
+    def put(self, key, df, stage, seconds):
+        """Stores a stage output with the time it took to compute, then enforces the size limit."""
+        data_path, meta_path = self._paths(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = data_path.with_name(data_path.name + ".tmp")
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+        meta = {"stage": stage, "seconds": seconds, "rows": len(df), "columns": df.shape[1],
+                "bytes": data_path.stat().st_size, "created": time.time()}
+        with open(meta_path, "w") as file:
+            json.dump(meta, file)
+        self.evict()
+
+    def entries(self):
+        """(last used, bytes, key) for every complete entry."""
+        result = []
+        for meta_path in self.cache_dir.glob("*/*.json"):
+            data_path = meta_path.with_suffix(".pkl")
+            if data_path.is_file():
+                result.append((meta_path.stat().st_mtime, data_path.stat().st_size, meta_path.stem))
+        return result
+
+    def evict(self):
+        """Deletes least recently used entries until the store fits in max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+            total -= size
+            logging.info(f"🧹 Evicted cached stage output {key[:12]} ({size / 2**20:.1f} MB)")
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "entries": len(self.entries()),
+            "bytes": sum(size for _, size, _ in self.entries()),
+        }
@@ -0,0 +1,243 @@
+import math
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def iter_csv_chunks(path, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """Streams a CSV as DataFrames of at most `chunksize` rows."""
+    with pd.read_csv(path, chunksize=chunksize, **kwargs) as reader:
+        yield from reader
+
+
+def append_csv(df, path, first):
+    """Writes the first chunk with a header and appends the rest."""
+    df.to_csv(path, index=False, mode="w" if first else "a", header=first)
+
+
+class RunningMoments:
+    def __init__(self):
+        """Exact count, mean and variance of a stream, merged chunk by chunk (Chan et al.)."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def merge(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, values):
+        """Adds a chunk of values; NaN is ignored like pandas does."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = values.mean()
+            self.merge(len(values), mean, float(((values - mean) ** 2).sum()))
+
+    def add_constant(self, value, count):
+        """Adds `count` copies of one value, e.g. the fill value of the missing entries."""
+        self.merge(count, float(value), 0.0)
+
+    def std(self, ddof=1):
+        return math.sqrt(self.m2 / (self.count - ddof)) if self.count > ddof else float("nan")
+
+
+class StreamingQuantile:
+    def __init__(self, max_distinct=100_000, relative_error=0.001):
+        """
+        Quantiles of a numeric stream in bounded memory.
+        Values are counted exactly while the column has at most `max_distinct` distinct values, which covers
+        ages, prices and other discrete columns. Past that the counts are folded into logarithmic buckets
+        (a DDSketch), so any quantile is returned within `relative_error` of its true value while the number of
+        buckets only depends on the range of the data, not on the number of rows.
+        :param max_distinct: Distinct values kept exactly before switching to the sketch.
+        :param relative_error: Accuracy of the sketch.
+        """
+        self.max_distinct = max_distinct
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.counts = pd.Series(dtype=np.float64)
+        self.exact = True
+        self.zeros = 0
+        self.count = 0
+
+    def _bucket_counts(self, values, weights):
+        """Sketch buckets of non-zero values; negative values get negative keys."""
+        keys = np.ceil(np.log(np.abs(values)) / np.log(self.gamma)).astype(np.int64)
+        # Keys are shifted away from zero so the sign also survives for bucket 0, |x| in (1/gamma, 1]
+        keys = np.where(values > 0, keys + 1_000_000, -(keys + 1_000_000))
+        return pd.Series(weights, index=keys).groupby(level=0).sum()
+
+    def update(self, values):
+        """Adds a chunk of values; NaN is ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        if self.exact:
+            self.counts = self.counts.add(pd.Series(values).value_counts(), fill_value=0)
+            if len(self.counts) > self.max_distinct:
+                known = self.counts.index.to_numpy(dtype=np.float64)
+                self.zeros = int(self.counts[known == 0].sum())
+                self.counts = self._bucket_counts(known[known != 0], self.counts.to_numpy()[known != 0])
+                self.exact = False
+        else:
+            self.zeros += int((values == 0).sum())
+            nonzero = values[values != 0]
+            self.counts = self.counts.add(self._bucket_counts(nonzero, np.ones(len(nonzero))), fill_value=0)
+
+    def _sorted_values(self):
+        """(sorted representative values, their counts)."""
+        if self.exact:
+            counts = self.counts.sort_index()
+            return counts.index.to_numpy(dtype=np.float64), counts.to_numpy()
+        keys = self.counts.index.to_numpy()
+        magnitude = 2 * self.gamma ** (np.abs(keys) - 1_000_000) / (self.gamma + 1)
+        values = np.append(np.sign(keys) * magnitude, 0.0)
+        counts = np.append(self.counts.to_numpy(), self.zeros)
+        order = np.argsort(values)
+        return values[order], counts[order]
+
+    def quantile(self, q):
+        """The q-th quantile, interpolated between ranks like np.quantile when exact."""
+        if self.count == 0:
+            return float("nan")
+        values, counts = self._sorted_values()
+        cumulative = np.cumsum(counts)
+        position = q * (self.count - 1)
+        lower, upper = values[np.searchsorted(cumulative, [math.floor(position), math.ceil(position)], side="right")]
+        if not self.exact:
+            return float(lower)
+        return float(lower + (upper - lower) * (position - math.floor(position)))
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+class StreamingMode:
+    def __init__(self, capacity=10_000):
+        """
+        Most frequent value of a stream (Misra-Gries). Counts are exact while there are at most `capacity`
+        distinct values; beyond that every count may be low by at most rows / (capacity + 1), so the mode is
+        still exact unless the top values are within that margin of each other.
+        :param capacity: Number of counters kept.
+        """
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.max_error = 0
+
+    def update(self, values):
+        """Adds a chunk of values; missing values are ignored like Series.mode does."""
+        chunk_counts = pd.Series(values).value_counts(dropna=True)
+        self.counts = self.counts.add(chunk_counts, fill_value=0).astype(np.int64)
+        if len(self.counts) > self.capacity:
+            cut = int(self.counts.nlargest(self.capacity + 1).iloc[-1])
+            self.counts = self.counts[self.counts > cut] - cut
+            self.max_error += cut
+
+    def mode(self):
+        """The most frequent value; ties go to the smallest value, as with Series.mode()[0]."""
+        if self.counts.empty:
+            return None
+        top = self.counts[self.counts == self.counts.max()].index
+        return top.sort_values()[0]
+
+
+class SeenKeys:
+    def __init__(self):
+        """
+        Set of 64-bit row hashes for duplicate detection across chunks. Hashes are kept in a few sorted
+        runs that are merged as they grow (8 bytes per distinct key), so a file never has to fit in memory.
+        """
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def add(self, hashes):
+        """
+        Records a chunk of hashes.
+        :return: Boolean mask, True for the first occurrence of each key in the whole stream.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        first = ~pd.Index(hashes).duplicated()
+        for run in self.runs:
+            position = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            first &= run[position] != hashes
+        if first.any():
+            self.runs.append(np.sort(hashes[first]))
+        # Merge while the newest run is not much smaller than the one before: O(log n) runs
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            newest = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], newest]))
+        return first
+
+
+def row_hashes(df, columns=None):
+    """64-bit hash of each row (optionally of a subset of columns); equal rows hash equally."""
+    return pd.util.hash_pandas_object(df if columns is None else df[columns], index=False).to_numpy()
+
+
+class StreamingInterpolator:
+    def __init__(self, columns):
+        """
+        Linear interpolation of missing values across chunk boundaries, matching
+        Series.interpolate(method="linear"): gaps are filled between their neighbours, trailing gaps repeat the
+        last value and leading gaps stay missing. Rows after the last known value of any column are held back
+        until the next chunk supplies the right-hand neighbour, so memory grows only with the longest gap.
+        :param columns: Columns to interpolate.
+        """
+        self.columns = columns
+        self.held = None
+        # Last emitted known value of each column and its distance to the first held row
+        self.anchors = {}
+
+    def feed(self, chunk, final=False):
+        """
+        :param chunk: Next rows of the stream.
+        :param final: True for the last chunk; everything still held is flushed.
+        :return: Rows whose values are final.
+        """
+        buffer = chunk if self.held is None else pd.concat([self.held, chunk])
+        n = len(buffer)
+        positions = np.arange(n)
+        release = n
+        filled = {}
+        for col in self.columns:
+            x = buffer[col].to_numpy(dtype=np.float64, copy=True)
+            known = np.flatnonzero(~np.isnan(x))
+            known_positions, known_values = known.astype(np.float64), x[known]
+            if col in self.anchors:
+                value, distance = self.anchors[col]
+                known_positions = np.insert(known_positions, 0, -distance)
+                known_values = np.insert(known_values, 0, value)
+            if len(known_positions):
+                last = known_positions[-1]
+                gap = np.isnan(x) & (positions > known_positions[0])
+                if not final:
+                    gap &= positions < last
+                    release = min(release, max(int(last) + 1, 0))
+                x[gap] = np.interp(positions[gap], known_positions, known_values)
+            filled[col] = x
+
+        buffer = buffer.copy()
+        for col in self.columns:
+            # Columns without gaps keep their dtype
+            if buffer[col].isna().any():
+                buffer[col] = filled[col]
+            x = filled[col][:release]
+            known = np.flatnonzero(~np.isnan(x))
+            if len(known):
+                self.anchors[col] = (x[known[-1]], release - known[-1])
+            elif col in self.anchors:
+                value, distance = self.anchors[col]
+                self.anchors[col] = (value, distance + release)
+        self.held = buffer.iloc[release:] if release < n else None
+        return buffer.iloc[:release]
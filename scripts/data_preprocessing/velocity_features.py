@@ -0,0 +1,223 @@
+import logging
+import re
+import numpy as np
+import pandas as pd
+from frame_io import read_frame, write_frame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Window name -> length in seconds
+DEFAULT_WINDOWS = {"1h": 3600, "24h": 86400, "7d": 7 * 86400}
+DEFAULT_KEYS = ("device_id", "ip_address", "user_id")
+# Keys for which the number of distinct users in the window is also computed
+DISTINCT_USER_KEYS = ("device_id", "ip_address")
+# Column names velocity_features produces, whatever the keys and windows
+VELOCITY_FEATURE = re.compile(r"^\w+?_(txn_\w+|users_\w+|secs_since_prev)$")
+
+
+def to_seconds(times):
+    """Whole seconds since the epoch as int64, from datetimes, datetime strings or numbers of seconds."""
+    values = times.to_numpy() if isinstance(times, pd.Series) else np.asarray(times)
+    if values.dtype.kind in "iuf":
+        if np.isnan(values.astype(np.float64)).any():
+            raise ValueError("Times contain missing values.")
+        return np.floor(values).astype(np.int64)
+    parsed = pd.to_datetime(pd.Series(values), errors="coerce")
+    if parsed.isna().any():
+        raise ValueError("Times contain missing or unparseable values.")
+    return parsed.to_numpy(dtype="datetime64[s]").view(np.int64)
+
+
+class KeyedTimeline:
+    def __init__(self, keys, times):
+        """
+        Rows sorted once by (key, time) so every window feature of one key is a vectorized lookup.
+
+        Rows with the same key and time keep their input order, and a row only sees the rows before it in
+        that order. This is what an online store fed the transactions one by one would see.
+        Each row is placed at key_code * span + time: the composite is sorted by key and then time,
+        and one binary search over it finds the start of a window without ever crossing into another key.
+        :param keys: Key per row (device, IP, user...). Missing keys form a group of their own.
+        :param times: Transaction time per row (see to_seconds).
+        """
+        codes = pd.factorize(pd.Series(keys), use_na_sentinel=False)[0].astype(np.int64)
+        seconds = to_seconds(times)
+        self.n = len(codes)
+        self.origin = int(seconds.min()) if self.n else 0
+        elapsed = seconds - self.origin
+        # Any window at least as long as the data covers the whole group; clamping windows to that keeps
+        # `composite - window` above the previous key's range
+        self.max_window = int(elapsed.max()) + 1 if self.n else 1
+        self.span = 2 * self.max_window
+        n_codes = int(codes.max()) + 1 if self.n else 0
+        if n_codes * self.span >= 2**62:
+            raise ValueError(f"{n_codes} keys over {self.max_window} seconds do not fit the int64 sort key.")
+        composite = codes * self.span + elapsed
+        self.order = np.argsort(composite, kind="stable")
+        self.composite = composite[self.order]
+        self.codes = codes[self.order]
+        self.seconds = elapsed[self.order]
+        self.position = np.arange(self.n)
+        self.is_first = np.ones(self.n, dtype=bool)
+        self.is_first[1:] = self.codes[1:] != self.codes[:-1]
+
+    def _window(self, window):
+        return self.max_window if window is None else min(int(window), self.max_window)
+
+    def unsort(self, values):
+        """Values computed in sorted order, back in input row order."""
+        out = np.empty_like(values)
+        out[self.order] = values
+        return out
+
+    def counts(self, window=None):
+        """Transactions of the row's key in (t - window, t], the row included (window None: all so far)."""
+        lo = np.searchsorted(self.composite, self.composite - self._window(window), side="right")
+        return self.unsort((self.position - lo + 1).astype(np.int32))
+
+    def next_occurrence(self, values):
+        """Sorted position of the next row with the same key and value (n when there is none)."""
+        value_codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+        # Rows of one (key, value) pair end up next to each other, still in row order
+        pairs = np.argsort(self.codes * len(uniques) + value_codes[self.order], kind="stable")
+        pair_codes = value_codes[self.order][pairs]
+        repeated = (self.codes[pairs[1:]] == self.codes[pairs[:-1]]) & (pair_codes[1:] == pair_codes[:-1])
+        following = np.full(self.n, self.n, dtype=np.int64)
+        following[pairs[:-1][repeated]] = pairs[1:][repeated]
+        return following
+
+    def distinct(self, values, window=None, next_occurrence=None):
+        """
+        Distinct `values` (e.g. users) among the key's transactions in (t - window, t], the row included.
+
+        A transaction j is the latest of its (key, value) pair for the rows up to its next occurrence, and it
+        is inside their window for the rows before the first one at t_j + window or later. So it adds 1 to a
+        contiguous run of sorted rows, and a difference array plus one cumsum counts everything.
+        :param next_occurrence: `next_occurrence(values)`, to share it between several windows.
+        """
+        if next_occurrence is None:
+            next_occurrence = self.next_occurrence(values)
+        window_end = np.searchsorted(self.composite, self.composite + self._window(window), side="left")
+        end = np.minimum(next_occurrence, window_end)
+        added = 1 - np.bincount(end, minlength=self.n + 1)[:self.n]
+        return self.unsort(np.cumsum(added, dtype=np.int32))
+
+    def since_previous(self):
+        """Seconds since the key's previous transaction; NaN for its first one."""
+        gaps = np.empty(self.n, dtype=np.float64)
+        gaps[1:] = np.diff(self.seconds)
+        gaps[self.is_first] = np.nan
+        return self.unsort(gaps)
+
+    def previous(self, values):
+        """The key's previous transaction's value of `values`, and a mask of rows that have one."""
+        values = (values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values))[self.order]
+        previous = np.empty_like(values)
+        previous[1:] = values[:-1]
+        return self.unsort(previous), self.unsort(~self.is_first)
+
+
+def velocity_feature_names(keys=DEFAULT_KEYS, windows=DEFAULT_WINDOWS, distinct_keys=DISTINCT_USER_KEYS,
+                           user_col="user_id"):
+    """Columns of velocity_features for these keys and windows, in order."""
+    names = []
+    for key in keys:
+        names.extend(f"{key}_txn_{name}" for name in windows)
+        if key in distinct_keys and key != user_col:
+            names.extend(f"{key}_users_{name}" for name in windows)
+        names.append(f"{key}_secs_since_prev")
+    return names
+
+
+def velocity_features(df, time_col="purchase_time", keys=DEFAULT_KEYS, windows=DEFAULT_WINDOWS,
+                      distinct_keys=DISTINCT_USER_KEYS, user_col="user_id"):
+    """
+    Per-key rolling transaction counts, distinct users and time since the previous transaction.
+    Each key costs one sort; every window after that is a binary search over the sorted rows.
+    :param df: Transactions.
+    :param time_col: Transaction time column.
+    :param keys: Columns to group by.
+    :param windows: Dict of window name -> seconds.
+    :param distinct_keys: Keys for which distinct `user_col` values per window are also counted.
+    :return: DataFrame with df's index and columns `<key>_txn_<window>`, `<key>_users_<window>` and
+             `<key>_secs_since_prev`.
+    """
+    features = {}
+    for key in keys:
+        timeline = KeyedTimeline(df[key], df[time_col])
+        for name, seconds in windows.items():
+            features[f"{key}_txn_{name}"] = timeline.counts(seconds)
+        if key in distinct_keys and key != user_col:
+            following = timeline.next_occurrence(df[user_col])
+            for name, seconds in windows.items():
+                features[f"{key}_users_{name}"] = timeline.distinct(None, seconds, next_occurrence=following)
+        features[f"{key}_secs_since_prev"] = timeline.since_previous()
+    # copy=False keeps one block per column instead of stacking them all into a new 2-D block
+    return pd.DataFrame(features, index=df.index, copy=False)
+
+
+def behavioral_features(df, time_col="purchase_time", user_col="user_id", device_col="device_id",
+                        country_col="ip_country"):
+    """
+    The behavioral features DatasetPreparer.get_feature_sets expects:
+    - time_since_last_purchase: seconds since the user's previous purchase (NaN for the first one).
+    - device_usage_freq: transactions from the device so far, this one included.
+    - cross_border: 1 when the device's previous transaction came from another IP country.
+      Only computed when the frame has country_col.
+    """
+    users = KeyedTimeline(df[user_col], df[time_col])
+    devices = KeyedTimeline(df[device_col], df[time_col])
+    features = {"time_since_last_purchase": users.since_previous(), "device_usage_freq": devices.counts()}
+    if country_col in df.columns:
+        countries = df[country_col].astype(object).to_numpy()
+        previous, has_previous = devices.previous(countries)
+        features["cross_border"] = (has_previous & (previous != countries)).astype(np.int8)
+    return pd.DataFrame(features, index=df.index)
+
+
+class VelocityFeatureEngineer:
+    def __init__(self, fraud_path: str, output_path: str, windows: dict = None, keys=DEFAULT_KEYS):
+        self.fraud_path = fraud_path
+        self.output_path = output_path
+        self.windows = windows or DEFAULT_WINDOWS
+        self.keys = keys
+        self.df = None
+
+    def load_data(self):
+        """Load fraud dataset and validate required columns."""
+        self.df = read_frame(self.fraud_path)
+        required_cols = {'purchase_time', 'user_id', *self.keys}
+        if not required_cols.issubset(self.df.columns):
+            missing = required_cols - set(self.df.columns)
+            raise ValueError(f"Missing columns in fraud data: {missing}")
+
+    def engineer_velocity_features(self):
+        """Add velocity and behavioral features to the frame."""
+        velocity = velocity_features(self.df, keys=self.keys, windows=self.windows)
+        behavioral = behavioral_features(self.df)
+        self.df = pd.concat([self.df, velocity, behavioral], axis=1)
+        logging.info(f"✅ Added {velocity.shape[1] + behavioral.shape[1]} velocity features for {len(self.df)} rows")
+        return self.df
+
+    def save_processed_data(self):
+        """Save processed data as CSV, Parquet or Feather, chosen by the file extension."""
+        write_frame(self.df, self.output_path)
+        print(f"Data saved successfully to {self.output_path}")
+
+    def run_pipeline(self):
+        print("Loading data...")
+        self.load_data()
+        print("Engineering velocity features...")
+        self.engineer_velocity_features()
+        print("Saving results...")
+        self.save_processed_data()
+        print("Velocity feature engineering complete!")
+
+
+if __name__ == "__main__":
+    FRAUD_DATA_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/cleaned/Fraud_And_Ip_merged.csv"
+    OUTPUT_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/featured/velocity_features.parquet"
+
+    engineer = VelocityFeatureEngineer(FRAUD_DATA_PATH, OUTPUT_PATH)
+    engineer.run_pipeline()
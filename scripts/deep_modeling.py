@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
 import mlflow
@@ -13,6 +14,10 @@ from tensorflow.keras.optimizers import Adam
 from sklearn.metrics import classification_report
 from pathlib import Path
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_preprocessing"))
+from schemas import CREDITCARD_SCHEMA
+from frame_io import read_frame
+
 # Force TensorFlow to use CPU (to avoid CUDA errors)
 os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 
@@ -28,8 +33,8 @@ class FraudDeepModelTrainer:
     
     def load_data(self):
         """Load and preprocess fraud and credit card datasets."""
-        self.fraud_df = pd.read_csv(self.fraud_data_path)
-        self.credit_df = pd.read_csv(self.credit_data_path)
+        self.fraud_df = read_frame(self.fraud_data_path)
+        self.credit_df = read_frame(self.credit_data_path, schema=CREDITCARD_SCHEMA)
     
     def preprocess_data(self, df: pd.DataFrame, target_col: str):
         """Separate features and target, standardize numerical data, then split into train and test sets."""
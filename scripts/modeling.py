@@ -1,3 +1,5 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import mlflow
@@ -8,6 +10,10 @@ from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import classification_report
 from pathlib import Path
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_preprocessing"))
+from schemas import CREDITCARD_SCHEMA
+from frame_io import read_frame
+
 class FraudModelTrainer:
     def __init__(self, fraud_data_path: str, credit_data_path: str, output_path: str, model_type: str = 'random_forest'):
         self.fraud_data_path = fraud_data_path
@@ -20,8 +26,8 @@ class FraudModelTrainer:
     
     def load_data(self):
         """Load and preprocess fraud and credit card datasets."""
-        self.fraud_df = pd.read_csv(self.fraud_data_path)
-        self.credit_df = pd.read_csv(self.credit_data_path)
+        self.fraud_df = read_frame(self.fraud_data_path)
+        self.credit_df = read_frame(self.credit_data_path, schema=CREDITCARD_SCHEMA)
     
     def preprocess_data(self, df: pd.DataFrame, target_col: str):
         """Separate features and target, then split into train and test sets."""
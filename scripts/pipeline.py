@@ -0,0 +1,276 @@
+import os
+import sys
+import time
+import tracemalloc
+import logging
+from pathlib import Path
+import pandas as pd
+
+PREPROCESSING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_preprocessing")
+sys.path.append(PREPROCESSING_DIR)
+from fraud_data_cleaning import FraudDataCleaner
+from feature_Engineering import FraudFeatureEngineer
+from data_merger import FraudDataProcessor
+from frame_io import read_frame, write_frame
+from schemas import IP_COUNTRY_SCHEMA
+from ip_range_index import IPRangeIndex
+from stage_cache import StageCache, file_fingerprint, frame_fingerprint, source_fingerprint, stage_key
+import fraud_data_cleaning
+import feature_Engineering
+import data_merger
+import ip_range_index
+import ip_utils
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+STAGES = ("clean", "features", "ip_country", "encode_scale", "train")
+# Code each stage runs, for the stage cache's code version, together with every data_preprocessing module these
+# and the stage method import; "train" has side effects and is never cached
+STAGE_MODULES = {
+    "clean": (fraud_data_cleaning,),
+    "features": (feature_Engineering,),
+    "ip_country": (data_merger, ip_range_index, ip_utils),
+    "encode_scale": (data_merger,),
+}
+
+
+class FraudPipeline:
+    def __init__(self, fraud_path: str, ip_mapping_path: str, model_output_path: str = None,
+                 model_type: str = 'random_forest', scaling_method: str = 'standard', outlier_threshold: float = 3,
+                 intermediate_dir: str = None, intermediate_format: str = 'parquet', track_memory: bool = True,
+                 log_to_mlflow: bool = False, cache_dir: str = None, cache_max_bytes: int = 2 * 1024**3,
+                 transform_path: str = None):
+        """
+        Runs FraudDataCleaner -> FraudFeatureEngineer -> FraudDataProcessor -> FraudModelTrainer on one
+        in-memory DataFrame. The raw CSV is parsed once; no stage writes a file the next stage re-reads.
+        :param fraud_path: Raw Fraud_Data CSV.
+        :param ip_mapping_path: IP-to-country CSV.
+        :param model_output_path: Where the trainer saves the model (None skips saving).
+        :param model_type: 'random_forest', 'logistic_regression' or 'decision_tree'.
+        :param scaling_method: 'standard' or 'minmax'.
+        :param outlier_threshold: Z-score threshold for purchase_value outlier removal.
+        :param intermediate_dir: If set, every stage's output is also written here.
+        :param intermediate_format: 'parquet', 'feather' or 'csv' for persisted intermediates.
+        :param track_memory: Record each stage's peak traced memory (tracemalloc adds some overhead).
+        :param log_to_mlflow: Log the training run to MLflow.
+        :param cache_dir: If set, stage outputs are cached here and a rerun only executes the stages whose
+                          input file, parameters or code changed, plus everything after them.
+        :param cache_max_bytes: Size limit of the stage cache; least recently used outputs are evicted.
+        :param transform_path: If set, encode_scale saves its fitted IP mapping, encoders and scaler here as a
+                               FeatureTransform for serving and batch scoring. encode_scale is then always
+                               run, since a cached output would not carry the fitted state.
+        """
+        if intermediate_format not in ('parquet', 'feather', 'csv'):
+            raise ValueError("Invalid intermediate format. Choose 'parquet', 'feather' or 'csv'.")
+        self.fraud_path = fraud_path
+        self.ip_mapping_path = ip_mapping_path
+        self.model_output_path = model_output_path
+        self.model_type = model_type
+        self.scaling_method = scaling_method
+        self.outlier_threshold = outlier_threshold
+        self.intermediate_dir = intermediate_dir
+        self.intermediate_format = intermediate_format
+        self.track_memory = track_memory
+        self.log_to_mlflow = log_to_mlflow
+        self.cache = StageCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.transform_path = transform_path
+        self.processor = None
+        self.trainer = None
+        self.report = []
+
+    def clean(self, df):
+        """FraudDataCleaner steps; datetimes are parsed here once and stay parsed downstream."""
+        cleaner = FraudDataCleaner(self.fraud_path)
+        if df is None:
+            cleaner.load_data()
+            if cleaner.data is None:
+                raise ValueError(f"Could not load fraud data from {self.fraud_path}")
+        else:
+            cleaner.data = df
+        cleaner.remove_duplicates()
+        cleaner.fix_data_types()
+        cleaner.handle_missing_values()
+        cleaner.detect_outliers(threshold=self.outlier_threshold)
+        return cleaner.data
+
+    def features(self, df):
+        """FraudFeatureEngineer time features."""
+        engineer = FraudFeatureEngineer(self.fraud_path, output_path=None)
+        engineer.df = df
+        engineer.validate_columns()
+        return engineer.engineer_time_features()
+
+    def new_processor(self):
+        return FraudDataProcessor(self.fraud_path, self.ip_mapping_path, output_path=None,
+                                  scaling_method=self.scaling_method)
+
+    def ip_country(self, df):
+        """FraudDataProcessor IP-to-country mapping."""
+        self.processor = self.new_processor()
+        self.processor.df = df
+        self.processor.ip_mapping = read_frame(self.ip_mapping_path, schema=IP_COUNTRY_SCHEMA)
+        self.processor.map_ip_to_country()
+        return self.processor.df
+
+    def encode_scale(self, df):
+        """FraudDataProcessor encoding and scaling."""
+        if self.processor is None:
+            # ip_country came from the stage cache
+            self.processor = self.new_processor()
+        self.processor.df = df
+        self.processor.encode_categorical_features()
+        self.processor.select_features()
+        self.processor.apply_scaling()
+        if self.transform_path:
+            if self.processor.ip_index is None:
+                self.processor.ip_index = IPRangeIndex.from_frame(read_frame(self.ip_mapping_path, schema=IP_COUNTRY_SCHEMA))
+            self.processor.export_transform(self.transform_path)
+        return self.processor.df_scaled
+
+    def train(self, df):
+        """FraudModelTrainer on the processed frame (mlflow is only imported when this stage runs)."""
+        from modeling import FraudModelTrainer
+
+        self.trainer = FraudModelTrainer(self.fraud_path, credit_data_path=None,
+                                         output_path=self.model_output_path, model_type=self.model_type)
+        self.trainer.fraud_df = df
+        X_train, X_test, y_train, y_test = self.trainer.preprocess_data(df, 'class')
+        self.trainer.select_model()
+        report = self.trainer.train_and_evaluate(X_train, X_test, y_train, y_test)
+        if self.log_to_mlflow:
+            self.trainer.log_experiment(report)
+        if self.model_output_path:
+            self.trainer.save_model()
+        return df
+
+    def persist(self, index, name, df):
+        """Writes one stage's output to intermediate_dir."""
+        path = Path(self.intermediate_dir) / f"{index:02d}_{name}.{self.intermediate_format}"
+        return write_frame(df, path)
+
+    def stage_params(self, name):
+        """Parameters and extra input files that change a stage's output."""
+        if name == "clean":
+            return {"outlier_threshold": self.outlier_threshold}, ()
+        if name == "ip_country":
+            return {}, (file_fingerprint(self.ip_mapping_path),)
+        if name == "encode_scale":
+            return {"scaling_method": self.scaling_method}, ()
+        return {}, ()
+
+    def stage_keys(self, df, stages):
+        """
+        Chained cache keys for the leading cacheable stages: the first is seeded with the hash of the raw
+        input, each later one with the key before it.
+        """
+        keys = []
+        previous = file_fingerprint(self.fraud_path) if df is None else frame_fingerprint(df)
+        for name in stages:
+            if name not in STAGE_MODULES or (name == "encode_scale" and self.transform_path):
+                break
+            params, inputs = self.stage_params(name)
+            code = source_fingerprint(getattr(FraudPipeline, name), *STAGE_MODULES[name], root=PREPROCESSING_DIR)
+            previous = stage_key(previous, name, params, code, inputs)
+            keys.append(previous)
+        return keys
+
+    def restore(self, stages, keys, df):
+        """
+        Loads the output of the last stage that is still cached.
+        :return: (DataFrame to continue from, number of stages skipped).
+        """
+        for index in reversed(range(len(keys))):
+            if self.cache.info(keys[index]) is None:
+                continue
+            start = time.perf_counter()
+            cached = self.cache.get(keys[index])
+            load_seconds = time.perf_counter() - start
+            for name, key in zip(stages[:index + 1], keys):
+                # An earlier entry may have been evicted; its output is not needed, only its timing
+                info = self.cache.info(key) or {}
+                saved = info.get("seconds", 0.0)
+                self.report.append({"stage": name, "seconds": 0.0, "rows": info.get("rows"),
+                                    "columns": info.get("columns"), "cached": True, "saved_seconds": round(saved, 3)})
+            self.report[-1].update(seconds=round(load_seconds, 3), rows=len(cached), columns=cached.shape[1])
+            # Every stage up to this one is a hit, even though only the last output had to be read
+            self.cache.hits += index
+            self.cache.seconds_saved += sum(entry["saved_seconds"] for entry in self.report) - load_seconds
+            logging.info(f"♻️ Reusing cached output of stages {list(stages[:index + 1])}")
+            return cached, index + 1
+        return df, 0
+
+    def run(self, df: pd.DataFrame = None, stages=STAGES):
+        """
+        Runs the selected stages in order, passing the DataFrame between them in memory.
+        :param df: Raw fraud data already in memory (default: read fraud_path), or the output of the stage
+                   before the first selected one.
+        :param stages: Stage names to run, in pipeline order (e.g. every stage but "train"). Without df they
+                       must start with "clean".
+        :return: The last stage's DataFrame.
+        """
+        unknown = [name for name in stages if name not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown stages {unknown}; choose from {list(STAGES)}.")
+        stages = tuple(stages)
+        if df is None and stages and stages[0] != "clean":
+            raise ValueError(f"Stage '{stages[0]}' needs the output of the stages before it; pass it as df "
+                             f"or start the stages with 'clean'.")
+        self.report = []
+        keys, skipped = [], 0
+        if self.cache:
+            keys = self.stage_keys(df, stages)
+            df, skipped = self.restore(stages, keys, df)
+            self.cache.misses += len(keys) - skipped
+        if self.track_memory:
+            tracemalloc.start()
+        try:
+            for index, name in enumerate(stages):
+                if index < skipped:
+                    continue
+                logging.info(f"▶️ Running stage '{name}'...")
+                if self.track_memory:
+                    tracemalloc.reset_peak()
+                start = time.perf_counter()
+                df = getattr(self, name)(df)
+                seconds = time.perf_counter() - start
+                entry = {"stage": name, "seconds": round(seconds, 3), "rows": len(df), "columns": df.shape[1]}
+                if self.track_memory:
+                    entry["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                if self.intermediate_dir:
+                    entry["output"] = str(self.persist(index, name, df))
+                if index < len(keys):
+                    self.cache.put(keys[index], df, name, seconds)
+                self.report.append(entry)
+        finally:
+            if self.track_memory:
+                tracemalloc.stop()
+        self.print_report()
+        return df
+
+    def print_report(self):
+        """Logs per-stage wall time and peak memory."""
+        for entry in self.report:
+            memory = f"  peak {entry['peak_mb']:8.1f} MB" if "peak_mb" in entry else ""
+            cached = f"  cached, saved {entry['saved_seconds']:.3f} s" if entry.get("cached") else ""
+            logging.info(f"⏱️ {entry['stage']:<13} {entry['seconds']:8.3f} s{memory}{cached}  "
+                         f"-> {entry['rows']} rows x {entry['columns']} columns")
+        logging.info(f"✅ Pipeline finished in {sum(entry['seconds'] for entry in self.report):.3f} s")
+        if self.cache:
+            stats = self.cache.stats()
+            logging.info(f"♻️ Stage cache: {stats['hits']} hits, {stats['misses']} misses, "
+                         f"{stats['seconds_saved']:.3f} s saved, {stats['bytes'] / 2**20:.1f} MB in {stats['entries']} entries")
+
+
+if __name__ == "__main__":
+    FRAUD_DATA_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/missingHandled/Fraud_Data.csv"
+    IP_MAPPING_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/cleaned/cleaned_IpAddress_to_Country.csv"
+    MODEL_OUTPUT_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/random_forest_fraud_model"
+    INTERMEDIATE_DIR = None  # e.g. ".../Data/pipeline" to keep every stage's output
+    CACHE_DIR = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Data/.stage_cache"
+    TRANSFORM_PATH = "/home/nahomnadew/Desktop/10x/week8/Adey_Inoviation_Inc/Models/feature_transform.npz"
+
+    pipeline = FraudPipeline(FRAUD_DATA_PATH, IP_MAPPING_PATH, MODEL_OUTPUT_PATH,
+                             model_type='random_forest', intermediate_dir=INTERMEDIATE_DIR, cache_dir=CACHE_DIR,
+                             transform_path=TRANSFORM_PATH)
+    pipeline.run()
@@ -0,0 +1,180 @@
+import unittest
+import io
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+from streaming import RunningMoments, SeenKeys, StreamingInterpolator, StreamingMode, StreamingQuantile
+from fraud_data_cleaning import FraudDataCleaner
+from Ip_data_cleaning import IPAddressDataCleaner
+from handle_missing_val import DataPreprocessor
+from data_cleaning import DataCleaner
+from schemas import FRAUD_DATA_SCHEMA
+from test_pipeline import make_raw_fraud_data
+
+
+def round_trip(df):
+    """What a DataFrame looks like after being written to and read back from CSV."""
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+class TestStreamingEstimators(unittest.TestCase):
+    def test_moments_and_quantiles(self):
+        """Test chunked mean, std and quantiles against NumPy, exact and sketched."""
+        rng = np.random.default_rng(0)
+        discrete = rng.integers(18, 80, 10001).astype(float)
+        continuous = rng.lognormal(3, 2, 50000)
+        moments, exact, sketch = RunningMoments(), StreamingQuantile(), StreamingQuantile(max_distinct=1000)
+        for start in range(0, 50000, 999):
+            moments.update(continuous[start:start + 999])
+            exact.update(discrete[start:start + 999])
+            sketch.update(continuous[start:start + 999])
+
+        self.assertAlmostEqual(moments.mean, continuous.mean(), places=6)
+        self.assertAlmostEqual(moments.std() / continuous.std(ddof=1), 1.0, places=9)
+        self.assertTrue(exact.exact)
+        self.assertEqual(exact.median(), np.median(discrete))
+        self.assertEqual(exact.quantile(0.9), np.quantile(discrete, 0.9))
+        self.assertFalse(sketch.exact)
+        ranked = np.sort(continuous)
+        for q in (0.01, 0.5, 0.99):
+            true_value = ranked[int(q * (len(ranked) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) / true_value - 1), sketch.relative_error + 1e-9)
+
+    def test_mode_and_seen_keys(self):
+        """Test the bounded mode finds a clear winner and SeenKeys matches Series.duplicated."""
+        rng = np.random.default_rng(1)
+        values = pd.Series(rng.choice(list("abcdefghij"), 5000, p=[0.28] + [0.08] * 9))
+        mode = StreamingMode(capacity=3)
+        for start in range(0, 5000, 100):
+            mode.update(values[start:start + 100])
+        self.assertEqual(mode.mode(), values.mode()[0])
+
+        hashes = rng.integers(0, 700, 4000).astype(np.uint64)
+        seen = SeenKeys()
+        first = np.concatenate([seen.add(hashes[start:start + 77]) for start in range(0, 4000, 77)])
+        np.testing.assert_array_equal(first, ~pd.Series(hashes).duplicated().to_numpy())
+        self.assertEqual(len(seen), len(np.unique(hashes)))
+
+    def test_interpolation_across_chunks(self):
+        """Test chunked interpolation matches Series.interpolate for gaps spanning chunk boundaries."""
+        rng = np.random.default_rng(2)
+        for _ in range(100):
+            n = int(rng.integers(1, 60))
+            df = pd.DataFrame({"a": rng.normal(size=n), "b": rng.normal(size=n), "c": np.arange(n)})
+            df.loc[rng.random(n) < 0.5, "a"] = np.nan
+            df.loc[rng.random(n) < 0.3, "b"] = np.nan
+            expected = df.assign(a=df["a"].interpolate(), b=df["b"].interpolate())
+
+            size = int(rng.integers(1, 10))
+            chunks = [df.iloc[start:start + size] for start in range(0, n, size)]
+            interpolator = StreamingInterpolator(["a", "b"])
+            result = pd.concat([interpolator.feed(chunk, final=i == len(chunks) - 1) for i, chunk in enumerate(chunks)])
+            pd.testing.assert_frame_equal(result, expected)
+
+
+class TestChunkedCleaning(unittest.TestCase):
+    def setUp(self):
+        """Temporary directory for the input and output CSVs."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.tmp_dir, "input.csv")
+        self.output_path = os.path.join(self.tmp_dir, "output.csv")
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_fraud_cleaner_matches_in_memory(self):
+        """Test duplicates across chunks, medians, modes and outliers match the in-memory cleaner."""
+        rng = np.random.default_rng(3)
+        df = make_raw_fraud_data(500)
+        for col in ["age", "purchase_value", "browser"]:
+            df.loc[rng.random(500) < 0.1, col] = np.nan
+        df.loc[5, "purchase_value"] = 5000
+        pd.concat([df, df.iloc[[3, 100, 450]]]).sample(frac=1, random_state=1).to_csv(self.input_path, index=False)
+
+        cleaner = FraudDataCleaner(self.input_path)
+        cleaner.load_data()
+        cleaner.remove_duplicates()
+        cleaner.fix_data_types()
+        cleaner.handle_missing_values()
+        cleaner.detect_outliers(threshold=3)
+
+        stats = FraudDataCleaner(self.input_path).clean_in_chunks(self.output_path, chunksize=37)
+        self.assertEqual(stats["duplicates"], 3)
+        self.assertEqual(stats["rows_written"], len(cleaner.data))
+        pd.testing.assert_frame_equal(pd.read_csv(self.output_path), round_trip(cleaner.data))
+
+    def test_ip_cleaner_matches_in_memory(self):
+        """Test invalid addresses interpolated across chunk boundaries match the in-memory cleaner."""
+        rng = np.random.default_rng(4)
+        lower = np.sort(rng.integers(0, 2**32 - 1000, 200))
+        df = pd.DataFrame({"lower_bound_ip_address": lower.astype(object),
+                           "upper_bound_ip_address": (lower + 100).astype(object),
+                           "country": rng.choice([" kenya", "Peru ", None], 200)})
+        df.loc[rng.random(200) < 0.15, "lower_bound_ip_address"] = "bad"
+        df.loc[195:, "upper_bound_ip_address"] = "x.y"
+        pd.concat([df, df.iloc[[5, 7]]]).to_csv(self.input_path, index=False)
+
+        cleaner = IPAddressDataCleaner(self.input_path)
+        cleaner.load_data()
+        cleaner.remove_duplicates()
+        cleaner.convert_ip_to_integer()
+        cleaner.standardize_country_names()
+        cleaner.handle_missing_values()
+
+        for chunksize in (1, 9, 1000):
+            IPAddressDataCleaner(self.input_path).clean_in_chunks(self.output_path, chunksize=chunksize)
+            pd.testing.assert_frame_equal(pd.read_csv(self.output_path), cleaner.data.reset_index(drop=True),
+                                          check_dtype=False)
+
+    def test_preprocessor_and_data_cleaner_match_in_memory(self):
+        """Test DataPreprocessor fill methods and DataCleaner deduplication in chunks."""
+        rng = np.random.default_rng(5)
+        df = pd.DataFrame({"a": rng.normal(size=300), "b": rng.integers(0, 9, 300).astype(float),
+                           "c": rng.choice(["x", "y", "z"], 300)})
+        for col in "abc":
+            df.loc[rng.random(300) < 0.1, col] = np.nan
+        pd.concat([df, df.iloc[:5]]).to_csv(self.input_path, index=False)
+
+        for method in ("auto", "fill", "drop"):
+            preprocessor = DataPreprocessor(self.input_path)
+            preprocessor.load_data()
+            preprocessor.handle_missing_values(method=method)
+            DataPreprocessor(self.input_path).handle_missing_values_in_chunks(self.output_path, method=method,
+                                                                              chunksize=23)
+            pd.testing.assert_frame_equal(pd.read_csv(self.output_path), preprocessor.data.reset_index(drop=True))
+
+        cleaner = DataCleaner(self.input_path)
+        cleaner.load_data()
+        cleaner.remove_duplicates()
+        cleaner.correct_data_types()
+        DataCleaner(self.input_path).clean_in_chunks(self.output_path, chunksize=17)
+        pd.testing.assert_frame_equal(pd.read_csv(self.output_path), round_trip(cleaner.data))
+
+    def test_missing_values_in_chunks_use_the_schema(self):
+        """Test chunked and in-memory missing-value handling write the same file when loading with a schema."""
+        rng = np.random.default_rng(6)
+        df = make_raw_fraud_data(400)
+        for col in ("age", "purchase_value", "browser", "sex"):
+            df[col] = df[col].where(rng.random(len(df)) > 0.05)
+        df.to_csv(self.input_path, index=False)
+        memory_path = os.path.join(self.tmp_dir, "in_memory.csv")
+        for method in ("auto", "drop"):
+            preprocessor = DataPreprocessor(self.input_path, schema=FRAUD_DATA_SCHEMA)
+            preprocessor.load_data()
+            self.assertIsInstance(preprocessor.data["browser"].dtype, pd.CategoricalDtype)
+            preprocessor.handle_missing_values(method=method)
+            preprocessor.save_cleaned_data(memory_path)
+            DataPreprocessor(self.input_path, schema=FRAUD_DATA_SCHEMA).handle_missing_values_in_chunks(
+                self.output_path, method=method, chunksize=37)
+            with open(memory_path) as expected, open(self.output_path) as chunked:
+                self.assertEqual(chunked.read(), expected.read(), method)
+
+
+if __name__ == "__main__":
+    unittest.main()
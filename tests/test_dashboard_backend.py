@@ -0,0 +1,215 @@
+import unittest
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from app import COLUMNS, FraudDetectionBackend
+from frame_io import write_frame
+
+
+def make_dashboard_data(n, seed=0):
+    """Transactions with purchase times over four months and ~10% fraud."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2015-01-01T00:00:00")
+    return pd.DataFrame({
+        "user_id": np.arange(n),
+        "purchase_time": start + rng.integers(0, 120 * 86400, n).astype("timedelta64[s]"),
+        "purchase_value": rng.integers(9, 155, n),
+        "class": (rng.random(n) < 0.1).astype(int),
+    })
+
+
+class TestFraudDetectionBackend(unittest.TestCase):
+    def setUp(self):
+        """Temporary directory for the dataset."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data = make_dashboard_data(1000)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_loads_only_needed_columns(self):
+        """Test CSV, Parquet and Feather datasets load the same two columns with datetimes parsed."""
+        expected = {"total_transactions": 1000, "fraud_cases": int(self.data["class"].sum())}
+        for name in ("fraud.csv", "fraud.parquet", "fraud.feather"):
+            path = os.path.join(self.tmp_dir, name)
+            write_frame(self.data, path)
+            backend = FraudDetectionBackend(path)
+            self.assertEqual(list(backend.data.columns), COLUMNS)
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(backend.data["purchase_time"]))
+            summary = backend.app.test_client().get("/summary").get_json()
+            self.assertEqual({key: summary[key] for key in expected}, expected)
+
+    def test_aggregates_follow_appended_transactions(self):
+        """Test /summary and /fraud-trends match a full recount after incremental adds, with ISO date keys."""
+        path = os.path.join(self.tmp_dir, "fraud.parquet")
+        write_frame(self.data.iloc[:600], path)
+        backend = FraudDetectionBackend(path)
+        client = backend.app.test_client()
+        # Out-of-order batches, one with a time earlier than anything loaded and one given as text
+        batch = self.data.iloc[600:].copy()
+        batch.loc[batch.index[0], "purchase_time"] = pd.Timestamp("2014-12-01 10:00")
+        backend.add_transactions(batch.iloc[:200])
+        text = batch.iloc[200:].copy()
+        text["purchase_time"] = text["purchase_time"].astype(str)
+        backend.add_transactions(text)
+        full = pd.concat([self.data.iloc[:600], batch])
+
+        summary = client.get("/summary").get_json()
+        self.assertEqual(summary["total_transactions"], 1000)
+        self.assertEqual(summary["fraud_cases"], int(full["class"].sum()))
+        self.assertEqual(summary["fraud_percentage"], round(100 * full["class"].mean(), 2))
+        fraud = full[full["class"] == 1]
+        expected = {str(day): int(count) for day, count in fraud.groupby(fraud["purchase_time"].dt.date).size().items()}
+        self.assertEqual(client.get("/fraud-trends").get_json(), expected)
+
+    def test_trend_ranges_and_granularities(self):
+        """Test range/granularity trends against pandas, including appended rows and bad parameters."""
+        path = os.path.join(self.tmp_dir, "fraud.parquet")
+        write_frame(self.data.iloc[:700], path)
+        backend = FraudDetectionBackend(path)
+        backend.aggregates.index.min_merge_rows = 150  # leaves rows in both levels
+        for begin in range(700, 1000, 100):
+            backend.add_transactions(self.data.iloc[begin:begin + 100])
+        self.assertGreater(backend.aggregates.index.merges, 0)
+        client = backend.app.test_client()
+        start, end = "2015-01-10 06:30", "2015-03-02"
+        rows = self.data[(self.data["purchase_time"] >= start) & (self.data["purchase_time"] < end)]
+        for granularity, key in (("hour", rows["purchase_time"].dt.floor("h")),
+                                 ("week", rows["purchase_time"].dt.to_period("W-SUN").dt.start_time)):
+            body = client.get(f"/fraud-trends?start={start}&end={end}&granularity={granularity}").get_json()
+            self.assertEqual((body["transactions"], body["fraud_cases"]), (len(rows), int(rows["class"].sum())))
+            buckets = pd.DataFrame(body["buckets"])
+            buckets = buckets[buckets["transactions"] > 0]
+            expected = rows.groupby(key)["class"].agg(["size", "sum", "mean"])
+            self.assertEqual(buckets["start"].tolist(), expected.index.strftime("%Y-%m-%dT%H:%M:%S").tolist())
+            self.assertEqual(buckets["transactions"].tolist(), expected["size"].tolist())
+            np.testing.assert_allclose(buckets["fraud_rate"], expected["mean"], atol=1e-6)
+        self.assertEqual(body["buckets"]["start"][0], "2015-01-05T00:00:00")  # weeks start on Monday
+
+        whole = client.get("/fraud-trends?granularity=day").get_json()
+        self.assertEqual(whole["transactions"], 1000)
+        self.assertEqual(client.get("/fraud-trends?granularity=second").status_code, 400)
+        self.assertEqual(client.get("/fraud-trends?start=soon").status_code, 400)
+        self.assertEqual(client.get("/fraud-trends?start=2015-02-01&end=2015-01-01").status_code, 400)
+        self.assertEqual(client.get("/fraud-trends?start=2000-01-01&granularity=minute").status_code, 400)
+
+    def test_ingestion_and_restart_from_segments(self):
+        """Test JSON, NDJSON and Arrow batches update the endpoints, and a restart reloads compacted segments."""
+        csv_path = os.path.join(self.tmp_dir, "fraud.csv")
+        segment_dir = os.path.join(self.tmp_dir, "segments")
+        write_frame(self.data.iloc[:400], csv_path)
+        backend = FraudDetectionBackend(csv_path, segment_dir=segment_dir, compact_rows=250, compact_interval=None)
+        client = backend.app.test_client()
+        records = self.data.iloc[400:].assign(purchase_time=lambda df: df["purchase_time"].astype(str))
+
+        body = client.post("/transactions", json={"transactions": records.iloc[:200].to_dict("records")}).get_json()
+        self.assertEqual((body["added"], body["total_transactions"], body["pending_rows"]), (200, 600, 200))
+        ndjson = "\n".join(records.iloc[200:400].to_json(orient="records", lines=True).splitlines())
+        client.post("/transactions", data=ndjson, content_type="application/x-ndjson")
+        self.assertEqual(backend.store.stats()["segments"], 2)  # the CSV, then 400 appended rows
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(self.data.iloc[800:][COLUMNS], preserve_index=False)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        client.post("/transactions", data=sink.getvalue().to_pybytes(), content_type="application/vnd.apache.arrow.stream")
+        summary = client.get("/summary").get_json()
+        trends = client.get("/fraud-trends?granularity=week").get_json()
+        self.assertEqual(summary["fraud_cases"], int(self.data["class"].sum()))
+
+        bad = records.iloc[:3].to_dict("records")
+        bad[1]["class"] = 3
+        self.assertEqual(client.post("/transactions", json=bad).status_code, 400)
+        self.assertEqual(client.post("/transactions", data=b"{", content_type="application/json").status_code, 400)
+        self.assertEqual(client.post("/transactions", data=b"x", content_type="text/csv").status_code, 415)
+        self.assertEqual(backend.aggregates.total, 1000)
+        backend.close()
+
+        # The source file is gone: everything comes back from the segments
+        os.remove(csv_path)
+        restarted = FraudDetectionBackend(csv_path, segment_dir=segment_dir).app.test_client()
+        self.assertEqual(restarted.get("/summary").get_json(), summary)
+        self.assertEqual(restarted.get("/fraud-trends?granularity=week").get_json(), trends)
+
+    def test_breakdown_cube(self):
+        """Test /breakdown roll-ups and slices against pandas groupbys, top-K + "other", and appended rows."""
+        rng = np.random.default_rng(1)
+        data = self.data.assign(
+            # 60 countries, more than the cube keeps, with a skew so the top 50 are well defined
+            ip_country=[f"country_{int(i)}" for i in rng.zipf(1.3, 1000) % 60],
+            browser=rng.choice(["Chrome", "Safari", "FireFox"], 1000),
+            source=rng.choice(["SEO", "Ads", "Direct"], 1000),
+            sex=rng.choice(["M", "F"], 1000),
+            age=rng.integers(18, 76, 1000),
+        )
+        path = os.path.join(self.tmp_dir, "fraud.parquet")
+        write_frame(data.iloc[:800], path)
+        backend = FraudDetectionBackend(path)
+        backend.add_transactions(data.iloc[800:].assign(browser="Opera"))  # a browser the cube has not seen
+        data.loc[data.index[800:], "browser"] = "Opera"
+        client = backend.app.test_client()
+
+        body = client.get("/breakdown?by=browser,sex&source=Ads,SEO&age_band=25-34,35-44").get_json()
+        rows = data[data["source"].isin(["Ads", "SEO"]) & data["age"].between(25, 44)]
+        expected = rows.groupby(["browser", "sex"])["class"].agg(["size", "sum"])
+        got = {(group["browser"], group["sex"]): (group["transactions"], group["fraud_cases"])
+               for group in body["groups"]}
+        self.assertEqual(got, {key: (int(size), int(fraud))
+                               for key, (size, fraud) in zip(expected.index, expected.values)})
+        self.assertEqual(body["transactions"], len(rows))
+
+        hours = client.get("/breakdown?by=purchase_hour&limit=24").get_json()
+        self.assertEqual(len(hours["groups"]), data["purchase_time"].dt.hour.nunique())
+        self.assertEqual(hours["fraud_cases"], int(data["class"].sum()))
+        countries = client.get("/breakdown?by=ip_country&limit=100").get_json()["groups"]
+        kept = set(data["ip_country"].iloc[:800].value_counts().index[:50])
+        other = [group["transactions"] for group in countries if group["ip_country"] == "other"]
+        self.assertEqual(other, [int((~data["ip_country"].isin(kept)).sum())])
+        self.assertEqual(client.get("/breakdown?by=device_id").status_code, 400)
+
+    def test_etags_compression_and_response_cache(self):
+        """Test 304s for an unchanged body, gzip negotiation, and that an append only changes affected bodies."""
+        path = os.path.join(self.tmp_dir, "fraud.parquet")
+        write_frame(self.data.iloc[:900], path)
+        backend = FraudDetectionBackend(path)
+        client = backend.app.test_client()
+
+        first = client.get("/fraud-trends?granularity=hour")
+        self.assertEqual(first.headers["Cache-Control"], "no-cache")
+        etag = first.headers["ETag"]
+        revalidated = client.get("/fraud-trends?granularity=hour", headers={"If-None-Match": etag})
+        self.assertEqual((revalidated.status_code, revalidated.data), (304, b""))
+        weak = client.get("/fraud-trends?granularity=hour", headers={"If-None-Match": f'"other", W/{etag}'})
+        self.assertEqual(weak.status_code, 304)
+        self.assertEqual(backend.response_cache.stats()["hits"], 2)
+
+        zipped = client.get("/fraud-trends?granularity=hour", headers={"Accept-Encoding": "br;q=0, gzip, deflate"})
+        self.assertEqual(zipped.headers["Content-Encoding"], "gzip")
+        self.assertNotEqual(zipped.headers["ETag"], etag)
+        self.assertEqual(gzip.decompress(zipped.data), first.data)
+        self.assertLess(len(zipped.data), len(first.data) / 3)
+        # Small bodies are not worth compressing
+        self.assertNotIn("Content-Encoding", client.get("/summary", headers={"Accept-Encoding": "gzip"}).headers)
+
+        # Appended rows all after 2015-04-15: /summary changes, a trend that ends before them does not
+        summary_etag = client.get("/summary").headers["ETag"]
+        early = "/fraud-trends?end=2015-02-01&granularity=day"
+        early_etag = client.get(early).headers["ETag"]
+        late = self.data.iloc[900:].assign(purchase_time=pd.Timestamp("2015-04-20"))
+        backend.add_transactions(late)
+        self.assertEqual(client.get("/summary", headers={"If-None-Match": summary_etag}).status_code, 200)
+        self.assertEqual(client.get(early, headers={"If-None-Match": early_etag}).status_code, 304)
+        self.assertEqual(backend.response_cache.stats()["not_modified"], 3)
+        self.assertEqual(client.get("/summary").get_json()["total_transactions"], 1000)
+        self.assertEqual(client.get("/fraud-trends?granularity=week&start=x").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import shutil
+import sys
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from feature_transform import FeatureTransform
+from flask_api import FraudDetectionAPI
+from test_pipeline import FraudPipeline, STAGES, make_raw_fraud_data
+
+
+def fit_pipeline(fraud_path, ip_path, transform_path, scaling_method="standard"):
+    """Runs the preprocessing stages and returns (cleaned frame, model features, pipeline)."""
+    pipeline = FraudPipeline(fraud_path, ip_path, scaling_method=scaling_method, track_memory=False,
+                             transform_path=transform_path)
+    cleaned = pipeline.run(stages=STAGES[:1])
+    features = pipeline.run(df=cleaned.copy(), stages=STAGES[1:-1]).drop(columns=["class"])
+    return cleaned, features, pipeline
+
+
+class TestFeatureTransform(unittest.TestCase):
+    def setUp(self):
+        """Write a raw fraud CSV and an IP mapping that covers half of the address space."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fraud_path = os.path.join(self.tmp_dir, "Fraud_Data.csv")
+        self.ip_path = os.path.join(self.tmp_dir, "ip_to_country.csv")
+        self.transform_path = os.path.join(self.tmp_dir, "feature_transform.npz")
+        make_raw_fraud_data(1000).to_csv(self.fraud_path, index=False)
+        pd.DataFrame({
+            "lower_bound_ip_address": [0, 2**30],
+            "upper_bound_ip_address": [2**30 - 1, 2**31 - 1],
+            "country": ["Ethiopia", "Kenya"],
+        }).to_csv(self.ip_path, index=False)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_matches_multi_step_pipeline(self):
+        """Test the saved transform reproduces the engineered, encoded and scaled features exactly."""
+        for scaling_method in ("standard", "minmax"):
+            cleaned, features, _ = fit_pipeline(self.fraud_path, self.ip_path, self.transform_path, scaling_method)
+            transform = FeatureTransform.load(self.transform_path)
+            self.assertEqual(transform.feature_names, list(features.columns))
+            pd.testing.assert_frame_equal(transform.transform_frame(cleaned), features.astype(np.float64))
+
+            # Raw records as an API would receive them: text times, dotted-quad addresses
+            records = make_raw_fraud_data(20, seed=1)
+            records["ip_address"] = [".".join(str(int(ip) >> s & 255) for s in (24, 16, 8, 0))
+                                     for ip in records["ip_address"]]
+            from_records = transform.transform(records.to_dict("records"), dtype=np.float32)
+            self.assertEqual(from_records.dtype, np.float32)
+            np.testing.assert_allclose(from_records, transform.transform(records), rtol=1e-6)
+
+    def test_unseen_and_invalid_values(self):
+        """Test unseen categories get the explicit code and unparseable values become NaN."""
+        fit_pipeline(self.fraud_path, self.ip_path, self.transform_path)
+        transform = FeatureTransform.load(self.transform_path)
+        records = make_raw_fraud_data(3, seed=2).to_dict("records")
+        records[0]["browser"] = "Opera"
+        records[1]["purchase_time"] = "not a time"
+        records[2]["ip_address"] = "999.1.1.1"
+
+        X, unseen = transform.transform(records, return_unseen=True)
+        unscaled = X * transform.scale + transform.shift
+        browser = transform.feature_names.index("browser_encoded")
+        country = transform.feature_names.index("ip_country_encoded")
+        self.assertAlmostEqual(unscaled[0, browser], -1)
+        self.assertTrue(np.isnan(X[1, transform.feature_names.index("purchase_hour")]))
+        # An invalid address is an unknown country, which the encoder saw during training
+        self.assertEqual(transform.classes["ip_country"][int(round(unscaled[2, country]))], "Unknown")
+        np.testing.assert_array_equal(unseen, [True, False, False])
+
+        with self.assertRaises(ValueError):
+            transform.transform([{"age": 30}])
+
+    def test_api_scores_raw_transactions(self):
+        """Test /predict/raw matches the model on pipeline features and rejects a mismatched model."""
+        cleaned, features, _ = fit_pipeline(self.fraud_path, self.ip_path, self.transform_path)
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(features, cleaned["class"])
+        model_path = os.path.join(self.tmp_dir, "model.pkl")
+        with open(model_path, "wb") as file:
+            pickle.dump(model, file)
+
+        api = FraudDetectionAPI(model_path=model_path, transform_path=self.transform_path, warmup_rows=8)
+        client = api.app.test_client()
+        records = make_raw_fraud_data(10, seed=3).to_dict("records")
+        expected = model.predict_proba(FeatureTransform.load(self.transform_path).transform_frame(records)
+                                       .astype(np.float32))[:, 1]
+        body = client.post("/predict/raw", json={"transactions": records}).get_json()
+        self.assertEqual(body["count"], 10)
+        np.testing.assert_allclose(body["fraud_probability"], expected)
+        single = client.post("/predict/raw", json=records[0]).get_json()
+        self.assertAlmostEqual(single["fraud_probability"][0], expected[0])
+        records[4]["signup_time"] = "yesterday"
+        self.assertEqual(client.post("/predict/raw", json=records).get_json()["invalid_rows"][0]["index"], 4)
+
+        with open(model_path, "wb") as file:
+            pickle.dump(RandomForestClassifier(n_estimators=2).fit(features.iloc[:, :5], cleaned["class"]), file)
+        with self.assertRaises(ValueError):
+            FraudDetectionAPI(model_path=model_path, transform_path=self.transform_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import ipaddress
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+from ip_range_index import IPRangeIndex
+from data_merger import FraudDataProcessor
+from ip_utils import parse_ipv4
+from Ip_data_cleaning import IPAddressDataCleaner
+
+
+def brute_force_country(ip, lower, upper, countries):
+    """The original per-row scan: first range in table order containing ip."""
+    match = (lower <= ip) & (upper >= ip)
+    return countries[match][0] if match.any() else "Unknown"
+
+
+class TestIPRangeIndex(unittest.TestCase):
+    def test_matches_brute_force_with_gaps_and_overlaps(self):
+        """Test random overlapping tables against the first-match scan, including fractional and NaN addresses."""
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            m = int(rng.integers(1, 40))
+            lower = rng.integers(0, 1000, m).astype(float)
+            upper = lower + rng.integers(-5, 150, m)
+            countries = rng.choice(["Ethiopia", "Kenya", "Japan", "Peru"], m)
+            ips = np.concatenate([rng.uniform(-10, 1200, 200), rng.integers(-10, 1200, 200), [np.nan]])
+
+            index = IPRangeIndex.from_ranges(lower, upper, countries)
+            expected = [brute_force_country(ip, lower, upper, countries) for ip in ips]
+            self.assertEqual(index.lookup(ips).tolist(), expected)
+
+    def test_boundaries_are_inclusive(self):
+        """Test both bounds of a range match and the addresses just outside do not."""
+        index = IPRangeIndex.from_ranges([10, 20], [15, 30], ["A", "B"])
+        self.assertEqual(index.lookup([9, 10, 15, 16, 19, 20, 30, 31]).tolist(),
+                         ["Unknown", "A", "A", "Unknown", "Unknown", "B", "B", "Unknown"])
+
+    def test_save_and_load(self):
+        """Test the .npz round trip gives identical lookups."""
+        index = IPRangeIndex.from_ranges([0, 100, 50], [40, 200, 120], ["A", "B", "C"], unknown="??")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "index.npz")
+            index.save(path)
+            loaded = IPRangeIndex.load(path)
+        ips = np.arange(-5, 210, 0.5)
+        self.assertEqual(loaded.lookup(ips).tolist(), index.lookup(ips).tolist())
+        self.assertEqual(loaded.unknown, "??")
+
+    def test_data_merger_uses_index(self):
+        """Test FraudDataProcessor.map_ip_to_country on dotted-quad addresses."""
+        processor = FraudDataProcessor("unused.csv", "unused.csv", "unused.csv")
+        processor.df = pd.DataFrame({"ip_address": ["10.0.0.5", "192.168.1.255", "8.8.8.8"]})
+        processor.ip_mapping = pd.DataFrame({
+            "lower_bound_ip_address": [167772160, 3232235776],
+            "upper_bound_ip_address": [167772415, 3232236031],
+            "country": ["Canada", "USA"],
+        })
+        processor.map_ip_to_country()
+        self.assertEqual(processor.df["ip_country"].tolist(), ["Canada", "USA", "Unknown"])
+
+
+class TestParseIPv4(unittest.TestCase):
+    def test_dotted_quads_match_ipaddress(self):
+        """Test random addresses round-trip through the standard library formatter."""
+        rng = np.random.default_rng(0)
+        expected = rng.integers(0, 2**32, 5000, dtype=np.uint64)
+        text = pd.Series([str(ipaddress.ip_address(int(ip))) for ip in expected])
+        ips, valid = parse_ipv4(text)
+        self.assertTrue(valid.all())
+        np.testing.assert_array_equal(ips, expected)
+
+    def test_invalid_entries_are_masked(self):
+        """Test malformed, out-of-range and missing values are flagged and zeroed."""
+        values = ["1.2.3", "1.2.3.4.5", "256.1.1.1", "1..2.3", "a.b.c.d", "", None, "-1", "4294967296",
+                  "1.2.3.4 x", "1.2.3.٣", " 10.0.0.1 ", "001.002.003.004", "3232235777", "255.255.255.255"]
+        ips, valid = parse_ipv4(pd.Series(values, dtype=object))
+        self.assertEqual(valid.tolist(), [False] * 11 + [True] * 4)
+        self.assertEqual(ips.tolist(), [0] * 11 + [167772161, 16909060, 3232235777, 4294967295])
+
+    def test_numeric_and_mixed_columns(self):
+        """Test float addresses from the raw export are floored and mixed object columns are handled."""
+        ips, valid = parse_ipv4(np.array([732758368.79972, np.nan, -1.0, 4294967295.5]))
+        self.assertEqual(valid.tolist(), [True, False, False, True])
+        self.assertEqual(ips.tolist(), [732758368, 0, 0, 4294967295])
+
+        ips, valid = parse_ipv4(pd.Series([732758368.79972, "10.0.0.1", 7], dtype=object))
+        self.assertTrue(valid.all())
+        self.assertEqual(ips.tolist(), [732758368, 167772161, 7])
+
+    def test_ip_cleaner_converts_bounds(self):
+        """Test IPAddressDataCleaner converts both bound columns and leaves invalid entries for interpolation."""
+        cleaner = IPAddressDataCleaner("unused.csv")
+        cleaner.data = pd.DataFrame({
+            "lower_bound_ip_address": ["10.0.0.0", 16777216.0, "bad"],
+            "upper_bound_ip_address": ["10.0.0.255", 16777471.0, "10.0.2.255"],
+            "country": ["Canada", "Australia", "Canada"],
+        })
+        cleaner.convert_ip_to_integer()
+        self.assertEqual(cleaner.data["upper_bound_ip_address"].tolist(), [167772415, 16777471, 167772927])
+        self.assertEqual(cleaner.data["lower_bound_ip_address"].iloc[:2].tolist(), [167772160, 16777216])
+        self.assertTrue(np.isnan(cleaner.data["lower_bound_ip_address"].iloc[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
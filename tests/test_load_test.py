@@ -0,0 +1,64 @@
+import unittest
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks")
+sys.path.append(BENCHMARKS_DIR)
+from load_test import compare_to_baseline
+
+
+def make_results(rps=100.0, p50_ms=5.0, p99_ms=20.0, status_codes=None):
+    """A load_test results dict with one scenario."""
+    return {
+        "target": "prediction", "transport": "test_client", "concurrency": 2, "mix": "single=1", "batch_size": 256,
+        "scenarios": {"single": {"requests": 1000, "rps": rps, "p50_ms": p50_ms, "p99_ms": p99_ms,
+                                 "status_codes": status_codes or {"200": 1000}}},
+    }
+
+
+class TestLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_compare_to_baseline(self):
+        """Test throughput, latency and 5xx regressions beyond the tolerance are reported, and nothing else."""
+        baseline = make_results()
+        self.assertEqual(compare_to_baseline(make_results(rps=90.0, p99_ms=22.0), baseline), [])
+        regressions = compare_to_baseline(make_results(rps=50.0, p50_ms=7.0, p99_ms=30.0), baseline)
+        self.assertEqual([message.split(":")[1].split()[0] for message in regressions], ["rps", "p50_ms", "p99_ms"])
+        regressions = compare_to_baseline(make_results(status_codes={"200": 990, "500": 10}), baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("5xx", regressions[0])
+        self.assertEqual(compare_to_baseline(make_results(rps=50.0), baseline, tolerance=0.6), [])
+
+    def test_exit_code_on_regression(self):
+        """Test a short run saves its results and exits non-zero against a baseline it falls behind."""
+        output = os.path.join(self.tmp_dir, "results.json")
+        command = [sys.executable, "load_test.py", "--duration", "0.3", "--warmup", "0", "--concurrency", "2",
+                   "--mix", "single=1"]
+        run = subprocess.run(command + ["--output", output], cwd=BENCHMARKS_DIR, capture_output=True, text=True)
+        self.assertEqual(run.returncode, 0, run.stderr)
+        with open(output) as file:
+            results = json.load(file)
+        self.assertGreater(results["scenarios"]["single"]["requests"], 0)
+
+        baseline = copy.deepcopy(results)
+        baseline["scenarios"]["single"]["rps"] *= 1000
+        baseline_path = os.path.join(self.tmp_dir, "baseline.json")
+        with open(baseline_path, "w") as file:
+            json.dump(baseline, file)
+        run = subprocess.run(command + ["--baseline", baseline_path], cwd=BENCHMARKS_DIR, capture_output=True, text=True)
+        self.assertEqual(run.returncode, 1, run.stderr)
+        self.assertIn("single: rps", run.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
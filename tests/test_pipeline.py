@@ -0,0 +1,188 @@
+import unittest
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from pipeline import FraudPipeline, PREPROCESSING_DIR, STAGE_MODULES, STAGES
+from stage_cache import dependency_files, source_fingerprint
+
+
+def make_raw_fraud_data(n, seed=0):
+    """Builds a raw Fraud_Data-shaped frame with float IP addresses like the original export."""
+    rng = np.random.default_rng(seed)
+    signup = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 90 * 86400, n), unit="s")
+    purchase = signup + pd.to_timedelta(rng.integers(1, 30 * 86400, n), unit="s")
+    return pd.DataFrame({
+        "user_id": np.arange(n),
+        "signup_time": signup.strftime("%Y-%m-%d %H:%M:%S"),
+        "purchase_time": purchase.strftime("%Y-%m-%d %H:%M:%S"),
+        "purchase_value": rng.integers(9, 150, n),
+        "device_id": rng.choice(["QVPSPJUOCKZAR", "EOGFQPIZPYXFZ", "YSSKYOSJHPPLJ"], n),
+        "source": rng.choice(["SEO", "Ads", "Direct"], n),
+        "browser": rng.choice(["Chrome", "Safari", "FireFox"], n),
+        "sex": rng.choice(["M", "F"], n),
+        "age": rng.integers(18, 70, n),
+        "ip_address": rng.uniform(0, 2**32 - 1, n),
+        "class": (rng.random(n) < 0.2).astype(int),
+    })
+
+
+class TestFraudPipeline(unittest.TestCase):
+    def setUp(self):
+        """Write a raw fraud CSV and an IP mapping that covers half of the address space."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fraud_path = os.path.join(self.tmp_dir, "Fraud_Data.csv")
+        self.ip_path = os.path.join(self.tmp_dir, "ip_to_country.csv")
+        make_raw_fraud_data(300).to_csv(self.fraud_path, index=False)
+        pd.DataFrame({
+            "lower_bound_ip_address": [0, 2**30],
+            "upper_bound_ip_address": [2**30 - 1, 2**31 - 1],
+            "country": ["Ethiopia", "Kenya"],
+        }).to_csv(self.ip_path, index=False)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_preprocessing_stages_in_memory(self):
+        """Test the preprocessing stages chain in memory and report time and memory per stage."""
+        pipeline = FraudPipeline(self.fraud_path, self.ip_path)
+        df = pipeline.run(stages=STAGES[:-1])
+
+        self.assertEqual([entry["stage"] for entry in pipeline.report], list(STAGES[:-1]))
+        self.assertTrue(all(entry["peak_mb"] >= 0 and entry["seconds"] >= 0 for entry in pipeline.report))
+        self.assertIn("ip_country_encoded", df.columns)
+        self.assertNotIn("ip_address", df.columns)
+        self.assertTrue(all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["Fraud_Data.csv", "ip_to_country.csv"])
+        self.assertEqual(sorted(pipeline.processor.label_encoders["ip_country"].classes_),
+                         ["Ethiopia", "Kenya", "Unknown"])
+
+    def test_persist_intermediates(self):
+        """Test every stage's output is written when an intermediate directory is given."""
+        out_dir = os.path.join(self.tmp_dir, "stages")
+        pipeline = FraudPipeline(self.fraud_path, self.ip_path, intermediate_dir=out_dir,
+                                 intermediate_format="csv", track_memory=False)
+        df = pipeline.run(stages=("clean", "features"))
+        self.assertEqual(sorted(os.listdir(out_dir)), ["00_clean.csv", "01_features.csv"])
+        self.assertEqual(len(pd.read_csv(os.path.join(out_dir, "01_features.csv"))), len(df))
+        self.assertNotIn("peak_mb", pipeline.report[0])
+
+    def test_stage_cache_runs_only_invalidated_suffix(self):
+        """Test a rerun reuses cached stages and a changed parameter or input file reruns from that stage on."""
+        cache_dir = os.path.join(self.tmp_dir, "cache")
+        preprocessing = STAGES[:-1]
+        first = FraudPipeline(self.fraud_path, self.ip_path, cache_dir=cache_dir, track_memory=False)
+        expected = first.run(stages=preprocessing)
+        self.assertFalse(any(entry.get("cached") for entry in first.report))
+
+        again = FraudPipeline(self.fraud_path, self.ip_path, cache_dir=cache_dir, track_memory=False)
+        pd.testing.assert_frame_equal(again.run(stages=preprocessing), expected)
+        self.assertTrue(all(entry["cached"] for entry in again.report))
+        self.assertEqual(again.cache.hits, len(preprocessing))
+        self.assertGreater(again.cache.stats()["seconds_saved"], 0)
+
+        minmax = FraudPipeline(self.fraud_path, self.ip_path, scaling_method="minmax", cache_dir=cache_dir,
+                               track_memory=False)
+        minmax.run(stages=preprocessing)
+        self.assertEqual([entry.get("cached", False) for entry in minmax.report], [True, True, True, False])
+
+        pd.read_csv(self.ip_path).assign(country=["Peru", "Chile"]).to_csv(self.ip_path, index=False)
+        remapped = FraudPipeline(self.fraud_path, self.ip_path, cache_dir=cache_dir, track_memory=False)
+        remapped.run(stages=preprocessing)
+        self.assertEqual([entry.get("cached", False) for entry in remapped.report], [True, True, False, False])
+        self.assertEqual(sorted(remapped.processor.label_encoders["ip_country"].classes_), ["Chile", "Peru", "Unknown"])
+
+    def test_code_version_covers_imported_modules(self):
+        """Test editing a module a stage only imports indirectly changes the stage's code version."""
+        package = os.path.join(self.tmp_dir, "package")
+        os.mkdir(package)
+        with open(os.path.join(package, "stage_helper.py"), "w") as file:
+            file.write("def parse(values):\n    return values\n")
+        with open(os.path.join(package, "stage_io.py"), "w") as file:
+            file.write("from stage_helper import parse\n\ndef load(values):\n    return parse(values)\n")
+        with open(os.path.join(package, "stage_module.py"), "w") as file:
+            file.write("import stage_io\n\ndef run(values):\n    return stage_io.load(values)\n")
+        sys.path.insert(0, package)
+        try:
+            import stage_module
+            before = source_fingerprint(stage_module.run, root=package)
+            with open(os.path.join(package, "stage_helper.py"), "a") as file:
+                file.write("\nDEFAULT = 1\n")
+            self.assertNotEqual(source_fingerprint(stage_module.run, root=package), before)
+        finally:
+            sys.path.remove(package)
+
+        clean = [path.name for path in dependency_files((FraudPipeline.clean, *STAGE_MODULES["clean"]),
+                                                        PREPROCESSING_DIR)]
+        self.assertTrue({"schemas.py", "frame_io.py", "streaming.py", "ip_utils.py"} <= set(clean))
+
+    def test_stage_cache_evicts_least_recently_used(self):
+        """Test the store stays under its size limit by dropping the oldest outputs."""
+        cache_dir = os.path.join(self.tmp_dir, "cache")
+        pipeline = FraudPipeline(self.fraud_path, self.ip_path, cache_dir=cache_dir, cache_max_bytes=1,
+                                 track_memory=False)
+        pipeline.run(stages=("clean", "features"))
+        self.assertEqual(pipeline.cache.stats()["entries"], 0)
+
+    def test_stages_need_their_input(self):
+        """Test a stage list that skips "clean" needs the earlier output, and runs from it when given."""
+        pipeline = FraudPipeline(self.fraud_path, self.ip_path, track_memory=False)
+        with self.assertRaises(ValueError):
+            pipeline.run(stages=("encode_scale",))
+        mapped = pipeline.run(stages=STAGES[:3])
+        df = FraudPipeline(self.fraud_path, self.ip_path, track_memory=False).run(mapped, stages=("encode_scale",))
+        pd.testing.assert_frame_equal(df, pipeline.run(stages=STAGES[:-1]))
+
+    def test_train_stage_with_stub_trainer(self):
+        """Test the train stage hands the processed frame to the trainer and saves only with an output path."""
+        calls = []
+
+        class StubTrainer:
+            def __init__(self, fraud_data_path, credit_data_path, output_path, model_type):
+                calls.append(("init", output_path, model_type))
+
+            def preprocess_data(self, df, target_col):
+                calls.append(("preprocess", len(df), target_col))
+                return df.drop(columns=target_col), None, df[target_col], None
+
+            def select_model(self):
+                calls.append(("select",))
+
+            def train_and_evaluate(self, X_train, X_test, y_train, y_test):
+                calls.append(("train", X_train.shape[1]))
+                return {}
+
+            def log_experiment(self, report):
+                calls.append(("log",))
+
+            def save_model(self):
+                calls.append(("save",))
+
+        model_path = os.path.join(self.tmp_dir, "model.pkl")
+        pipeline = FraudPipeline(self.fraud_path, self.ip_path, model_output_path=model_path,
+                                 model_type="decision_tree", track_memory=False)
+        with mock.patch.dict(sys.modules, {"modeling": mock.Mock(FraudModelTrainer=StubTrainer)}):
+            df = pipeline.run()
+        self.assertEqual([entry["stage"] for entry in pipeline.report], list(STAGES))
+        self.assertEqual([call[0] for call in calls], ["init", "preprocess", "select", "train", "save"])
+        self.assertEqual(calls[0][1:], (model_path, "decision_tree"))
+        self.assertEqual(calls[1][1:], (len(df), "class"))
+        self.assertIs(pipeline.trainer.fraud_df, df)
+
+    @unittest.skipIf(importlib.util.find_spec("mlflow") is None, "mlflow is needed by FraudModelTrainer")
+    def test_train_stage(self):
+        """Test the trainer fits on the in-memory frame."""
+        pipeline = FraudPipeline(self.fraud_path, self.ip_path, model_type="decision_tree", track_memory=False)
+        pipeline.run()
+        self.assertTrue(hasattr(pipeline.trainer.model, "tree_"))
+
+
+if __name__ == "__main__":
+    unittest.main()
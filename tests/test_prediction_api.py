@@ -0,0 +1,427 @@
+import unittest
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from flask_api import FraudDetectionAPI
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+import payload_codecs
+
+FEATURES = ["purchase_value", "age", "source", "browser", "ip_address"]
+
+
+def make_transactions(n, seed=0):
+    """Builds n random transactions as dicts keyed by FEATURES."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(5, 150, n),
+        rng.integers(18, 70, n),
+        rng.integers(0, 3, n),
+        rng.integers(0, 5, n),
+        rng.integers(0, 2**32 - 1, n),
+    ]).astype(float)
+    return [dict(zip(FEATURES, row)) for row in X.tolist()]
+
+
+class TestPredictionAPI(unittest.TestCase):
+    def setUp(self):
+        """Train a small forest on synthetic data and serve it through the test client."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.pkl")
+
+        train = pd.DataFrame(make_transactions(400))
+        y = (train["purchase_value"] > 100).astype(int)
+        self.model = RandomForestClassifier(n_estimators=10, random_state=42).fit(train, y)
+        with open(self.model_path, "wb") as file:
+            pickle.dump(self.model, file)
+
+        self.api = FraudDetectionAPI(model_path=self.model_path)
+        self.client = self.api.app.test_client()
+
+    def tearDown(self):
+        """Remove the temporary model directory."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_predict_single(self):
+        """Test the single-transaction endpoint matches the model."""
+        transaction = make_transactions(1, seed=1)[0]
+        response = self.client.post("/predict", json=transaction)
+        self.assertEqual(response.status_code, 200)
+
+        expected = self.model.predict_proba(pd.DataFrame([transaction]))[0][1]
+        self.assertAlmostEqual(response.get_json()["fraud_probability"], expected)
+
+    def test_predict_single_schema_errors(self):
+        """Test missing, unexpected and non-numeric fields are rejected by the feature schema."""
+        transaction = make_transactions(1, seed=1)[0]
+        del transaction["age"]
+        transaction["coupon"] = 1
+        error = self.client.post("/predict", json=transaction).get_json()["error"]
+        self.assertIn("age", error)
+        self.assertIn("coupon", error)
+
+        transaction = make_transactions(1, seed=1)[0]
+        transaction["purchase_value"] = "invalid"
+        self.assertIn("purchase_value", self.client.post("/predict", json=transaction).get_json()["error"])
+
+    def test_schema_compiled_from_model(self):
+        """Test the schema follows the training column order and uses float32 rows for forests."""
+        self.assertEqual(self.api.schema.feature_names, tuple(FEATURES))
+        self.assertEqual(self.api.schema.dtype, np.float32)
+
+    def test_predict_with_micro_batching(self):
+        """Test /predict gives the same answer when routed through the micro-batcher."""
+        api = FraudDetectionAPI(model_path=self.model_path, micro_batching=True)
+        client = api.app.test_client()
+        transaction = make_transactions(1, seed=1)[0]
+        try:
+            batched = client.post("/predict", json=transaction).get_json()
+            self.assertEqual(batched, self.client.post("/predict", json=transaction).get_json())
+            self.assertEqual(client.get("/stats/batching").get_json()["requests"], 1)
+        finally:
+            api.batcher.close()
+
+    def test_predict_batch_json(self):
+        """Test a JSON array batch is scored in one call with labels derived from probabilities."""
+        transactions = make_transactions(50, seed=2)
+        response = self.client.post("/predict/batch", json=transactions)
+        data = response.get_json()
+
+        frame = pd.DataFrame(transactions)
+        self.assertEqual(data["count"], 50)
+        np.testing.assert_allclose(data["fraud_probability"], self.model.predict_proba(frame)[:, 1])
+        self.assertEqual(data["fraud_prediction"], self.model.predict(frame).tolist())
+
+    def test_out_of_range_values_are_schema_errors(self):
+        """Test values that are finite floats but overflow the float32 rows are reported, not scored."""
+        transactions = make_transactions(3, seed=4)
+        transactions[1]["purchase_value"] = 1e39
+        data = self.client.post("/predict/batch", json=transactions).get_json()
+        self.assertEqual([row["index"] for row in data["invalid_rows"]], [1])
+        self.assertIn("purchase_value", data["invalid_rows"][0]["error"])
+        self.assertIn("out of range", self.client.post("/predict", json=transactions[1]).get_json()["error"])
+
+        # Scoring NumPy rows neither warns nor strips the names the model was trained with
+        self.assertEqual(list(self.api.model.feature_names_in_), FEATURES)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertIn("fraud_probability", self.client.post("/predict", json=transactions[0]).get_json())
+            # Other callers still get sklearn's warning
+            self.model.predict_proba(np.zeros((1, len(FEATURES))))
+        self.assertEqual(len([w for w in caught if "feature names" in str(w.message)]), 1)
+
+    def test_predict_batch_ndjson(self):
+        """Test NDJSON bodies are accepted."""
+        transactions = make_transactions(5, seed=3)
+        body = "\n".join(json.dumps(t) for t in transactions)
+        response = self.client.post("/predict/batch", data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.get_json()["count"], 5)
+
+    def test_predict_batch_invalid_rows(self):
+        """Test every invalid row is reported at once."""
+        transactions = make_transactions(4, seed=4)
+        del transactions[1]["age"]
+        transactions[3]["purchase_value"] = "invalid"
+        response = self.client.post("/predict/batch", json=transactions)
+        data = response.get_json()
+
+        self.assertIn("error", data)
+        self.assertEqual([row["index"] for row in data["invalid_rows"]], [1, 3])
+        self.assertIn("age", data["invalid_rows"][0]["error"])
+        self.assertIn("purchase_value", data["invalid_rows"][1]["error"])
+
+    def test_metrics_endpoint(self):
+        """Test /metrics exposes per-stage histograms, request counters and error counts."""
+        self.client.post("/predict", json=make_transactions(1, seed=5)[0])
+        self.client.post("/predict/batch", json=make_transactions(8, seed=5))
+        self.client.post("/predict", json={"age": 1})
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        text = response.get_data(as_text=True)
+        self.assertIn('fraud_api_stage_seconds_count{endpoint="predict",stage="predict_proba"} 1', text)
+        self.assertIn('fraud_api_stage_seconds_quantile{endpoint="predict_batch",stage="build",quantile="0.99"}', text)
+        self.assertIn('fraud_api_batch_rows_bucket{le="8.0"} 1', text)
+        self.assertIn('fraud_api_requests_total{endpoint="predict",status="200"} 2', text)
+        self.assertIn('fraud_api_errors_total{endpoint="predict",type="SchemaError"} 1', text)
+
+
+@unittest.skipIf(payload_codecs.msgpack is None or payload_codecs.pa is None, "msgpack and pyarrow are optional")
+class TestPayloadCodecs(unittest.TestCase):
+    def setUp(self):
+        """Serve a small forest and prepare a batch in each wire format."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.pkl")
+        train = pd.DataFrame(make_transactions(400))
+        self.model = RandomForestClassifier(n_estimators=5, random_state=1).fit(train, (train["age"] > 40).astype(int))
+        with open(self.model_path, "wb") as file:
+            pickle.dump(self.model, file)
+        self.api = FraudDetectionAPI(model_path=self.model_path, warmup_rows=0)
+        self.client = self.api.app.test_client()
+        self.transactions = make_transactions(20, seed=6)
+        self.expected = self.model.predict_proba(pd.DataFrame(self.transactions))[:, 1]
+
+    def tearDown(self):
+        """Remove the temporary model directory."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def arrow_body(self, table):
+        pa = payload_codecs.pa
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def features_table(self, X):
+        pa = payload_codecs.pa
+        rows = pa.FixedSizeListArray.from_arrays(pa.array(X.ravel()), X.shape[1])
+        return pa.table({"features": rows})
+
+    def test_msgpack_request_and_response(self):
+        """Test MessagePack bodies are decoded and answered in MessagePack when asked for."""
+        msgpack = payload_codecs.msgpack
+        response = self.client.post("/predict/batch", data=msgpack.packb(self.transactions),
+                                    content_type="application/msgpack", headers={"Accept": "application/msgpack"})
+        self.assertEqual(response.mimetype, "application/msgpack")
+        np.testing.assert_allclose(msgpack.unpackb(response.data)["fraud_probability"], self.expected)
+
+        single = self.client.post("/predict", data=msgpack.packb(self.transactions[0]),
+                                  content_type="application/msgpack").get_json()
+        self.assertAlmostEqual(single["fraud_probability"], self.expected[0])
+
+    def test_arrow_columnar_batch(self):
+        """Test an Arrow record batch with one column per feature, answered as Arrow."""
+        pa = payload_codecs.pa
+        table = pa.Table.from_pandas(pd.DataFrame(self.transactions)[FEATURES[::-1]], preserve_index=False)
+        response = self.client.post("/predict/batch", data=self.arrow_body(table),
+                                    content_type=payload_codecs.ARROW_STREAM,
+                                    headers={"Accept": payload_codecs.ARROW_STREAM})
+        result = pa.ipc.open_stream(response.data).read_all()
+        np.testing.assert_allclose(result.column("fraud_probability").to_numpy(), self.expected)
+
+    def test_arrow_features_column_is_zero_copy(self):
+        """Test a FixedSizeList "features" column becomes a view of the request bytes, not a copy."""
+        X = pd.DataFrame(self.transactions)[FEATURES].to_numpy(np.float32)
+        body = self.arrow_body(self.features_table(X))
+        table = payload_codecs.read_arrow_table(body, payload_codecs.ARROW_STREAM)
+        matrix = payload_codecs.arrow_matrix(table, self.api.schema)
+        np.testing.assert_array_equal(matrix, X)
+        self.assertFalse(matrix.flags.owndata)
+        self.assertFalse(matrix.flags.writeable)
+
+        data = self.client.post("/predict/batch", data=body, content_type=payload_codecs.ARROW_STREAM).get_json()
+        np.testing.assert_allclose(data["fraud_probability"], self.expected)
+
+        X = X.copy()
+        X[0, 0] = np.nan
+        data = self.client.post("/predict/batch", data=self.arrow_body(self.features_table(X)),
+                                content_type=payload_codecs.ARROW_STREAM).get_json()
+        self.assertIn("Non-finite", data["error"])
+
+    def test_unsupported_format(self):
+        """Test unknown or unavailable body formats are rejected with 415 and JSON stays the default."""
+        response = self.client.post("/predict", data=b"<xml/>", content_type="application/xml")
+        self.assertEqual(response.status_code, 415)
+        response = self.client.post("/predict", json=self.transactions[0], headers={"Accept": "*/*"})
+        self.assertEqual(response.mimetype, "application/json")
+
+
+class TestModelReload(unittest.TestCase):
+    def setUp(self):
+        """Serve a first model and prepare a replacement trained on different labels."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.pkl")
+        self.train = pd.DataFrame(make_transactions(400))
+        self.write_model((self.train["purchase_value"] > 100).astype(int))
+        self.api = FraudDetectionAPI(model_path=self.model_path, warmup_rows=8)
+        self.client = self.api.app.test_client()
+
+    def tearDown(self):
+        """Stop the watcher and remove the temporary model directory."""
+        self.api.reloader.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_model(self, y, frame=None):
+        """Fits a forest on `frame` (default: the training frame) and pickles it to model_path."""
+        frame = self.train if frame is None else frame
+        model = RandomForestClassifier(n_estimators=5, random_state=1).fit(frame, y)
+        with open(self.model_path, "wb") as file:
+            pickle.dump(model, file)
+        return model
+
+    def test_admin_reload_swaps_model(self):
+        """Test a reload activates the new model and reports its version and timings."""
+        old_version = self.client.get("/status").get_json()["model_version"]
+        new_model = self.write_model((self.train["age"] > 40).astype(int))
+
+        response = self.client.post("/admin/reload?wait=true")
+        self.assertTrue(response.get_json()["last_reload"]["ok"])
+
+        status = self.client.get("/status").get_json()
+        self.assertNotEqual(status["model_version"], old_version)
+        self.assertEqual(status["reload"]["last_reload"]["previous_version"], old_version)
+        self.assertIn("warmup_ms", status)
+
+        transaction = make_transactions(1, seed=9)[0]
+        expected = new_model.predict_proba(pd.DataFrame([transaction]))[0][1]
+        self.assertAlmostEqual(self.client.post("/predict", json=transaction).get_json()["fraud_probability"], expected)
+
+    def test_reload_rejects_schema_change(self):
+        """Test a model with different input columns is not swapped in."""
+        old_version = self.api.state.version
+        self.write_model((self.train["age"] > 40).astype(int), frame=self.train.drop(columns=["browser"]))
+
+        self.api.reloader.reload(wait=True)
+        self.assertFalse(self.api.reloader.last_reload["ok"])
+        self.assertIn("schema", self.api.reloader.last_reload["error"])
+        self.assertEqual(self.api.state.version, old_version)
+
+    def test_file_watch_triggers_reload(self):
+        """Test the watcher picks up a rewritten model file."""
+        api = FraudDetectionAPI(model_path=self.model_path, warmup_rows=8, watch_model=True, watch_interval=0.05)
+        try:
+            time.sleep(0.1)
+            self.write_model((self.train["age"] > 30).astype(int))
+            deadline = time.monotonic() + 5
+            while api.reloader.reloads == 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(api.reloader.reloads, 1)
+        finally:
+            api.reloader.close()
+
+
+class TestPredictionCache(unittest.TestCase):
+    def setUp(self):
+        """Serve a small forest with the result cache enabled."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.pkl")
+        train = pd.DataFrame(make_transactions(400))
+        model = RandomForestClassifier(n_estimators=5, random_state=1).fit(train, (train["age"] > 40).astype(int))
+        with open(self.model_path, "wb") as file:
+            pickle.dump(model, file)
+        self.api = FraudDetectionAPI(model_path=self.model_path, cache_size=100, warmup_rows=0)
+        self.client = self.api.app.test_client()
+
+    def tearDown(self):
+        """Remove the temporary model directory."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_repeated_payload_hits_cache(self):
+        """Test a duplicate payload with different key order and int spelling is served from the cache."""
+        transaction = make_transactions(1, seed=1)[0]
+        first = self.client.post("/predict", json=transaction).get_json()
+        reordered = {name: transaction[name] for name in reversed(FEATURES)}
+        reordered["age"] = int(reordered["age"])
+        self.assertEqual(self.client.post("/predict", json=reordered).get_json(), first)
+
+        stats = self.client.get("/status").get_json()["cache"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_model_change_invalidates(self):
+        """Test entries cached under one model version are never served for another."""
+        transaction = make_transactions(1, seed=1)[0]
+        self.client.post("/predict", json=transaction)
+        train = pd.DataFrame(make_transactions(400))
+        model = RandomForestClassifier(n_estimators=5, random_state=2).fit(train, (train["age"] <= 40).astype(int))
+        with open(self.model_path, "wb") as file:
+            pickle.dump(model, file)
+        self.client.post("/admin/reload?wait=true")
+
+        data = self.client.post("/predict", json=transaction).get_json()
+        self.assertAlmostEqual(data["fraud_probability"], model.predict_proba(pd.DataFrame([transaction]))[0][1])
+        stats = self.api.cache.stats()
+        self.assertEqual((stats["hits"], stats["invalidations"]), (0, 1))
+
+    def test_capacity_and_ttl(self):
+        """Test LRU eviction by entry count and bytes, and expiry after the TTL."""
+        cache = PredictionCache(max_entries=2, ttl_seconds=None)
+        keys = [cache.key(np.array([[float(i), -0.0]], dtype=np.float32)) for i in range(3)]
+        self.assertEqual(keys[0], cache.key(np.array([[0.0, 0.0]], dtype=np.float32)))
+        for i, key in enumerate(keys):
+            cache.put("v1", key, (0, float(i)))
+        self.assertIsNone(cache.get("v1", keys[0]))
+        self.assertEqual(cache.get("v1", keys[2]), (0, 2.0))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache = PredictionCache(max_entries=100, max_bytes=2 * cache.entry_size(keys[0]))
+        for key in keys:
+            cache.put("v1", key, (0, 0.0))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+        cache = PredictionCache(max_entries=10, ttl_seconds=0.01)
+        cache.put("v1", keys[0], (1, 0.9))
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("v1", keys[0]))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+
+class TestMicroBatching(unittest.TestCase):
+    def setUp(self):
+        """Train a small forest and wrap its scoring function in a micro-batcher."""
+        train = pd.DataFrame(make_transactions(400))
+        y = (train["purchase_value"] > 100).astype(int)
+        self.model = RandomForestClassifier(n_estimators=10, random_state=42).fit(train.values, y)
+        self.X = pd.DataFrame(make_transactions(200, seed=5)).values
+
+        def score(X):
+            proba = self.model.predict_proba(X)
+            return proba.argmax(axis=1), proba[:, 1]
+
+        self.batcher = MicroBatcher(score, max_batch_size=16, max_wait_ms=5.0, adaptive=False)
+
+    def tearDown(self):
+        """Stop the batcher worker."""
+        self.batcher.close()
+
+    def test_concurrent_results_fan_back(self):
+        """Test concurrent callers get their own row's result and rows are grouped into batches."""
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(self.batcher.predict, self.X))
+
+        expected = self.model.predict_proba(self.X)[:, 1]
+        np.testing.assert_allclose([probability for _, probability in results], expected)
+
+        stats = self.batcher.stats()
+        self.assertEqual(stats["requests"], len(self.X))
+        self.assertLess(stats["batches"], len(self.X))
+        self.assertTrue(all(int(size) <= 16 for size in stats["batch_size_counts"]))
+
+    def test_rows_are_scored_with_their_context(self):
+        """Test rows submitted with different contexts (model states) are scored in separate calls."""
+        calls = []
+
+        def score(X, context):
+            calls.append((context, len(X)))
+            return np.full(len(X), context), np.full(len(X), context / 10)
+
+        batcher = MicroBatcher(score, max_batch_size=64, max_wait_ms=20.0, adaptive=False)
+        try:
+            contexts = [1, 2] * 8
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                results = list(pool.map(batcher.predict, self.X[:16], contexts))
+        finally:
+            batcher.close()
+        self.assertEqual(results, [(context, context / 10) for context in contexts])
+        self.assertEqual(sum(size for _, size in calls), 16)
+        self.assertLess(len(calls), 16)
+
+    def test_errors_propagate(self):
+        """Test a failing model call raises in every waiting caller."""
+        with self.assertRaises(ValueError):
+            self.batcher.predict(np.zeros(3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import gc
+import json
+import os
+import pickle
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API")
+sys.path.append(API_DIR)
+from flask_api import FraudDetectionAPI
+from prefork_server import PreforkServer
+from test_prediction_api import make_transactions
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "the prefork server needs fork()")
+class TestPreforkServer(unittest.TestCase):
+    def setUp(self):
+        """Pickle a small forest for the server to load."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.pkl")
+        self.train = pd.DataFrame(make_transactions(200))
+        self.write_model((self.train["purchase_value"] > 100).astype(int))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_model(self, y):
+        model = RandomForestClassifier(n_estimators=3, random_state=0).fit(self.train, y)
+        with open(self.model_path, "wb") as file:
+            pickle.dump(model, file)
+
+    def request(self, path, method="GET"):
+        """(status, JSON body) of one request on a fresh connection, so any worker may answer it."""
+        req = urllib.request.Request(f"http://127.0.0.1:{self.port}{path}", method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def worker_versions(self, deadline):
+        """Model version reported by each worker pid seen on /status until `deadline`."""
+        versions = {}
+        while time.monotonic() < deadline and len(versions) < 2:
+            try:
+                status = self.request("/status")[1]
+            except OSError:
+                time.sleep(0.1)
+                continue
+            versions[status["pid"]] = status["model_version"]
+        return versions
+
+    def test_admin_reload_reaches_every_worker(self):
+        """Test /admin/reload on one worker swaps the model in all of them."""
+        self.port = free_port()
+        server = subprocess.Popen([sys.executable, "prefork_server.py", "--model-path", self.model_path,
+                                   "--host", "127.0.0.1", "--port", str(self.port), "--workers", "2"],
+                                  cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            old_versions = self.worker_versions(time.monotonic() + 30)
+            self.assertEqual(len(old_versions), 2)
+            old_version = next(iter(old_versions.values()))
+
+            self.write_model((self.train["age"] > 40).astype(int))
+            self.assertEqual(self.request("/admin/reload?wait=true", method="POST")[0], 409)
+            self.assertEqual(self.request("/admin/reload", method="POST")[0], 202)
+            deadline = time.monotonic() + 30
+            versions = {}
+            while time.monotonic() < deadline:
+                status = self.request("/status")[1]
+                versions[status["pid"]] = status["model_version"]
+                if len(versions) == 2 and old_version not in versions.values():
+                    break
+                time.sleep(0.05)
+            self.assertEqual(set(versions), set(old_versions))
+            self.assertNotIn(old_version, versions.values())
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=10)
+
+    def test_parent_reloads_before_forking_again(self):
+        """Test the parent's reload has finished and is frozen when SIGHUP handling returns."""
+        api = FraudDetectionAPI(model_path=self.model_path, warmup_rows=8)
+        old_version = api.state.version
+        self.write_model((self.train["age"] > 40).astype(int))
+        try:
+            PreforkServer(api, workers=2)._reload(signal.SIGHUP, None)
+            self.assertFalse(api.reloader.in_progress)
+            self.assertNotEqual(api.state.version, old_version)
+            self.assertGreater(gc.get_freeze_count(), 0)
+        finally:
+            gc.unfreeze()
+
+    def test_velocity_needs_one_worker(self):
+        """Test per-process velocity history is refused with several workers."""
+        api = FraudDetectionAPI(model_path=self.model_path, warmup_rows=0, velocity_windows={"1h": 3600})
+        with self.assertRaises(ValueError):
+            PreforkServer(api, workers=2)
+        self.assertEqual(PreforkServer(api, workers=1).workers, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+from schemas import (CREDITCARD_SCHEMA, FRAUD_DATA_SCHEMA, apply_schema, default_dtype_memory, load_csv,
+                     memory_report)
+from frame_io import read_frame, write_frame
+from fraud_data_cleaning import FraudDataCleaner
+from test_pipeline import make_raw_fraud_data
+
+
+class TestSchemas(unittest.TestCase):
+    def setUp(self):
+        """Temporary directory for the CSVs."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_fraud_data_is_compacted(self):
+        """Test the Fraud_Data loader picks compact dtypes and keeps the values."""
+        path = os.path.join(self.tmp_dir, "Fraud_Data.csv")
+        raw = make_raw_fraud_data(2000)
+        raw.to_csv(path, index=False)
+
+        cleaner = FraudDataCleaner(path)
+        cleaner.load_data()
+        df = cleaner.data
+        self.assertEqual(df["user_id"].dtype, np.uint16)
+        self.assertEqual(df["age"].dtype, np.uint8)
+        self.assertEqual(df["ip_address"].dtype, np.uint32)
+        self.assertEqual(df["purchase_time"].dtype, "datetime64[ns]")
+        self.assertIsInstance(df["browser"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["browser"].tolist(), raw["browser"].tolist())
+        np.testing.assert_array_equal(df["ip_address"], np.floor(raw["ip_address"]))
+        pd.testing.assert_series_equal(df["signup_time"], pd.to_datetime(raw["signup_time"]).astype("datetime64[ns]"))
+
+        report = memory_report(default_dtype_memory(df, FRAUD_DATA_SCHEMA), df.memory_usage(index=False, deep=True))
+        self.assertGreater(report.loc["total", "ratio"], 5)
+
+    def test_explicit_and_other_schemas(self):
+        """Test the creditcard schema, that files are only converted when a schema is given, and that missing
+        or invalid values are left representable."""
+        path = os.path.join(self.tmp_dir, "creditcard.csv")
+        pd.DataFrame({"Time": [0.0, 1.0], **{f"V{i}": [0.5, -1.25] for i in range(1, 29)},
+                      "Amount": [149.62, 2.69], "Class": [0, 1]}).to_csv(path, index=False)
+        credit = load_csv(path, schema="creditcard")
+        self.assertTrue(all(credit[col].dtype == np.float32 for col in CREDITCARD_SCHEMA if col != "Class"))
+        self.assertEqual(credit["Class"].dtype, np.uint8)
+        self.assertTrue((load_csv(path).dtypes == np.float64).sum() == 30)
+
+        # A derived fraud file shares column names with Fraud_Data but keeps read_csv's types
+        derived = os.path.join(self.tmp_dir, "featured.csv")
+        pd.DataFrame({"purchase_value": [1.5, 2.0], "age": [-0.3, 1.2], "class": [0, 1]}).to_csv(derived, index=False)
+        self.assertEqual(read_frame(derived)["class"].dtype, np.int64)
+
+        df = apply_schema(pd.DataFrame({"age": [30.0, np.nan], "ip_address": ["10.0.0.1", "bad"]}),
+                          {"age": "uint", "ip_address": "ipv4"})
+        self.assertEqual(df["age"].dtype, np.float64)
+        self.assertEqual(df["ip_address"].iloc[0], 167772161)
+        self.assertTrue(np.isnan(df["ip_address"].iloc[1]))
+
+
+class TestFrameIO(unittest.TestCase):
+    def setUp(self):
+        """A compacted fraud frame and a temporary directory."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.df = apply_schema(make_raw_fraud_data(500), FRAUD_DATA_SCHEMA)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_columnar_round_trip_keeps_dtypes(self):
+        """Test Parquet and Feather return the written dtypes and only the requested columns, in order."""
+        for name in ("stage.parquet", "stage.feather"):
+            path = os.path.join(self.tmp_dir, name)
+            write_frame(self.df, path)
+            pd.testing.assert_frame_equal(read_frame(path), self.df)
+            pd.testing.assert_frame_equal(read_frame(path, columns=["purchase_time", "class"]),
+                                          self.df[["purchase_time", "class"]])
+
+    def test_feather_is_memory_mapped_and_csv_still_supported(self):
+        """Test numeric Feather columns point into the mapped file and CSV goes through the schema loader."""
+        path = os.path.join(self.tmp_dir, "stage.feather")
+        write_frame(self.df, path)
+        mapped = read_frame(path, columns=["ip_address"])
+        self.assertFalse(mapped["ip_address"].to_numpy().flags.owndata)
+
+        csv_path = os.path.join(self.tmp_dir, "stage.csv")
+        write_frame(self.df, csv_path)
+        pd.testing.assert_frame_equal(read_frame(csv_path, columns=["class", "purchase_time"], schema=FRAUD_DATA_SCHEMA),
+                                      self.df[["class", "purchase_time"]])
+        with self.assertRaises(ValueError):
+            read_frame(os.path.join(self.tmp_dir, "stage.xlsx"))
+
+
+if __name__ == "__main__":
+    unittest.main()
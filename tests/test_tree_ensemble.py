@@ -0,0 +1,116 @@
+import unittest
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from flask_api import FraudDetectionAPI
+from tree_ensemble import CompiledTreeEnsemble
+from model_artifact import export_artifact, load_artifact
+
+
+class TestCompiledTreeEnsemble(unittest.TestCase):
+    def setUp(self):
+        """Build a noisy synthetic dataset so the trees grow deep."""
+        rng = np.random.default_rng(7)
+        self.X = rng.normal(size=(3000, 8))
+        self.y = ((self.X[:, 0] + self.X[:, 1] ** 2 + rng.normal(size=3000)) > 1).astype(int)
+        self.X_test = rng.normal(size=(500, 8))
+
+    def test_random_forest_parity(self):
+        """Test the compiled forest reproduces predict_proba and predict."""
+        model = RandomForestClassifier(n_estimators=25, random_state=0).fit(self.X, self.y)
+        compiled = CompiledTreeEnsemble.from_model(model)
+        np.testing.assert_allclose(compiled.predict_proba(self.X_test), model.predict_proba(self.X_test), rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(compiled.predict(self.X_test), model.predict(self.X_test))
+
+    def test_decision_tree_parity_on_thresholds(self):
+        """Test inputs lying exactly on split thresholds take the same branch as sklearn."""
+        model = DecisionTreeClassifier(random_state=0).fit(self.X, self.y)
+        compiled = CompiledTreeEnsemble.from_model(model)
+
+        internal = ~compiled.is_leaf
+        X_edge = self.X_test.astype(np.float32).copy()
+        rows = np.arange(len(X_edge))
+        picks = np.random.default_rng(1).integers(0, internal.sum(), len(X_edge))
+        X_edge[rows, compiled.feature[internal][picks]] = model.tree_.threshold[internal][picks]
+
+        np.testing.assert_array_equal(compiled.predict_proba(X_edge), model.predict_proba(X_edge))
+        np.testing.assert_array_equal(compiled.apply(X_edge)[:, 0] - compiled.roots[0], model.apply(X_edge))
+
+    def test_rejects_non_tree_models(self):
+        """Test only tree models can be compiled."""
+        with self.assertRaises(TypeError):
+            CompiledTreeEnsemble.from_model(LogisticRegression().fit(self.X, self.y))
+
+    def test_api_compiled_engine(self):
+        """Test FraudDetectionAPI serves the same probabilities with the compiled engine."""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            frame = pd.DataFrame(self.X, columns=[f"f{i}" for i in range(8)])
+            model = RandomForestClassifier(n_estimators=10, random_state=0).fit(frame, self.y)
+            model_path = os.path.join(tmp_dir, "model.pkl")
+            with open(model_path, "wb") as file:
+                pickle.dump(model, file)
+
+            api = FraudDetectionAPI(model_path=model_path, engine="compiled")
+            records = pd.DataFrame(self.X_test[:20], columns=frame.columns).to_dict(orient="records")
+            data = api.app.test_client().post("/predict/batch", json=records).get_json()
+            np.testing.assert_allclose(data["fraud_probability"], model.predict_proba(pd.DataFrame(records))[:, 1])
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class TestModelArtifact(unittest.TestCase):
+    def setUp(self):
+        """Train a small forest on a named-column frame and export it as an artifact."""
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(3)
+        self.frame = pd.DataFrame(rng.normal(size=(1000, 5)), columns=["a", "b", "c", "d", "e"])
+        y = (self.frame["a"] + rng.normal(size=1000) > 0).astype(int)
+        self.model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.frame, y)
+        self.artifact_dir = export_artifact(self.model, os.path.join(self.tmp_dir, "artifact"))
+
+    def tearDown(self):
+        """Remove the artifact directory."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_roundtrip_is_memory_mapped(self):
+        """Test the loaded arrays are read-only memory maps with identical predictions."""
+        loaded = load_artifact(self.artifact_dir)
+        self.assertIsInstance(loaded.threshold, np.memmap)
+        self.assertFalse(loaded.value.flags.writeable)
+        self.assertEqual(list(loaded.feature_names_in_), list(self.frame.columns))
+        np.testing.assert_allclose(loaded.predict_proba(self.frame.values), self.model.predict_proba(self.frame))
+
+    def test_checksum_is_verified_on_request(self):
+        """Test a block swapped for one of the same shape is served lazily but rejected when verifying."""
+        threshold = np.load(os.path.join(self.artifact_dir, "threshold.npy"))
+        np.save(os.path.join(self.artifact_dir, "threshold.npy"), threshold + 1.0)
+        self.assertEqual(load_artifact(self.artifact_dir).n_trees, 10)
+        with self.assertRaises(ValueError):
+            load_artifact(self.artifact_dir, verify=True)
+        with self.assertRaises(ValueError):
+            FraudDetectionAPI(model_path=str(self.artifact_dir), verify_artifact=True)
+
+        export_artifact(self.model, self.artifact_dir)
+        self.assertEqual(load_artifact(self.artifact_dir, verify=True).n_trees, 10)
+
+    def test_api_loads_artifact_directory(self):
+        """Test FraudDetectionAPI accepts an artifact directory as model_path."""
+        api = FraudDetectionAPI(model_path=str(self.artifact_dir))
+        self.assertEqual(api.schema.feature_names, tuple(self.frame.columns))
+        record = self.frame.iloc[0].to_dict()
+        data = api.app.test_client().post("/predict", json=record).get_json()
+        self.assertAlmostEqual(data["fraud_probability"], self.model.predict_proba(self.frame.iloc[[0]])[0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
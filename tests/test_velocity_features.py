@@ -0,0 +1,64 @@
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+from velocity_features import KeyedTimeline, behavioral_features, velocity_features
+
+
+def brute_force(keys, users, times, window):
+    """Per row: (count, distinct users, seconds since previous) over the rows it has seen, by scanning them all."""
+    rows = []
+    seen_order = sorted(range(len(times)), key=lambda j: (times[j], j))
+    rank = {j: r for r, j in enumerate(seen_order)}
+    for i in range(len(times)):
+        prior = [j for j in range(len(times)) if keys[j] == keys[i] and rank[j] <= rank[i]]
+        in_window = [j for j in prior if times[j] > times[i] - window]
+        previous = [times[j] for j in prior if j != i]
+        rows.append((len(in_window), len({users[j] for j in in_window}),
+                     times[i] - max(previous) if previous else np.nan))
+    return np.array(rows, dtype=np.float64)
+
+
+class TestVelocityFeatures(unittest.TestCase):
+    def test_timeline_matches_brute_force(self):
+        """Test windowed counts, distinct users and gaps against a full rescan, including tied times."""
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            n = int(rng.integers(1, 60))
+            keys, users, times = rng.integers(0, 4, n), rng.integers(0, 5, n), rng.integers(0, 50, n)
+            window = int(rng.integers(1, 30))
+            timeline = KeyedTimeline(keys, times)
+            result = np.column_stack([timeline.counts(window), timeline.distinct(users, window),
+                                      timeline.since_previous()])
+            np.testing.assert_array_equal(result, brute_force(keys, users, times, window))
+            np.testing.assert_array_equal(timeline.counts(), brute_force(keys, users, times, np.inf)[:, 0])
+
+    def test_frame_features(self):
+        """Test the feature columns, datetime input and the behavioral features on a small frame."""
+        df = pd.DataFrame({
+            "purchase_time": pd.to_datetime(["2015-01-01 00:00", "2015-01-01 00:30", "2015-01-01 02:00",
+                                             "2015-01-03 00:00"]),
+            "device_id": ["A", "A", "A", "B"],
+            "ip_address": [1.0, 2.0, 1.0, 1.0],
+            "user_id": [1, 2, 1, 3],
+            "ip_country": ["Kenya", "Peru", "Peru", "Kenya"],
+        }, index=[10, 11, 12, 13])
+        features = velocity_features(df, windows={"1h": 3600, "1d": 86400})
+        self.assertEqual(features.index.tolist(), df.index.tolist())
+        self.assertEqual(features["device_id_txn_1h"].tolist(), [1, 2, 1, 1])
+        self.assertEqual(features["device_id_users_1d"].tolist(), [1, 2, 2, 1])
+        self.assertEqual(features["ip_address_txn_1d"].tolist(), [1, 1, 2, 1])
+        self.assertNotIn("user_id_users_1h", features.columns)
+        np.testing.assert_array_equal(features["user_id_secs_since_prev"], [np.nan, np.nan, 7200, np.nan])
+
+        behavioral = behavioral_features(df)
+        self.assertEqual(behavioral["device_usage_freq"].tolist(), [1, 2, 3, 1])
+        self.assertEqual(behavioral["cross_border"].tolist(), [0, 1, 0, 0])
+        np.testing.assert_array_equal(behavioral["time_since_last_purchase"], [np.nan, np.nan, 7200, np.nan])
+
+
+if __name__ == "__main__":
+    unittest.main()
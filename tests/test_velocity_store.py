@@ -0,0 +1,155 @@
+import unittest
+import os
+import shutil
+import sys
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "data_preprocessing"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "API"))
+from feature_transform import FeatureTransform
+from flask_api import FraudDetectionAPI
+from velocity_features import velocity_features
+from velocity_store import RingBuffers, VelocityStore
+from test_feature_transform import fit_pipeline
+from test_pipeline import make_raw_fraud_data
+
+WINDOWS = {"1h": 3600, "1d": 86400}
+
+
+def make_transactions(n, seed=0):
+    """Time-ordered purchases over a week from a few devices, IPs and users, so windows hold several events."""
+    rng = np.random.default_rng(seed)
+    times = pd.Timestamp("2015-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 7 * 86400, n)), unit="s")
+    return pd.DataFrame({
+        "purchase_time": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "device_id": rng.choice(["QVPSPJUOCKZAR", "EOGFQPIZPYXFZ", "YSSKYOSJHPPLJ", "KNJTPWVCLJRRB"], n),
+        "ip_address": rng.integers(0, 6, n).astype(np.float64),
+        "user_id": rng.integers(0, 8, n),
+    })
+
+
+class TestVelocityStore(unittest.TestCase):
+    def assertSameFeatures(self, first, second):
+        """Feature dicts hold arrays, which assertEqual cannot compare."""
+        self.assertEqual(list(first), list(second))
+        for name in first:
+            np.testing.assert_array_equal(first[name], second[name], err_msg=name)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_online_matches_offline(self):
+        """Test per-record features equal velocity_features, and a bulk warm-up equals one-by-one updates."""
+        df = make_transactions(400)
+        offline = velocity_features(df, windows=WINDOWS)
+        store = VelocityStore(WINDOWS, capacity=256)
+        online = store.observe(df.to_dict("records"))
+        self.assertEqual(store.feature_names, list(offline.columns))
+        for name in store.feature_names:
+            np.testing.assert_array_equal(online[name], offline[name].to_numpy(np.float64), err_msg=name)
+
+        # Same next features whether the history was bulk-loaded or observed
+        history, last = df.iloc[:-1], df.iloc[-1:].to_dict("records")
+        warmed = VelocityStore(WINDOWS, capacity=256)
+        warmed.warm_up(history)
+        observed = VelocityStore(WINDOWS, capacity=256)
+        observed.observe(history.to_dict("records"))
+        self.assertSameFeatures(warmed.observe(last), observed.observe(last))
+
+    def test_eviction_and_snapshot(self):
+        """Test LRU/TTL eviction bound the keys, and a snapshot restores identical features."""
+        buffers = RingBuffers(capacity=4, max_keys=2)
+        for key, t in (("a", 0), ("b", 1), ("a", 2), ("c", 3)):
+            buffers.update(key, t)
+        self.assertEqual(list(buffers.slots), ["a", "c"])
+        slot, _ = buffers.update("a", 10)
+        self.assertEqual(buffers.counts(slot, 10, np.array([100]))[0], 3)
+        for t in range(11, 20):
+            buffers.update("a", t)
+        self.assertEqual(buffers.counts(slot, 19, np.array([100]))[0], 4)  # saturates at capacity
+        expiring = RingBuffers(capacity=4, max_keys=10, ttl=5)
+        expiring.update("a", 0)
+        expiring.update("b", 10)
+        self.assertEqual(list(expiring.slots), ["b"])
+
+        df = make_transactions(200)
+        store = VelocityStore(WINDOWS)
+        store.warm_up(df.iloc[:150])
+        path = os.path.join(self.tmp_dir, "velocity.npz")
+        store.save(path)
+        restored = VelocityStore(WINDOWS).restore(path)
+        tail = df.iloc[150:].to_dict("records")
+        self.assertSameFeatures(restored.observe(tail), store.observe(tail))
+        with self.assertRaises(ValueError):
+            VelocityStore(WINDOWS, capacity=8).restore(path)
+
+    def test_preview_matches_observe(self):
+        """Test preview gives observe's features without recording, including evictions within the batch."""
+        df = make_transactions(300, seed=1)
+        records = df.iloc[100:].to_dict("records")
+        stores = []
+        for _ in range(2):
+            store = VelocityStore(WINDOWS, capacity=4, max_keys=3, ttl=3600)
+            store.warm_up(df.iloc[:100])
+            stores.append(store)
+        before = {key: buffers.state() for key, buffers in stores[0].buffers.items()}
+        features, pending = stores[0].preview(records)
+        for key, buffers in stores[0].buffers.items():
+            for name, value in buffers.state().items():
+                np.testing.assert_array_equal(value, before[key][name], err_msg=f"{key} {name}")
+        self.assertSameFeatures(features, stores[1].observe(records))
+        stores[0].commit(pending)
+        tail = make_transactions(20, seed=2).assign(purchase_time=df["purchase_time"].iloc[-1]).to_dict("records")
+        self.assertSameFeatures(stores[0].observe(tail), stores[1].observe(tail))
+
+    def test_api_serves_velocity_features(self):
+        """Test /predict/raw feeds the store into the transform, snapshots, and refuses a model it cannot serve."""
+        fraud_path = os.path.join(self.tmp_dir, "Fraud_Data.csv")
+        ip_path = os.path.join(self.tmp_dir, "ip_to_country.csv")
+        transform_path = os.path.join(self.tmp_dir, "feature_transform.npz")
+        make_raw_fraud_data(500).to_csv(fraud_path, index=False)
+        pd.DataFrame({"lower_bound_ip_address": [0], "upper_bound_ip_address": [2**32 - 1],
+                      "country": ["Kenya"]}).to_csv(ip_path, index=False)
+        cleaned, features, pipeline = fit_pipeline(fraud_path, ip_path, transform_path)
+        velocity = velocity_features(cleaned, windows=WINDOWS)[["device_id_txn_1h", "device_id_users_1d"]]
+        features = pd.concat([features, velocity.set_axis(features.index)], axis=1)
+        FeatureTransform.from_processor(pipeline.processor, feature_names=list(features.columns)).save(transform_path)
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(features, cleaned["class"])
+        model_path = os.path.join(self.tmp_dir, "model.pkl")
+        with open(model_path, "wb") as file:
+            pickle.dump(model, file)
+
+        snapshot_path = os.path.join(self.tmp_dir, "velocity.npz")
+        api = FraudDetectionAPI(model_path=model_path, transform_path=transform_path, warmup_rows=8,
+                                velocity_windows=WINDOWS, velocity_snapshot_path=snapshot_path)
+        reference = VelocityStore(WINDOWS)
+        records = make_raw_fraud_data(20, seed=3).sort_values("purchase_time").to_dict("records")
+        expected = model.predict_proba(FeatureTransform.load(transform_path).transform(
+            records, velocity=reference.observe(records)))[:, 1]
+        body = api.app.test_client().post("/predict/raw", json=records).get_json()
+        np.testing.assert_allclose(body["fraud_probability"], expected, rtol=1e-5)
+
+        # Rejected requests leave the history as it was, so a corrected retry is counted once
+        for bad in ([{**records[0], "purchase_time": "not a time"}, records[1]],
+                    [records[0], {key: value for key, value in records[1].items() if key != "device_id"}]):
+            body = api.app.test_client().post("/predict/raw", json=bad).get_json()
+            self.assertIn("error", body)
+            self.assertEqual(api.velocity.updates, 20)
+
+        self.assertEqual(api.app.test_client().post("/admin/velocity/snapshot").status_code, 200)
+        restarted = FraudDetectionAPI(model_path=model_path, transform_path=transform_path, warmup_rows=8,
+                                      velocity_windows=WINDOWS, velocity_snapshot_path=snapshot_path)
+        self.assertEqual(restarted.velocity.updates, 20)
+        with self.assertRaises(ValueError):
+            FraudDetectionAPI(model_path=model_path, transform_path=transform_path)
+
+
+if __name__ == "__main__":
+    unittest.main()